@@ -1,18 +1,140 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import exc, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from .settings import settings
-from typing import Generator
+from ..utils.metrics import LatencyStats
+from typing import AsyncGenerator, Dict, Any
+import threading
+import time
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
 
-def get_db() -> Generator[Session, None, None]:
-    db = SessionLocal()
-    try:
+
+def async_database_url(url: str) -> str:
+    """Points a plain postgresql:// or sqlite:// URL at its async driver; explicit drivers are kept."""
+    parsed = make_url(url)
+    if parsed.drivername in ASYNC_DRIVERS:
+        parsed = parsed.set(drivername=ASYNC_DRIVERS[parsed.drivername])
+    return parsed.render_as_string(hide_password=False)
+
+
+class PoolMetrics:
+    """Checkout counts and time spent waiting for a pooled connection."""
+
+    def __init__(self):
+        self.wait = LatencyStats()
+        self.checkouts = 0
+        self.connects = 0
+        self.timeouts = 0
+        self._lock = threading.Lock()
+
+    def record(self, attribute: str) -> None:
+        with self._lock:
+            setattr(self, attribute, getattr(self, attribute) + 1)
+
+
+pool_metrics = PoolMetrics()
+
+
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a free connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record("timeouts")
+            raise
+        finally:
+            pool_metrics.wait.observe(time.perf_counter() - started)
+        pool_metrics.record("checkouts")
+        return connection
+
+    def _create_connection(self):
+        pool_metrics.record("connects")
+        return super()._create_connection()
+
+
+def _engine_options(url: str) -> Dict[str, Any]:
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # In-memory SQLite lives in a single connection; keep SQLAlchemy's default pool.
+        return {}
+    return {
+        "poolclass": MeteredQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+DATABASE_URL = async_database_url(settings.DATABASE_URL)
+engine = create_async_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+# Objects stay usable after commit: lazy refreshes are not possible outside the async session.
+SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-def create_tables():
+
+def _create_missing_indexes(connection, metadata) -> None:
+    # create_all skips tables that already exist, so indexes added to the
+    # models later are created here.
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def _add_missing_columns(connection, metadata) -> None:
+    # Likewise for columns; only nullable columns without defaults are added
+    # this way, so existing rows stay valid.
+    inspector = inspect(connection)
+    for table in metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing and column.nullable:
+                column_type = column.type.compile(dialect=connection.dialect)
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
+
+async def create_tables():
     from ..models.file_model import Base
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns, Base.metadata)
+        await conn.run_sync(_create_missing_indexes, Base.metadata)
+
+    if engine.dialect.name == "postgresql":
+        try:
+            async with engine.begin() as conn:
+                # Lets ILIKE '%term%' filename search use an index instead of a scan.
+                await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                await conn.execute(text(
+                    "CREATE INDEX IF NOT EXISTS ix_file_records_filename_trgm "
+                    "ON file_records USING gin (original_filename gin_trgm_ops)"
+                ))
+        except Exception as e:
+            print(f"Warning: trigram index unavailable, filename search will scan file_records: {e}")
+
+
+def pool_stats() -> Dict[str, Any]:
+    pool = engine.pool
+    stats = {
+        "checkouts": pool_metrics.checkouts,
+        "connects": pool_metrics.connects,
+        "timeouts": pool_metrics.timeouts,
+        "wait": pool_metrics.wait.snapshot(),
+    }
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        })
+    return stats
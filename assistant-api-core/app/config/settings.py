@@ -1,17 +1,45 @@
 
 from pydantic_settings import BaseSettings
+from typing import Dict, Optional
 import os
 
 class Settings(BaseSettings):
     PORT: int
     DATABASE_URL: str
+    # postgresql:// and sqlite:// URLs are switched to the asyncpg / aiosqlite drivers.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
     
     UPLOAD_DIR: str = "./uploads"
-    MAX_FILE_SIZE: int = 10485760  # 10MB
+    MAX_FILE_SIZE: int = 536870912  # 512MB
     
     API_V1_STR: str = "/api/v1"
     PROJECT_NAME: str = "ActivaMente AI Assistant Backend V1.0"
     DEBUG: bool = True
+    # Dumps retrieved chunks and prompt context and runs the agent with verbose=True
+    DEBUG_LOGGING: bool = False
+
+    # Observability: Prometheus metrics are served at /metrics; spans are
+    # exported over OTLP/gRPC only when an endpoint is set.
+    OTEL_EXPORTER_OTLP_ENDPOINT: Optional[str] = None
+    OTEL_SERVICE_NAME: str = "assistant-api"
+
+    # Ingestion queue
+    INGESTION_WORKERS: int = 2
+    INGESTION_QUEUE_SIZE: int = 100
+    INGESTION_BATCH_SIZE: int = 64
+    INGESTION_BLOCK_SIZE: int = 1048576  # 1MB
+    # Files of at least INGESTION_PARALLEL_MIN_SIZE are cleaned and chunked in
+    # sections of about INGESTION_SECTION_SIZE on this many processes; 0 keeps
+    # everything in the ingestion thread
+    INGESTION_PROCESSES: int = 2
+    INGESTION_SECTION_SIZE: int = 4194304  # 4MB
+    INGESTION_PARALLEL_MIN_SIZE: int = 16777216  # 16MB
+    # Jobs left queued/processing without progress for this long are marked failed at startup
+    INGESTION_STALE_JOB_SECONDS: int = 900
 
     #CHUNKS
     CHUNK_SIZE: int = 1000
@@ -19,21 +47,91 @@ class Settings(BaseSettings):
     
     TXT_CHUNK_SIZE: int = 1000
     CSV_CHUNK_SIZE: int = 500
+    # Hash-stable chunk boundaries so re-uploads only re-embed changed chunks
+    CONTENT_DEFINED_CHUNKING: bool = True
+    # TXT files are split on headings and paragraphs into chunks of at most
+    # CHUNK_MAX_TOKENS embedding tokens, each tagged with its section title;
+    # the character-based sizes above then only apply to CSV, while
+    # CONTENT_DEFINED_CHUNKING still picks hash-stable boundaries
+    STRUCTURED_CHUNKING: bool = True
+    CHUNK_MAX_TOKENS: int = 256
 
     #EMBEDDINGS
     OPENAI_API_KEY: str = "openai_api_key"
     EMBEDDING_MODEL: str = "text-embedding-ada-002"
     EMBEDDING_DIMENSIONS: int = 1536
+    # Tokenizes inputs with tiktoken to split texts longer than the model context.
+    # Chunks are far below it, so this can be off where tiktoken cannot download its encoding.
+    EMBEDDING_CHECK_CTX_LENGTH: bool = True
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PATH: str = "./embedding_cache/embeddings.sqlite3"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 200000
+    EMBEDDING_BATCH_MAX_TOKENS: int = 20000
+    EMBEDDING_BATCH_MAX_ITEMS: int = 256
+    EMBEDDING_CONCURRENCY: int = 4
+    EMBEDDING_MAX_RETRIES: int = 6
+    EMBEDDING_RETRY_BASE_DELAY: float = 0.5
+    EMBEDDING_RETRY_MAX_DELAY: float = 30.0
+    EMBEDDING_TOKENS_PER_MINUTE: int = 0  # 0 disables the budget
+
+    # Vector index: "chroma" (VECTOR_DB_MODE below) or "numpy", an in-process
+    # memory-mapped index under NUMPY_INDEX_PATH that workers share via the page cache.
+    VECTOR_BACKEND: str = "chroma"
+    NUMPY_INDEX_PATH: str = "./vector_index"
+    # Format for new numpy collections: float32, float16 or int8. Compressed
+    # formats re-score k * NUMPY_RESCORE_MULTIPLIER candidates at full precision.
+    NUMPY_VECTOR_STORAGE: str = "float32"
+    NUMPY_VECTOR_STORAGE_BY_COLLECTION: Dict[str, str] = {}  # JSON, e.g. {"documents": "int8"}
+    NUMPY_RESCORE_MULTIPLIER: int = 4
 
     # Configuración para Chroma DB
+    # "embedded" opens CHROMA_DB_PATH in-process (single worker only);
+    # "http" talks to a Chroma server so several workers/replicas share one store.
+    VECTOR_DB_MODE: str = "embedded"
+    CHROMA_HOST: str = "chromadb"
+    CHROMA_PORT: int = 8000
+    CHROMA_SSL: bool = False
     CHROMA_DB_PATH: str = "./chroma_db"
     CHROMA_COLLECTION_NAME: str = "documents"
 
+    # Hybrid retrieval: BM25 index stored in CHROMA_DB_PATH, fused with vector results
+    HYBRID_SEARCH_ENABLED: bool = True
+    HYBRID_RRF_K: int = 60
+    HYBRID_CANDIDATES_MULTIPLIER: int = 4
+    # The BM25 index is per host; with VECTOR_DB_MODE=http it is re-synced from
+    # the shared store this often so chunks ingested by other replicas are found (0 = startup only).
+    LEXICAL_SYNC_INTERVAL_SECONDS: int = 60
+
+    # Optional cross-encoder reranker (ONNX, CPU); directory with model.onnx and tokenizer.json
+    RERANKER_ENABLED: bool = False
+    RERANKER_MODEL_PATH: str = "./models/reranker"
+    RERANK_CANDIDATES: int = 20
+    RERANK_BATCH_SIZE: int = 16
+    RERANK_MAX_LENGTH: int = 512
+    RERANK_THREADS: int = 0  # 0 lets onnxruntime decide
+    RERANK_TIMEOUT_MS: int = 300
+
     # Configuración para LLM
     LLM_MODEL: str = "gpt-3.5-turbo"
     LLM_TEMPERATURE: float = 0.1
     MAX_TOKENS: int = 1000
     MAX_CONTEXT_CHUNKS: int = 5
+    # Prompt context budget; adjacent chunks are merged and near-duplicates dropped first
+    CONTEXT_MAX_TOKENS: int = 2500
+    CONTEXT_DEDUP_THRESHOLD: float = 0.8
+
+    # Answer cache for /assistant/chat
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_MAX_ENTRIES: int = 1000
+    ANSWER_CACHE_TTL_SECONDS: int = 3600
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = 0.95
+
+    # Intent router
+    INTENT_ROUTER_ENABLED: bool = True
+
+    # POST /assistant/chat/batch
+    CHAT_BATCH_MAX_MESSAGES: int = 500
+    CHAT_BATCH_CONCURRENCY: int = 8
 
     # Strapi
     JWT_TOKEN: str = "my_api_key"
@@ -1,27 +1,40 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from .config.settings import settings
-from .config.database import create_tables
+from .config.database import create_tables, engine, pool_stats
 from .routers import platform, assistant
+from .services.container import ServiceContainer, get_services
+from .utils.response_utils import ResponseUtils
+from .utils.telemetry import configure_tracing, shutdown_tracing, metrics_response
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Starting Server...")
+    configure_tracing()
     
     try:
-        create_tables()
+        await create_tables()
         print("Database tables created successfully")
     except Exception as e:
         print(f"Error creating database tables: {e}")
         raise
     
+    services = ServiceContainer()
+    app.state.services = services
+    await services.start()
+    print(f"Services initialized in {services.startup_ms} ms: {services.init_timings}")
+    print(f"Ingestion queue started with {settings.INGESTION_WORKERS} workers")
+
     print(f"{settings.PROJECT_NAME} started successfully")
     
     yield
     
     print("Shutting down server...")
+    await services.close()
+    await engine.dispose()
+    shutdown_tracing()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -43,6 +56,14 @@ app.add_middleware(
 app.include_router(platform.router, prefix=settings.API_V1_STR)
 app.include_router(assistant.router, prefix=settings.API_V1_STR)
 
+@app.get("/health")
+async def health(services: ServiceContainer = Depends(get_services)):
+    return ResponseUtils.success(data={**services.stats(), "database": pool_stats()}, message="OK")
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return metrics_response()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, BigInteger
+from sqlalchemy import Column, Integer, String, DateTime, Text, BigInteger, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.ext.declarative import declarative_base
 import uuid
@@ -16,6 +16,33 @@ class FileRecord(Base):
     file_size = Column(BigInteger, nullable=False)
     upload_date = Column(DateTime(timezone=True), server_default=func.now())
     content_preview = Column(Text, nullable=True)
+
+    # Keyset pagination walks this index newest first. Filename search uses a
+    # pg_trgm index created in config/database.py (PostgreSQL only).
+    __table_args__ = (Index("ix_file_records_upload_date_id", "upload_date", "id"),)
     
     def __repr__(self):
-        return f"<FileRecord(id={self.id}, filename={self.original_filename})>"
\ No newline at end of file
+        return f"<FileRecord(id={self.id}, filename={self.original_filename})>"
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String, unique=True, index=True, default=lambda: str(uuid.uuid4()))
+    file_id = Column(String, ForeignKey("file_records.file_id", ondelete="CASCADE"), index=True, nullable=False)
+    status = Column(String, nullable=False, default="queued")
+    total_chunks = Column(Integer, nullable=False, default=0)
+    processed_chunks = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    # Set for jobs that replace the content of an existing file: the upload
+    # waits at staged_path until its chunks are synced.
+    staged_path = Column(String, nullable=True)
+    staged_filename = Column(String, nullable=True)
+    reused_chunks = Column(Integer, nullable=True)
+    added_chunks = Column(Integer, nullable=True)
+    removed_chunks = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<IngestionJob(job_id={self.job_id}, status={self.status})>"
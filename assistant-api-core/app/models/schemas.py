@@ -1,7 +1,7 @@
 from fastapi import File, UploadFile
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional, Generic, TypeVar, List, Any
+from typing import Optional, Generic, TypeVar, List, Any, Dict
 from enum import Enum
 
 T = TypeVar('T')
@@ -24,21 +24,59 @@ class FileInfo(BaseModel):
     upload_date: datetime
     content_preview: Optional[str]
 
+class TotalCount(str, Enum):
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    NONE = "none"
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class JobInfo(BaseModel):
+    job_id: str
+    file_id: str
+    status: JobStatus
+    total_chunks: int
+    processed_chunks: int
+    error: Optional[str] = None
+    # Only reported by jobs that update an existing file.
+    reused_chunks: Optional[int] = None
+    added_chunks: Optional[int] = None
+    removed_chunks: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
 class ChatRequest(BaseModel):
     message: str
+    # Only retrieve chunks under this heading, as written in the file; case is ignored
+    section: Optional[str] = None
     # file: UploadFile = File(...) # TODO: add functionality after set the RAG LangChain
 
+class ChatBatchRequest(BaseModel):
+    messages: List[str]
+    section: Optional[str] = None
+
 class ErrorResponse(BaseModel):
     error: str
     detail: Optional[str] = None
 
 class FileUploadData(BaseModel):
     file: FileInfo
+    job: Optional[JobInfo] = None
+
+class FileUpdateData(BaseModel):
+    file: FileInfo
+    job: JobInfo
 
 class PaginationInfo(BaseModel):
     page: int
     size: int
-    total: int
+    total: Optional[int] = None
+    total_estimated: bool = False
+    next_cursor: Optional[str] = None
 
 class FilesListData(BaseModel):
     files: List[FileInfo]
@@ -46,7 +84,31 @@ class FilesListData(BaseModel):
 
 class ChatData(BaseModel):
     answer: str
+    # Packed context size and the tokens packing saved; None when no context was built.
+    context_tokens: Optional[int] = None
+    tokens_saved: Optional[int] = None
+
+class ChatBatchItem(BaseModel):
+    index: int
+    message: str
+    success: bool
+    answer: Optional[str] = None
+    error: Optional[str] = None
+    cached: bool = False
+    route: Optional[str] = None
+    context_tokens: Optional[int] = None
+    tokens_saved: Optional[int] = None
+    duplicate_of: Optional[int] = None
+    elapsed_ms: Optional[float] = None
+
+class ChatBatchData(BaseModel):
+    results: List[ChatBatchItem]
+    unique_questions: int
+    timings: Dict[str, float]
 
 FileUploadResponse = ApiResponse[FileUploadData]
+FileUpdateResponse = ApiResponse[FileUpdateData]
 FilesListResponse = ApiResponse[FilesListData]
-ChatResponse = ApiResponse[ChatData]
\ No newline at end of file
+ChatResponse = ApiResponse[ChatData]
+ChatBatchResponse = ApiResponse[ChatBatchData]
+JobStatusResponse = ApiResponse[JobInfo]
\ No newline at end of file
@@ -1,33 +1,98 @@
 from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
 from ..services.file_service import FileService
-from ..models.schemas import ChatRequest, ChatResponse, ChatData
+from ..models.schemas import ChatRequest, ChatResponse, ChatData, ChatBatchRequest, ChatBatchResponse
+from ..config.settings import settings
 from ..utils.response_utils import ResponseUtils
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from ..services.rag_service import RAGService
+from ..services.container import get_rag_service
+import json
 
 router = APIRouter(prefix="/assistant", tags=["Assistant"])
-rag_service = RAGService()
+
+def _empty_message_response() -> JSONResponse:
+    return JSONResponse(
+        status_code=400,
+        content={
+            "success": False,
+            "data": None,
+            "error": "EMPTY_MESSAGE",
+            "message": "Message cannot be empty"
+        }
+    )
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, rag_service: RAGService = Depends(get_rag_service)):
     if not request.message.strip():
+        return _empty_message_response()
+    
+    code, response = await rag_service.query_documents(request.message, section=request.section)
+    
+    if not response.success:
+        return JSONResponse(
+            status_code=code,
+            content=response.model_dump()
+        )
+
+    return response
+
+@router.post("/chat/batch", response_model=ChatBatchResponse)
+async def chat_batch(request: ChatBatchRequest, rag_service: RAGService = Depends(get_rag_service)):
+    """Answers many messages at once; results keep the request order and report per-item timings."""
+    if not request.messages or len(request.messages) > settings.CHAT_BATCH_MAX_MESSAGES:
         return JSONResponse(
             status_code=400,
             content={
                 "success": False,
                 "data": None,
-                "error": "EMPTY_MESSAGE",
-                "message": "Message cannot be empty"
+                "error": "INVALID_BATCH",
+                "message": f"Send between 1 and {settings.CHAT_BATCH_MAX_MESSAGES} messages"
             }
         )
-    
-    code, response = await rag_service.query_documents(request.message)
-    
+
+    code, response = await rag_service.query_batch(request.messages, section=request.section)
+
     if not response.success:
         return JSONResponse(
             status_code=code,
             content=response.model_dump()
         )
 
-    return response
\ No newline at end of file
+    return response
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest, rag_service: RAGService = Depends(get_rag_service)):
+    """Server-sent events variant of /chat: retrieval, tool_start/tool_end, token, then done or error."""
+    if not request.message.strip():
+        return _empty_message_response()
+
+    async def event_source():
+        async for event in rag_service.stream_query(request.message, section=request.section):
+            payload = json.dumps(event["data"], ensure_ascii=False, default=str)
+            yield f"event: {event['event']}\ndata: {payload}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/chat/stream/stats")
+async def chat_stream_stats(rag_service: RAGService = Depends(get_rag_service)):
+    return ResponseUtils.success(data=rag_service.stream_stats(), message="Streaming latency stats")
+
+@router.get("/chat/route/stats")
+async def chat_route_stats(rag_service: RAGService = Depends(get_rag_service)):
+    return ResponseUtils.success(data=rag_service.route_stats(), message="Chat route latency stats")
+
+@router.get("/chat/retrieval/stats")
+async def chat_retrieval_stats(rag_service: RAGService = Depends(get_rag_service)):
+    return ResponseUtils.success(data=rag_service.retrieval_stats(), message="Retrieval stats")
+
+@router.get("/chat/context/stats")
+async def chat_context_stats(rag_service: RAGService = Depends(get_rag_service)):
+    return ResponseUtils.success(data=rag_service.context_stats(), message="Context packing stats")
+
+@router.get("/chat/cache/stats")
+async def chat_cache_stats(rag_service: RAGService = Depends(get_rag_service)):
+    return ResponseUtils.success(data=rag_service.answer_cache_stats(), message="Answer cache stats")
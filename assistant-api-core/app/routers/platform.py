@@ -1,18 +1,19 @@
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..config.database import get_db
 from ..services.file_service import FileService
-from ..models.schemas import FileUploadResponse, FilesListResponse
+from ..services.container import get_file_service
+from ..models.schemas import FileUploadResponse, FileUpdateResponse, FilesListResponse, JobStatusResponse, TotalCount
 from fastapi.responses import JSONResponse
 from typing import Optional
 
 router = APIRouter(prefix="/platform", tags=["Platform"])
-file_service = FileService()
 
-@router.post("/upload-file", response_model=FileUploadResponse)
+@router.post("/upload-file", response_model=FileUploadResponse, status_code=202)
 async def upload_file(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    file_service: FileService = Depends(get_file_service)
 ):
     code, result = await file_service.upload_file(file, db)
 
@@ -24,14 +25,51 @@ async def upload_file(
     
     return result 
 
+@router.put("/files/{file_id}", response_model=FileUpdateResponse, status_code=202)
+async def update_file(
+    file_id: str,
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    file_service: FileService = Depends(get_file_service)
+):
+    code, result = await file_service.update_file(file_id, file, db)
+
+    if not result.success:
+        return JSONResponse(
+            status_code=code,
+            content=result.model_dump()
+        )
+    
+    return result
+
 @router.get("/files", response_model=FilesListResponse)
 async def get_files(
     page: int = Query(1, ge=1, description="Page Number"),
     size: int = Query(10, ge=1, le=100, description="Size page"),
     query: Optional[str] = Query(None, description="Represent name file to search"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; replaces page"),
+    count: TotalCount = Query(TotalCount.EXACT, description="exact, estimated or none"),
+    include_preview: bool = Query(False, description="Return the full content_preview instead of its first 100 characters"),
+    db: AsyncSession = Depends(get_db),
+    file_service: FileService = Depends(get_file_service)
+):
+    code, result = await file_service.get_files(db, page, size, query, cursor, count, include_preview)
+
+    if not result.success:
+        return JSONResponse(
+            status_code=code,
+            content=result.model_dump()
+        )
+    
+    return result 
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    file_service: FileService = Depends(get_file_service)
 ):
-    code, result = file_service.get_files(db, page, size, query)
+    code, result = await file_service.get_job(db, job_id)
 
     if not result.success:
         return JSONResponse(
@@ -39,4 +77,4 @@ async def get_files(
             content=result.model_dump()
         )
     
-    return result 
\ No newline at end of file
+    return result
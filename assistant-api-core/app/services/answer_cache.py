@@ -0,0 +1,173 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Set
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+import numpy as np
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    answer: str
+    embedding: np.ndarray
+    context_fingerprint: str
+    file_ids: Set[str]
+    created_at: float
+
+
+class AnswerCache:
+    """In-memory answer cache looked up by normalized question text, then by embedding similarity.
+
+    An entry only answers a request whose retrieved context has the same
+    fingerprint (same chunks, hence same file_ids and content) as the
+    context the answer was generated from.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, similarity_threshold: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, CachedAnswer]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: List[str] = []
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize(question: str) -> str:
+        text = unicodedata.normalize("NFKD", question.lower())
+        text = "".join(c for c in text if not unicodedata.combining(c))
+        text = re.sub(r"[^\w\s]", " ", text)
+        return " ".join(text.split())
+
+    @staticmethod
+    def fingerprint(relevant_docs: List[Dict[str, Any]]) -> str:
+        hashes = sorted(
+            doc["metadata"].get("chunk_hash") or hashlib.sha256(doc["content"].encode("utf-8")).hexdigest()
+            for doc in relevant_docs
+        )
+        return hashlib.sha256("|".join(hashes).encode("utf-8")).hexdigest()
+
+    def lookup(
+        self,
+        question: str,
+        embedding: List[float],
+        context_fingerprint: str,
+        semantic: bool = True
+    ) -> Optional[CachedAnswer]:
+        """Returns the entry for the same normalized question, else (with ``semantic``) the most similar one."""
+        key = self.normalize(question)
+        with self._lock:
+            self._expire()
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.context_fingerprint == context_fingerprint:
+                    self._entries.move_to_end(key)
+                    self.exact_hits += 1
+                    return entry
+                self._remove(key)
+                self.invalidations += 1
+
+            match = self._most_similar(embedding, context_fingerprint) if semantic else None
+            if match is not None:
+                self._entries.move_to_end(match)
+                self.semantic_hits += 1
+                return self._entries[match]
+
+            self.misses += 1
+            return None
+
+    def store(
+        self,
+        question: str,
+        embedding: List[float],
+        answer: str,
+        context_fingerprint: str,
+        file_ids: Set[str]
+    ) -> None:
+        key = self.normalize(question)
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        with self._lock:
+            self._entries[key] = CachedAnswer(
+                question=question,
+                answer=answer,
+                embedding=vector / norm if norm else vector,
+                context_fingerprint=context_fingerprint,
+                file_ids=set(file_ids),
+                created_at=time.monotonic()
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._matrix = None
+
+    def invalidate_files(self, file_ids: Set[str]) -> int:
+        file_ids = {str(file_id) for file_id in file_ids}
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry.file_ids & file_ids]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def _most_similar(self, embedding: List[float], context_fingerprint: str) -> Optional[str]:
+        if not self._entries:
+            return None
+        if self._matrix is None:
+            self._matrix_keys = list(self._entries.keys())
+            self._matrix = np.stack([self._entries[key].embedding for key in self._matrix_keys])
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if not norm:
+            return None
+        scores = self._matrix @ (query / norm)
+
+        for index in np.argsort(-scores):
+            if scores[index] < self.similarity_threshold:
+                break
+            key = self._matrix_keys[index]
+            if self._entries[key].context_fingerprint == context_fingerprint:
+                return key
+        return None
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [key for key, entry in self._entries.items() if entry.created_at < cutoff]
+        for key in expired:
+            self._remove(key)
+        self.evictions += len(expired)
+
+    def _remove(self, key: str) -> None:
+        del self._entries[key]
+        self._matrix = None
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.exact_hits + self.semantic_hits
+        lookups = hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+            "hit_rate": hits / lookups if lookups else 0.0
+        }
@@ -1,10 +1,83 @@
-from typing import List
+from functools import cached_property
+from typing import Callable, Dict, List, Iterable, Iterator, NamedTuple, Optional, Tuple
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from ..config.settings import settings
+from ..utils.file_processor import NON_PRINTABLE_PATTERN, SPACES_PATTERN
+from ..utils.tokens import get_encoding, get_token_counter, APPROX_CHARS_PER_TOKEN
 import csv
 import io
+import math
+import re
+import unicodedata
+import zlib
+
+MARKDOWN_HEADING_PATTERN = re.compile(r"^#{1,6}\s+\S")
+LABEL_PATTERN = re.compile(r"^\*\*[^*]+\*\*:?$")
+RULE_PATTERN = re.compile(r"^(-{3,}|\*{3,}|_{3,})$")
+SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?])\s+")
+# Uppercase lines up to this long are headings, e.g. "LISBOA, PORTUGAL".
+MAX_CAPS_HEADING_LENGTH = 80
+
+
+class Block(NamedTuple):
+    """Body text with its token count, or a heading line, as produced by ``iter_structured_blocks``."""
+    text: str
+    tokens: int
+    heading: bool = False
+
+
+def is_heading(line: str) -> bool:
+    if MARKDOWN_HEADING_PATTERN.match(line):
+        return True
+    return (
+        len(line) <= MAX_CAPS_HEADING_LENGTH
+        and not line.endswith((".", ",", ":"))
+        and line.upper() == line
+        and sum(1 for char in line if char.isalpha()) >= 3
+    )
+
+
+def heading_title(line: str) -> str:
+    return line.strip().lstrip("#").strip().strip("*").strip()
+
+
+def section_key(title: str) -> str:
+    """Key that section filters compare: the title cleaned like file text, lowercased.
+
+    Stored titles lost their non-ASCII characters in FileProcessor, so a title
+    given by a client goes through the same filter: "PARÍS, FRANCIA" and the
+    stored "PARS, FRANCIA" both become "pars, francia".
+    """
+    title = NON_PRINTABLE_PATTERN.sub("", unicodedata.normalize("NFC", title))
+    return heading_title(SPACES_PATTERN.sub(" ", title)).lower()
+
+
+def section_metadata(content: str) -> Dict[str, str]:
+    """Section title from a chunk's leading heading line and the first ``**label**`` in it.
+
+    Structured chunks always start with their section heading; other chunkers
+    only get a section when a chunk happens to start at one.
+    """
+    metadata = {}
+    lines = content.split("\n")
+    if lines and is_heading(lines[0].strip()):
+        metadata["section"] = heading_title(lines[0])
+        metadata["section_key"] = section_key(lines[0])
+    for line in lines:
+        if LABEL_PATTERN.match(line.strip()):
+            metadata["subsection"] = heading_title(line).rstrip(":").strip("*").strip()
+            break
+    return metadata
+
 
 class ChunkService:
+    STREAM_WINDOW_CHUNKS = 32
+    # A unit whose CRC32 is divisible by this closes a content-defined chunk
+    # once the chunk is at least half the target size.
+    CDC_BOUNDARY_DIVISOR = 3
+    # Paragraphs of one section are balanced over chunks within windows of this many chunks.
+    STRUCTURED_WINDOW_CHUNKS = 8
+
     def __init__(self):
         self.txt_splitter = RecursiveCharacterTextSplitter(
             chunk_size=settings.TXT_CHUNK_SIZE,
@@ -28,29 +101,389 @@ class ChunkService:
         else:
             return self.txt_splitter.split_text(content)
     
+    def iter_chunks(self, pieces: Iterable[str], file_type: str) -> Iterator[str]:
+        """Chunks a stream of text pieces while holding only a bounded window in memory."""
+        if file_type.lower() == 'csv':
+            yield from self._process_csv_chunks("".join(pieces))
+            return
+
+        window = settings.TXT_CHUNK_SIZE * self.STREAM_WINDOW_CHUNKS
+        buffer: List[str] = []
+        buffered = 0
+
+        for piece in pieces:
+            buffer.append(piece)
+            buffered += len(piece)
+            if buffered < window:
+                continue
+
+            chunks = self.txt_splitter.split_text("".join(buffer))
+            # The last chunk may continue in the next pieces, so it is
+            # re-split together with them instead of being emitted now.
+            yield from chunks[:-1]
+            buffer = chunks[-1:]
+            buffered = sum(len(chunk) for chunk in buffer)
+
+        if buffer:
+            yield from self.txt_splitter.split_text("".join(buffer))
+
+    def iter_content_defined_chunks(self, units: Iterable[str], max_size: int) -> Iterator[str]:
+        """Groups units (lines or CSV rows) into chunks whose boundaries depend only on content.
+
+        A chunk closes after a unit whose hash hits the boundary condition once the chunk
+        is at least half of ``max_size``, or before a unit that would overflow it. Since
+        the decision only looks at the units since the last boundary, an edit changes the
+        chunks around it and boundaries resynchronise right after, so unchanged text keeps
+        producing identical chunks. There is no overlap between these chunks.
+        """
+        return self.pack_content_defined(self.iter_content_defined_pieces(units, max_size), max_size)
+
+    def iter_content_defined_pieces(self, units: Iterable[str], max_size: int) -> Iterator[str]:
+        """Strips units, drops blank ones and splits those longer than ``max_size``."""
+        unit_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=max_size,
+            chunk_overlap=0,
+            length_function=len,
+            separators=["\n", ",", " ", ""]
+        )
+        for unit in units:
+            unit = unit.strip()
+            if not unit:
+                continue
+            if len(unit) <= max_size:
+                yield unit
+            else:
+                yield from unit_splitter.split_text(unit)
+
+    def pack_content_defined(self, pieces: Iterable[str], max_size: int) -> Iterator[str]:
+        """Joins pieces with newlines into content-defined chunks; pieces never contain newlines."""
+        min_size = max_size // 2
+        current: List[str] = []
+        size = 0
+
+        for piece in pieces:
+            if current and size + 1 + len(piece) > max_size:
+                yield "\n".join(current)
+                current, size = [], 0
+
+            size += len(piece) + (1 if current else 0)
+            current.append(piece)
+
+            if size >= min_size and self._is_boundary_piece(piece):
+                yield "\n".join(current)
+                current, size = [], 0
+
+        if current:
+            yield "\n".join(current)
+
+    def closes_content_defined_chunk(self, chunk: str, max_size: int) -> bool:
+        """Whether ``pack_content_defined`` closed this chunk on a boundary rather than at the end of its input."""
+        return len(chunk) >= max_size // 2 and self._is_boundary_piece(chunk.rsplit("\n", 1)[-1])
+
+    def _is_boundary_piece(self, piece: str) -> bool:
+        return zlib.crc32(piece.encode("utf-8")) % self.CDC_BOUNDARY_DIVISOR == 0
+
+    @cached_property
+    def count_tokens(self) -> Callable[[str], int]:
+        # Loaded on first use: tiktoken may try to download its encoding.
+        return get_token_counter(settings.EMBEDDING_MODEL)
+
+    def iter_structured_chunks(self, lines: Iterable[str], max_tokens: int) -> Iterator[str]:
+        """Chunks text along its headings and paragraphs, sized in embedding-model tokens.
+
+        A chunk never spans two sections, holds whole paragraphs where they fit,
+        and starts with its section heading so it reads on its own and carries
+        the title for ``section_metadata``. There is no overlap.
+        """
+        return self.pack_structured_blocks(self.iter_structured_blocks(lines, max_tokens), max_tokens)
+
+    def iter_structured_blocks(self, lines: Iterable[str], max_tokens: int) -> Iterator[Block]:
+        """Classifies cleaned lines into headings and token-counted paragraphs.
+
+        Each paragraph is tokenized once; a ``**label**`` line is attached to the
+        paragraph after it, and paragraphs over ``max_tokens`` are split at
+        sentence ends. Blocks only depend on their own line, so a file can be
+        processed in sections and the blocks concatenated.
+        """
+        label: Optional[Block] = None
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+
+            if RULE_PATTERN.match(line):
+                # A rule closes whatever the label was introducing.
+                if label is not None:
+                    yield label
+                    label = None
+            elif is_heading(line):
+                if label is not None:
+                    yield label
+                    label = None
+                yield Block(line, 0, heading=True)
+            elif LABEL_PATTERN.match(line):
+                if label is not None:
+                    yield label
+                label = Block(line, self.count_tokens(line))
+            elif label is None:
+                yield from self._split_paragraph(line, max_tokens)
+            else:
+                # Joining with a newline costs one token.
+                budget = max(1, max_tokens - label.tokens - 1)
+                pieces = self._split_paragraph(line, budget)
+                first = next(pieces)
+                yield Block(f"{label.text}\n{first.text}", label.tokens + 1 + first.tokens)
+                yield from pieces
+                label = None
+
+        if label is not None:
+            yield label
+
+    def pack_structured_blocks(
+        self, blocks: Iterable[Block], max_tokens: int, content_defined: Optional[bool] = None
+    ) -> Iterator[str]:
+        """Packs the paragraphs of each section into chunks of at most ``max_tokens``.
+
+        Token counts of the blocks are summed instead of re-tokenizing every
+        candidate chunk, and the heading repeated at the top of each chunk
+        counts against the budget.
+
+        With ``content_defined`` (CONTENT_DEFINED_CHUNKING by default) a chunk
+        closes after a paragraph whose hash hits the boundary condition, as in
+        ``pack_content_defined``, so editing a paragraph only changes the chunks
+        up to the next such boundary and re-uploads re-embed little. Otherwise
+        a section is spread evenly over the fewest chunks that hold it, so its
+        last chunk is not a short leftover, at the cost of moving every boundary
+        of the section (or of its STRUCTURED_WINDOW_CHUNKS window) on an edit.
+        """
+        if content_defined is None:
+            content_defined = settings.CONTENT_DEFINED_CHUNKING
+        if content_defined:
+            yield from self._pack_content_defined_blocks(blocks, max_tokens)
+            return
+
+        window = max_tokens * self.STRUCTURED_WINDOW_CHUNKS
+        heading: Optional[str] = None
+        heading_used = True
+        section: List[Block] = []
+        pending = 0
+
+        for block in blocks:
+            if block.heading:
+                if section:
+                    yield from self._pack_section(heading, section, max_tokens)
+                elif not heading_used:
+                    yield heading
+                heading, heading_used = block.text, False
+                section, pending = [], 0
+                continue
+
+            section.append(block)
+            pending += block.tokens + 1
+            heading_used = True
+            if pending > window:
+                yield from self._pack_section(heading, section, max_tokens)
+                section, pending = [], 0
+
+        if section:
+            yield from self._pack_section(heading, section, max_tokens)
+        elif not heading_used:
+            yield heading
+
+    def _pack_content_defined_blocks(self, blocks: Iterable[Block], max_tokens: int) -> Iterator[str]:
+        heading: Optional[str] = None
+        heading_used = True
+        prefix, budget = "", max_tokens
+        current: List[str] = []
+        used = 0
+
+        for block in blocks:
+            if block.heading:
+                if current:
+                    yield prefix + "\n".join(current)
+                    current, used = [], 0
+                elif not heading_used:
+                    yield heading
+                heading, heading_used = block.text, False
+                prefix, budget = self._heading_prefix(heading, max_tokens)
+                continue
+
+            heading_used = True
+            for piece in self._fit_blocks([block], budget):
+                # Joining blocks with a newline costs one token.
+                if current and used + 1 + piece.tokens > budget:
+                    yield prefix + "\n".join(current)
+                    current, used = [], 0
+                used += piece.tokens + (1 if current else 0)
+                current.append(piece.text)
+                if used >= budget // 2 and self._is_boundary_piece(piece.text):
+                    yield prefix + "\n".join(current)
+                    current, used = [], 0
+
+        if current:
+            yield prefix + "\n".join(current)
+        elif not heading_used:
+            yield heading
+
+    def _heading_prefix(self, heading: Optional[str], max_tokens: int) -> Tuple[str, int]:
+        """The heading line repeated at the top of a section's chunks and the token budget left for text."""
+        if heading is None:
+            return "", max_tokens
+        heading_tokens = self.count_tokens(heading) + 1
+        if heading_tokens > max_tokens // 2:
+            # Repeating a heading this long would leave little room for text.
+            return "", max_tokens
+        return f"{heading}\n", max_tokens - heading_tokens
+
+    def _fit_blocks(self, blocks: List[Block], budget: int) -> List[Block]:
+        # Blocks were split to max_tokens before the heading was known.
+        return [
+            piece
+            for block in blocks
+            for piece in (self._split_paragraph(block.text, budget) if block.tokens > budget else (block,))
+        ]
+
+    def _pack_section(self, heading: Optional[str], blocks: List[Block], max_tokens: int) -> Iterator[str]:
+        prefix, budget = self._heading_prefix(heading, max_tokens)
+        blocks = self._fit_blocks(blocks, budget)
+
+        # Greedy packing gives the fewest chunks; the smallest budget that
+        # still gives that many spreads the paragraphs evenly over them.
+        fewest = len(self._greedy_groups(blocks, budget))
+        total = sum(block.tokens for block in blocks) + len(blocks) - fewest
+        low, high = max(1, min(budget, math.ceil(total / fewest))), budget
+        while low < high:
+            middle = (low + high) // 2
+            if len(self._greedy_groups(blocks, middle)) <= fewest:
+                high = middle
+            else:
+                low = middle + 1
+
+        for group in self._greedy_groups(blocks, low):
+            yield prefix + "\n".join(group)
+
+    @staticmethod
+    def _greedy_groups(blocks: List[Block], budget: int) -> List[List[str]]:
+        groups: List[List[str]] = []
+        current: List[str] = []
+        used = 0
+        for block in blocks:
+            # Joining blocks with a newline costs one token.
+            cost = block.tokens + (1 if current else 0)
+            if current and used + cost > budget:
+                groups.append(current)
+                current, used = [], 0
+                cost = block.tokens
+            current.append(block.text)
+            used += cost
+        if current:
+            groups.append(current)
+        return groups
+
+    def _split_paragraph(self, text: str, max_tokens: int) -> Iterator[Block]:
+        tokens = self.count_tokens(text)
+        if tokens <= max_tokens:
+            yield Block(text, tokens)
+            return
+
+        current: List[str] = []
+        used = 0
+        for sentence in SENTENCE_END_PATTERN.split(text):
+            sentence_tokens = self.count_tokens(sentence)
+            # Counted like the newline between blocks: the joining space may cost a token.
+            if current and used + 1 + sentence_tokens > max_tokens:
+                yield Block(" ".join(current), used)
+                current, used = [], 0
+            if sentence_tokens > max_tokens:
+                yield from self._split_by_tokens(sentence, max_tokens)
+                continue
+            used += sentence_tokens + (1 if current else 0)
+            current.append(sentence)
+        if current:
+            yield Block(" ".join(current), used)
+
+    def _split_by_tokens(self, text: str, max_tokens: int) -> Iterator[Block]:
+        encoding = get_encoding(settings.EMBEDDING_MODEL)
+        if encoding is None:
+            step = max_tokens * APPROX_CHARS_PER_TOKEN
+            for start in range(0, len(text), step):
+                piece = text[start:start + step].strip()
+                if piece:
+                    yield Block(piece, self.count_tokens(piece))
+            return
+
+        tokens = encoding.encode_ordinary(text)
+        for start in range(0, len(tokens), max_tokens):
+            window = tokens[start:start + max_tokens]
+            piece = encoding.decode(window).strip()
+            if piece:
+                yield Block(piece, len(window))
+
+    def iter_lines(self, pieces: Iterable[str]) -> Iterator[str]:
+        pending = ""
+        for piece in pieces:
+            lines = (pending + piece).split("\n")
+            pending = lines.pop()
+            yield from lines
+        if pending:
+            yield pending
+
+    def estimate_chunks(self, size: int, file_type: str) -> int:
+        if file_type.lower() != 'csv' and settings.STRUCTURED_CHUNKING:
+            return max(1, math.ceil(size / (settings.CHUNK_MAX_TOKENS * APPROX_CHARS_PER_TOKEN)))
+        chunk_size = settings.CSV_CHUNK_SIZE if file_type.lower() == 'csv' else settings.TXT_CHUNK_SIZE
+        step = max(1, chunk_size - settings.CHUNK_OVERLAP)
+        return max(1, math.ceil(size / step))
+    
     def _process_txt_chunks(self, content: str) -> List[str]:
         return self.txt_splitter.split_text(content)
     
+    def iter_csv_row_texts(self, rows: Iterable[List[str]]) -> Iterator[str]:
+        """Renders parsed CSV rows as ``header: value`` pairs; the first row is the header."""
+        rows = iter(rows)
+        headers = next(rows, None)
+        if not headers:
+            return
+
+        for row in rows:
+            row_text = ", ".join(f"{header}: {value}" for header, value in zip(headers, row))
+            if row_text:
+                yield row_text
+
+    def iter_csv_chunks(self, rows: Iterable[List[str]]) -> Iterator[str]:
+        """Packs parsed CSV rows into row-aligned chunks of about CSV_CHUNK_SIZE.
+
+        Every row is rendered as ``header: value`` pairs so each chunk carries its
+        column names. Rows are never split unless a single row is longer than the
+        chunk size.
+        """
+        return self.pack_csv_row_texts(self.iter_csv_row_texts(rows))
+
+    def pack_csv_row_texts(self, row_texts: Iterable[str]) -> Iterator[str]:
+        chunk_size = settings.CSV_CHUNK_SIZE
+        buffer: List[str] = []
+        buffered = 0
+
+        for row_text in row_texts:
+            if len(row_text) > chunk_size:
+                if buffer:
+                    yield "\n".join(buffer)
+                    buffer, buffered = [], 0
+                yield from self.csv_splitter.split_text(row_text)
+                continue
+
+            if buffer and buffered + 1 + len(row_text) > chunk_size:
+                yield "\n".join(buffer)
+                buffer, buffered = [], 0
+
+            buffered += len(row_text) + (1 if buffer else 0)
+            buffer.append(row_text)
+
+        if buffer:
+            yield "\n".join(buffer)
+    
     def _process_csv_chunks(self, content: str) -> List[str]:
         try:
-            csv_reader = csv.reader(io.StringIO(content))
-            rows = list(csv_reader)
-            
-            if not rows:
-                return []
-            
-            headers = rows[0]
-            data_rows = rows[1:]
-            
-            text_content = ""
-            for row in data_rows:
-                row_text = ""
-                for i, value in enumerate(row):
-                    if i < len(headers):
-                        row_text += f"{headers[i]}: {value}, "
-                text_content += row_text.rstrip(", ") + "\n"
-            
-            return self.csv_splitter.split_text(text_content)
-            
-        except Exception as e:
-            return self.csv_splitter.split_text(content)
\ No newline at end of file
+            return list(self.iter_csv_chunks(csv.reader(io.StringIO(content))))
+        except csv.Error:
+            return self.csv_splitter.split_text(content)
@@ -0,0 +1,135 @@
+from typing import Dict, Any, Callable, Optional
+import time
+import httpx
+from fastapi import Request
+from langchain_openai import ChatOpenAI
+from langchain_openai.embeddings import OpenAIEmbeddings
+from ..config.settings import settings
+from ..tools import strapi_cms
+from .embedding_service import EmbeddingService
+from .vector_db_service import VectorDBService
+from .file_service import FileService
+from .rag_service import RAGService
+
+OPENAI_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+OPENAI_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+
+class ServiceContainer:
+    """Builds each heavy service once per process and shares it between routers.
+
+    Components are created on first access and their init time is recorded;
+    ``start`` warms them all during the app lifespan so requests never pay
+    for construction. Overrides passed to the constructor (e.g. fakes in
+    benchmarks) are used as-is.
+    """
+
+    COMPONENTS = ("http_clients", "embedding_service", "vector_db_service", "rag_service", "file_service")
+
+    def __init__(self, **overrides: Any):
+        self._components: Dict[str, Any] = dict(overrides)
+        self.init_timings: Dict[str, float] = {}
+        self.startup_ms: Optional[float] = None
+        self._started = False
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        if name not in self._components:
+            started = time.perf_counter()
+            self._components[name] = factory()
+            self.init_timings[name] = round((time.perf_counter() - started) * 1000, 2)
+        return self._components[name]
+
+    @property
+    def http_clients(self) -> Dict[str, Any]:
+        """Connection pools shared by every OpenAI client and the Strapi tool."""
+        return self._get("http_clients", lambda: {
+            "openai": httpx.Client(timeout=OPENAI_TIMEOUT, limits=OPENAI_LIMITS),
+            "openai_async": httpx.AsyncClient(timeout=OPENAI_TIMEOUT, limits=OPENAI_LIMITS),
+            "strapi": httpx.AsyncClient(timeout=strapi_cms.STRAPI_TIMEOUT),
+        })
+
+    @property
+    def embedding_service(self) -> EmbeddingService:
+        return self._get("embedding_service", lambda: EmbeddingService(
+            embeddings=OpenAIEmbeddings(
+                openai_api_key=settings.OPENAI_API_KEY,
+                model=settings.EMBEDDING_MODEL,
+                dimensions=settings.EMBEDDING_DIMENSIONS,
+                check_embedding_ctx_length=settings.EMBEDDING_CHECK_CTX_LENGTH,
+                max_retries=0,
+                http_client=self.http_clients["openai"],
+                http_async_client=self.http_clients["openai_async"]
+            )
+        ))
+
+    @property
+    def vector_db_service(self) -> VectorDBService:
+        return self._get("vector_db_service", lambda: VectorDBService(embedding_service=self.embedding_service))
+
+    @property
+    def rag_service(self) -> RAGService:
+        return self._get("rag_service", lambda: RAGService(
+            llm=ChatOpenAI(
+                openai_api_key=settings.OPENAI_API_KEY,
+                model_name=settings.LLM_MODEL,
+                temperature=settings.LLM_TEMPERATURE,
+                max_tokens=settings.MAX_TOKENS,
+                http_client=self.http_clients["openai"],
+                http_async_client=self.http_clients["openai_async"]
+            ),
+            vector_db_service=self.vector_db_service
+        ))
+
+    @property
+    def file_service(self) -> FileService:
+        return self._get("file_service", lambda: FileService(
+            embedding_service=self.embedding_service,
+            vector_db_service=self.vector_db_service,
+            answer_cache=self.rag_service.answer_cache
+        ))
+
+    async def start(self) -> None:
+        started = time.perf_counter()
+        for name in self.COMPONENTS:
+            getattr(self, name)
+        strapi_cms.configure_http_client(self.http_clients["strapi"])
+        connect_started = time.perf_counter()
+        await self.vector_db_service.connect()
+        self.init_timings["vector_db_connect"] = round((time.perf_counter() - connect_started) * 1000, 2)
+        await self.file_service.start()
+        self._started = True
+        self.startup_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    async def close(self) -> None:
+        if self._started:
+            await self.file_service.stop()
+        strapi_cms.configure_http_client(None)
+
+        clients = self._components.get("http_clients") or {}
+        for client in clients.values():
+            if isinstance(client, httpx.AsyncClient):
+                await client.aclose()
+            else:
+                client.close()
+
+        vector_db_service = self._components.get("vector_db_service")
+        if vector_db_service is not None:
+            await vector_db_service.close()
+        embedding_service = self._components.get("embedding_service")
+        if embedding_service is not None and embedding_service.cache is not None:
+            embedding_service.cache.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"startup_ms": self.startup_ms, "init_ms": dict(self.init_timings)}
+
+
+def get_services(request: Request) -> ServiceContainer:
+    return request.app.state.services
+
+
+def get_file_service(request: Request) -> FileService:
+    return get_services(request).file_service
+
+
+def get_rag_service(request: Request) -> RAGService:
+    return get_services(request).rag_service
@@ -0,0 +1,176 @@
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Set
+from ..utils.tokens import get_encoding, get_token_counter, APPROX_CHARS_PER_TOKEN
+from .chunk_service import is_heading
+
+# Shorter suffix/prefix matches between neighbouring chunks are treated as
+# coincidence rather than splitter overlap.
+MIN_OVERLAP_CHARS = 16
+# A section is only truncated into the remaining budget if at least this many
+# tokens of it would fit; otherwise packing stops.
+MIN_SECTION_TOKENS = 50
+
+
+@dataclass
+class PackedContext:
+    text: str
+    sources: List[Dict[str, Any]]
+    tokens: int
+    naive_tokens: int
+    merged_chunks: int = 0
+    duplicates_removed: int = 0
+    truncated: bool = False
+    dropped_chunks: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.naive_tokens - self.tokens)
+
+
+@dataclass
+class _Section:
+    file_id: Any
+    first_index: int
+    last_index: int
+    content: str
+    rank: int
+    docs: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class ContextPacker:
+    """Turns retrieved chunks into the prompt context within a token budget.
+
+    Chunks of the same file with consecutive ``chunk_index`` are merged and
+    their splitter overlap removed, near-duplicate sections are dropped, and
+    sections are added in retrieval order until ``max_tokens`` is reached.
+    """
+
+    def __init__(self, max_tokens: int, model: str, dedup_threshold: float, max_overlap: int):
+        self.max_tokens = max_tokens
+        self.dedup_threshold = dedup_threshold
+        self.max_overlap = max_overlap
+        self.encoding = get_encoding(model)
+        self.count_tokens = get_token_counter(model)
+
+    @staticmethod
+    def format_context(contents: List[str]) -> str:
+        return "\n".join(f"Fuente {i}:\n{content}\n" for i, content in enumerate(contents, 1))
+
+    def pack(self, relevant_docs: List[Dict[str, Any]]) -> PackedContext:
+        naive_tokens = self.count_tokens(self.format_context([doc["content"] for doc in relevant_docs]))
+
+        sections = self._merge_adjacent(relevant_docs)
+        merged_chunks = len(relevant_docs) - len(sections)
+
+        unique: List[_Section] = []
+        shingles: List[Set[str]] = []
+        for section in sections:
+            section_shingles = self._shingles(section.content)
+            if any(self._jaccard(section_shingles, other) >= self.dedup_threshold for other in shingles):
+                continue
+            unique.append(section)
+            shingles.append(section_shingles)
+        duplicates_removed = len(sections) - len(unique)
+
+        contents: List[str] = []
+        sources: List[Dict[str, Any]] = []
+        truncated = False
+        dropped_chunks = 0
+        used = 0
+        for position, section in enumerate(unique):
+            header_tokens = self.count_tokens(f"Fuente {len(contents) + 1}:\n\n\n")
+            section_tokens = self.count_tokens(section.content) + header_tokens
+            remaining = self.max_tokens - used
+            if section_tokens > remaining:
+                rest = unique[position:]
+                if remaining - header_tokens >= MIN_SECTION_TOKENS:
+                    contents.append(self._truncate(section.content, remaining - header_tokens))
+                    sources.extend(section.docs)
+                    truncated = True
+                    rest = rest[1:]
+                dropped_chunks = sum(len(other.docs) for other in rest)
+                break
+            contents.append(section.content)
+            sources.extend(section.docs)
+            used += section_tokens
+
+        text = self.format_context(contents)
+        return PackedContext(
+            text=text,
+            sources=sources,
+            tokens=self.count_tokens(text),
+            naive_tokens=naive_tokens,
+            merged_chunks=merged_chunks,
+            duplicates_removed=duplicates_removed,
+            truncated=truncated,
+            dropped_chunks=dropped_chunks
+        )
+
+    def _merge_adjacent(self, relevant_docs: List[Dict[str, Any]]) -> List[_Section]:
+        by_file: Dict[Any, List[_Section]] = {}
+        for rank, doc in enumerate(relevant_docs):
+            index = doc.get("chunk_index")
+            section = _Section(
+                file_id=doc.get("file_id"),
+                first_index=index,
+                last_index=index,
+                content=doc["content"],
+                rank=rank,
+                docs=[doc]
+            )
+            if index is None:
+                by_file.setdefault(("__unindexed__", rank), []).append(section)
+            else:
+                by_file.setdefault(doc.get("file_id"), []).append(section)
+
+        merged: List[_Section] = []
+        for sections in by_file.values():
+            sections.sort(key=lambda section: section.first_index if section.first_index is not None else -1)
+            current = sections[0]
+            for section in sections[1:]:
+                if current.last_index is not None and section.first_index == current.last_index + 1:
+                    current.content = self._join(current.content, section.content)
+                    current.last_index = section.last_index
+                    current.rank = min(current.rank, section.rank)
+                    current.docs.extend(section.docs)
+                elif section.first_index == current.last_index:
+                    # The same chunk stored under two ids (e.g. a re-upload) collapses here.
+                    current.rank = min(current.rank, section.rank)
+                    current.docs.extend(section.docs)
+                else:
+                    merged.append(current)
+                    current = section
+            merged.append(current)
+
+        merged.sort(key=lambda section: section.rank)
+        return merged
+
+    def _join(self, left: str, right: str) -> str:
+        """Concatenates neighbouring chunks, dropping the text the splitter repeated in both."""
+        # Structured chunks of the same section each start with its heading.
+        heading, _, rest = right.partition("\n")
+        if rest and left.startswith(f"{heading}\n") and is_heading(heading):
+            return f"{left}\n{rest}"
+        longest = min(len(left), len(right), self.max_overlap)
+        for size in range(longest, MIN_OVERLAP_CHARS - 1, -1):
+            if left.endswith(right[:size]):
+                return left + right[size:]
+        return f"{left}\n{right}"
+
+    @staticmethod
+    def _shingles(text: str, size: int = 3) -> Set[str]:
+        words = text.lower().split()
+        if len(words) <= size:
+            return {" ".join(words)}
+        return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+    @staticmethod
+    def _jaccard(a: Set[str], b: Set[str]) -> float:
+        if not a or not b:
+            return 0.0
+        return len(a & b) / len(a | b)
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        if self.encoding is None:
+            return text[:max_tokens * APPROX_CHARS_PER_TOKEN]
+        return self.encoding.decode(self.encoding.encode_ordinary(text)[:max_tokens])
@@ -0,0 +1,143 @@
+from typing import List, Dict, Optional
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+import numpy as np
+
+
+class EmbeddingCache:
+    """Disk-backed embedding cache keyed by (model, dimensions, sha256(normalized text)).
+
+    Entries are evicted least-recently-used first once ``max_entries`` is exceeded.
+    """
+
+    # Keep each IN (...) lookup under SQLite's default host parameter limit.
+    _LOOKUP_BATCH = 900
+
+    def __init__(self, path: str, model: str, dimensions: int, max_entries: int):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.model = model
+        self.dimensions = dimensions
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                dimensions INTEGER NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model, dimensions, text_hash)
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_embeddings_last_access ON embeddings (last_access)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    @classmethod
+    def text_hash(cls, text: str) -> str:
+        return hashlib.sha256(cls.normalize(text).encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        hashes = [self.text_hash(text) for text in texts]
+        unique = list(dict.fromkeys(hashes))
+        found: Dict[str, List[float]] = {}
+        now = time.time()
+
+        with self._lock:
+            for start in range(0, len(unique), self._LOOKUP_BATCH):
+                batch = unique[start:start + self._LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND dimensions = ? AND text_hash IN ({placeholders})",
+                    [self.model, self.dimensions, *batch]
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE model = ? AND dimensions = ? AND text_hash = ?",
+                    [(now, self.model, self.dimensions, h) for h in found]
+                )
+                self._conn.commit()
+
+        results = [found.get(h) for h in hashes]
+        hits = sum(1 for r in results if r is not None)
+        self.hits += hits
+        self.misses += len(results) - hits
+        return results
+
+    def put_many(self, texts: List[str], vectors: List[List[float]]) -> None:
+        if len(texts) != len(vectors):
+            raise ValueError(f"Cannot cache {len(vectors)} vectors for {len(texts)} texts")
+
+        now = time.time()
+        rows = [
+            (self.model, self.dimensions, self.text_hash(text),
+             np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for text, vector in zip(texts, vectors)
+        ]
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, dimensions, text_hash, vector, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN "
+                "(SELECT rowid FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
+            self.evictions += overflow
+
+    async def aget_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        return await asyncio.to_thread(self.get_many, texts)
+
+    async def aput_many(self, texts: List[str], vectors: List[List[float]]) -> None:
+        await asyncio.to_thread(self.put_many, texts, vectors)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
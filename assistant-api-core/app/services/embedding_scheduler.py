@@ -0,0 +1,216 @@
+from typing import List, Dict, Any, Optional
+from langchain_core.embeddings import Embeddings
+from ..config.settings import settings
+from ..utils.tokens import get_token_counter
+from ..utils.telemetry import count_tokens
+import asyncio
+import random
+import time
+import openai
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+class _AdaptiveLimiter:
+    """Concurrency limit that halves on rate limiting and grows back by one per success."""
+
+    def __init__(self, limit: int):
+        self.max_limit = max(1, limit)
+        self.limit = self.max_limit
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def release(self, throttled: bool = False) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(1, self.limit // 2)
+            elif self.limit < self.max_limit:
+                self.limit += 1
+            self._condition.notify_all()
+
+
+class _TokenBucket:
+    """Tokens-per-minute budget shared by every batch of a scheduler."""
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = tokens_per_minute
+        self.tokens = float(tokens_per_minute)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def take(self, tokens: int) -> None:
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / 60)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) * 60 / self.capacity)
+
+
+class EmbeddingScheduler:
+    """Embeds texts in token-bounded batches, K at a time, with backoff on rate limits.
+
+    Results are returned in the same order as the input texts.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_batch_tokens: int = None,
+        max_batch_items: int = None,
+        concurrency: int = None,
+        max_retries: int = None,
+        tokens_per_minute: int = None
+    ):
+        self.embeddings = embeddings
+        self.max_batch_tokens = max_batch_tokens or settings.EMBEDDING_BATCH_MAX_TOKENS
+        self.max_batch_items = max_batch_items or settings.EMBEDDING_BATCH_MAX_ITEMS
+        self.concurrency = concurrency or settings.EMBEDDING_CONCURRENCY
+        self.max_retries = settings.EMBEDDING_MAX_RETRIES if max_retries is None else max_retries
+        tokens_per_minute = settings.EMBEDDING_TOKENS_PER_MINUTE if tokens_per_minute is None else tokens_per_minute
+        self.count_tokens = get_token_counter(settings.EMBEDDING_MODEL)
+
+        self._limiter: Optional[_AdaptiveLimiter] = None
+        self._bucket: Optional[_TokenBucket] = None
+        self._tokens_per_minute = tokens_per_minute
+
+        self.total_chunks = 0
+        self.total_tokens = 0
+        self.total_seconds = 0.0
+        self.total_batches = 0
+        self.total_retries = 0
+        self.last_run: Dict[str, Any] = {}
+
+    def pack(self, texts: List[str]) -> List[List[int]]:
+        """Groups text indexes into batches under both the token and the item limit."""
+        return self._pack([self.count_tokens(text) for text in texts])
+
+    def _pack(self, token_counts: List[int]) -> List[List[int]]:
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+
+        for index, tokens in enumerate(token_counts):
+            if current and (current_tokens + tokens > self.max_batch_tokens or len(current) >= self.max_batch_items):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(index)
+            current_tokens += tokens
+
+        if current:
+            batches.append(current)
+        return batches
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+
+        # Limiter and bucket are bound to the running loop, so they are
+        # created on first use instead of in __init__.
+        if self._limiter is None:
+            self._limiter = _AdaptiveLimiter(self.concurrency)
+            if self._tokens_per_minute:
+                self._bucket = _TokenBucket(self._tokens_per_minute)
+
+        started = time.perf_counter()
+        token_counts = [self.count_tokens(text) for text in texts]
+        batches = self._pack(token_counts)
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        retries_before = self.total_retries
+
+        async def run_batch(indexes: List[int]) -> None:
+            batch = [texts[i] for i in indexes]
+            vectors = await self._embed_batch(batch, sum(token_counts[i] for i in indexes))
+            for i, vector in zip(indexes, vectors):
+                results[i] = vector
+
+        # The first failure cancels the remaining batches so a failed ingestion
+        # stops calling the API; the original exception is re-raised.
+        tasks = [asyncio.ensure_future(run_batch(indexes)) for indexes in batches]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        seconds = time.perf_counter() - started
+        tokens = sum(token_counts)
+        count_tokens("embedding", tokens)
+        self.total_chunks += len(texts)
+        self.total_tokens += tokens
+        self.total_seconds += seconds
+        self.total_batches += len(batches)
+        self.last_run = {
+            "chunks": len(texts),
+            "tokens": tokens,
+            "batches": len(batches),
+            "retries": self.total_retries - retries_before,
+            "seconds": round(seconds, 3),
+            "chunks_per_s": round(len(texts) / seconds, 1) if seconds else None,
+            "tokens_per_s": round(tokens / seconds, 1) if seconds else None
+        }
+        return results
+
+    async def _embed_batch(self, batch: List[str], tokens: int) -> List[List[float]]:
+        attempt = 0
+        while True:
+            if self._bucket is not None:
+                await self._bucket.take(tokens)
+
+            await self._limiter.acquire()
+            throttled = False
+            try:
+                vectors = await self.embeddings.aembed_documents(batch)
+                if len(vectors) != len(batch):
+                    raise ValueError(f"Embedding count mismatch: got {len(vectors)} vectors for {len(batch)} texts")
+                return vectors
+            except RETRYABLE_ERRORS as e:
+                throttled = isinstance(e, openai.RateLimitError)
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._retry_delay(e, attempt)
+                attempt += 1
+                self.total_retries += 1
+            finally:
+                await self._limiter.release(throttled)
+
+            await asyncio.sleep(delay)
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        base = settings.EMBEDDING_RETRY_BASE_DELAY * (2 ** attempt)
+        return min(settings.EMBEDDING_RETRY_MAX_DELAY, base) * random.uniform(0.5, 1.0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "chunks": self.total_chunks,
+            "tokens": self.total_tokens,
+            "batches": self.total_batches,
+            "retries": self.total_retries,
+            "concurrency_limit": self._limiter.limit if self._limiter else self.concurrency,
+            "chunks_per_s": round(self.total_chunks / self.total_seconds, 1) if self.total_seconds else None,
+            "tokens_per_s": round(self.total_tokens / self.total_seconds, 1) if self.total_seconds else None,
+            "last_run": self.last_run
+        }
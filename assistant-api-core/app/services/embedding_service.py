@@ -1,16 +1,31 @@
-from typing import List, Dict, Any
+from typing import List, Optional
 from langchain_openai.embeddings import OpenAIEmbeddings
+from langchain_core.embeddings import Embeddings
 from ..config.settings import settings
-import asyncio
+from .embedding_cache import EmbeddingCache
+from .embedding_scheduler import EmbeddingScheduler
+from ..utils.telemetry import debug_log, count_cache
 
 class EmbeddingService:
-    def __init__(self):
-        print(settings.OPENAI_API_KEY, settings.EMBEDDING_MODEL, settings.EMBEDDING_DIMENSIONS)
-        self.embeddings = OpenAIEmbeddings(
+    def __init__(self, embeddings: Optional[Embeddings] = None, cache: Optional[EmbeddingCache] = None):
+        debug_log("Embeddings:", settings.EMBEDDING_MODEL, settings.EMBEDDING_DIMENSIONS)
+        self.embeddings = embeddings or OpenAIEmbeddings(
             openai_api_key=settings.OPENAI_API_KEY,
             model=settings.EMBEDDING_MODEL,
-            dimensions=settings.EMBEDDING_DIMENSIONS
+            dimensions=settings.EMBEDDING_DIMENSIONS,
+            check_embedding_ctx_length=settings.EMBEDDING_CHECK_CTX_LENGTH,
+            # Retries and rate limiting are handled by EmbeddingScheduler.
+            max_retries=0
         )
+        self.scheduler = EmbeddingScheduler(self.embeddings)
+        if cache is None and settings.EMBEDDING_CACHE_ENABLED:
+            cache = EmbeddingCache(
+                path=settings.EMBEDDING_CACHE_PATH,
+                model=settings.EMBEDDING_MODEL,
+                dimensions=settings.EMBEDDING_DIMENSIONS,
+                max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES
+            )
+        self.cache = cache
     
     async def create_embeddings(self, texts: List[str]) -> List[List[float]]:
         try:
@@ -19,29 +34,40 @@ class EmbeddingService:
             if not valid_texts:
                 return []
             
-            embeddings = await asyncio.to_thread(
-                self.embeddings.embed_documents, 
-                valid_texts
-            )
+            if self.cache is None:
+                return await self.scheduler.embed(valid_texts)
+
+            embeddings = await self.cache.aget_many(valid_texts)
+            missing = list(dict.fromkeys(
+                text for text, embedding in zip(valid_texts, embeddings) if embedding is None
+            ))
+            count_cache("embedding", len(valid_texts) - len(missing), len(missing))
+
+            if missing:
+                new_embeddings = await self.scheduler.embed(missing)
+                await self.cache.aput_many(missing, new_embeddings)
+                computed = dict(zip(missing, new_embeddings))
+                embeddings = [
+                    embedding if embedding is not None else computed[text]
+                    for text, embedding in zip(valid_texts, embeddings)
+                ]
             
             return embeddings
             
         except Exception as e:
             print(f"Embedding creation failed: {str(e)}")
             raise e
-    
-    def prepare_document_embeddings(self, file_id: int, chunks: List[str]) -> List[Dict[str, Any]]:
-        documents = []
-        
-        for i, chunk in enumerate(chunks):
-            if chunk.strip():
-                documents.append({
-                    "content": chunk.strip(),
-                    "metadata": {
-                        "file_id": file_id,
-                        "chunk_index": i,
-                        "chunk_length": len(chunk.strip())
-                    }
-                })
-        
-        return documents
\ No newline at end of file
+
+    async def embed_query(self, text: str) -> List[float]:
+        if self.cache is None:
+            (embedding,) = await self.scheduler.embed([text])
+            return embedding
+
+        (cached,) = await self.cache.aget_many([text])
+        count_cache("embedding", int(cached is not None), int(cached is None))
+        if cached is not None:
+            return cached
+
+        (embedding,) = await self.scheduler.embed([text])
+        await self.cache.aput_many([text], [embedding])
+        return embedding
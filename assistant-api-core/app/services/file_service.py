@@ -1,29 +1,86 @@
 import os
+import uuid
+import json
+import base64
+import asyncio
+import itertools
 import aiofiles
-from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Callable, Awaitable, Dict, Any, Iterator, Tuple
 from fastapi import UploadFile, HTTPException
-from sqlalchemy.orm import Session
-from ..models.file_model import FileRecord
-from ..models.schemas import FileUploadResponse, FileInfo, FileUploadData, PaginationInfo, FilesListData
+from sqlalchemy import select, func, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, defer
+from ..config.database import SessionLocal
+from ..models.file_model import FileRecord, IngestionJob
+from ..models.schemas import FileUploadResponse, FileInfo, FileUploadData, FileUpdateData, PaginationInfo, FilesListData, JobInfo, JobStatus, TotalCount
 from ..utils.file_processor import FileProcessor
 from .chunk_service import ChunkService
 from ..config.settings import settings
 from ..utils.response_utils import ResponseUtils
+from ..utils.telemetry import tracer, StageTimer, debug_log
 from .embedding_service import EmbeddingService
 from .vector_db_service import VectorDBService
+from .ingestion_queue import IngestionQueue, IngestionQueueUnavailable
+from .ingestion_executor import IngestionExecutor
+from .answer_cache import AnswerCache
+
+# Characters of content_preview returned by the file listing unless the full preview is asked for.
+LIST_PREVIEW_CHARS = 100
 
 class FileService:
     
-    def __init__(self):
+    def __init__(
+        self,
+        embedding_service: Optional[EmbeddingService] = None,
+        vector_db_service: Optional[VectorDBService] = None,
+        answer_cache: Optional[AnswerCache] = None
+    ):
         self.file_processor = FileProcessor()
         self.chunk_service = ChunkService()
-        self.embedding_service = EmbeddingService()
-        self.vector_db_service = VectorDBService()
+        self.embedding_service = embedding_service or EmbeddingService()
+        self.vector_db_service = vector_db_service or VectorDBService(embedding_service=self.embedding_service)
+        self.answer_cache = answer_cache
         self.upload_dir = settings.UPLOAD_DIR
         self.max_file_size = settings.MAX_FILE_SIZE
+        self.batch_size = settings.INGESTION_BATCH_SIZE
+        self.block_size = settings.INGESTION_BLOCK_SIZE
+        self.ingestion_queue = IngestionQueue(
+            handler=self.process_job,
+            workers=settings.INGESTION_WORKERS,
+            max_size=settings.INGESTION_QUEUE_SIZE
+        )
+        self.ingestion_executor = IngestionExecutor(
+            processes=settings.INGESTION_PROCESSES,
+            section_size=settings.INGESTION_SECTION_SIZE,
+            min_file_size=settings.INGESTION_PARALLEL_MIN_SIZE
+        )
         os.makedirs(self.upload_dir, exist_ok=True)
+
+    async def start(self):
+        # Other workers may be processing jobs right now, so only jobs that
+        # stopped making progress are treated as interrupted.
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.INGESTION_STALE_JOB_SECONDS)
+        async with SessionLocal() as db:
+            interrupted = await db.scalars(select(IngestionJob).where(
+                IngestionJob.status.in_([JobStatus.QUEUED.value, JobStatus.PROCESSING.value]),
+                IngestionJob.updated_at < stale_before
+            ))
+            for job in interrupted:
+                if job.staged_path:
+                    self._remove_staged(job.staged_path)
+                    job.staged_path = None
+                job.status = JobStatus.FAILED.value
+                job.error = "Ingestion interrupted by a server restart, upload the file again"
+            await db.commit()
+
+        self.ingestion_queue.start()
+
+    async def stop(self):
+        await self.ingestion_queue.stop()
+        await asyncio.to_thread(self.ingestion_executor.close)
     
-    async def upload_file(self, file: UploadFile, db: Session):
+    async def upload_file(self, file: UploadFile, db: AsyncSession):
         try:
             if not file.filename:
                 raise HTTPException(status_code=400, detail="No filename provided")
@@ -35,66 +92,39 @@ class FileService:
                     detail=f"Unsupported file type. Only TXT and CSV files are allowed."
                 )
             
-            content = await file.read()
-            if len(content) > self.max_file_size:
-                raise HTTPException(
-                    status_code=413,
-                    detail=f"File size exceeds maximum allowed size"
-                )
+            file_id = str(uuid.uuid4())
+            file_path = os.path.join(self.upload_dir, f"{file_id}_{file.filename}")
+            file_size = await self._save_upload(file, file_path)
+            content_preview = await self._read_preview(file_path, file_extension)
             
             file_record = FileRecord(
+                file_id=file_id,
                 original_filename=file.filename,
-                file_path="",
+                file_path=file_path,
                 file_type=file_extension,
-                file_size=len(content)
+                file_size=file_size,
+                content_preview=content_preview
             )
             
             db.add(file_record)
-            db.commit()
-            db.refresh(file_record)
-            
-            file_path = os.path.join(self.upload_dir, f"{file_record.file_id}_{file.filename}")
-            file_record.file_path = file_path
-            
-            async with aiofiles.open(file_path, 'wb') as f:
-                await f.write(content)
-            
+            await db.commit()
+
+            job = IngestionJob(file_id=file_record.file_id, status=JobStatus.QUEUED.value)
+            db.add(job)
+            await db.commit()
+            await db.refresh(file_record)
+            await db.refresh(job)
+
             try:
-                file_content = await self.file_processor.read_file_content(
-                    file_path, file_extension
-                )
-                file_record.content_preview = self.file_processor.get_content_preview(file_content)
-
-                chunks = self.chunk_service.create_chunks(file_content, file_extension)
-                embeddings = await self.embedding_service.create_embeddings(chunks)
-                documents = self.embedding_service.prepare_document_embeddings(file_record.file_id, chunks)
-                
-                chunks_data = {
-                    "chunks": chunks,
-                    "embeddings": embeddings,
-                    "documents": documents,
-                    "total_chunks": len(chunks)
-                }
-
-                storage_result = await self.vector_db_service.store_document_chunks(file_record.file_id, chunks_data)
-                
-            except Exception as e:
-                print(f"Warning: Could not process file content: {e}")
-            
-            db.commit()
-            
-            file_info = FileInfo(
-                file_id=file_record.file_id,
-                original_filename=file_record.original_filename,
-                file_type=file_record.file_type,
-                file_size=file_record.file_size,
-                upload_date=file_record.upload_date,
-                content_preview=file_record.content_preview,
-                id=file_record.id
-            )
+                self.ingestion_queue.enqueue(job.job_id)
+            except IngestionQueueUnavailable as e:
+                job.status = JobStatus.FAILED.value
+                job.error = str(e)
+                await db.commit()
+                raise HTTPException(status_code=503, detail=f"{e}, try again later")
 
-            data = FileUploadData(file=file_info)
-            return 200, ResponseUtils.success(data=data, message="File uploaded successfully")
+            data = FileUploadData(file=self._to_file_info(file_record), job=self._to_job_info(job))
+            return 202, ResponseUtils.success(data=data, message="File uploaded, ingestion queued")
         except HTTPException as http_exc:
             return http_exc.status_code, ResponseUtils.error(
                 error="FILE_UPLOAD_FAILED",
@@ -105,41 +135,524 @@ class FileService:
                 error="FILE_UPLOAD_FAILED",
                 message=f"Error al subir el archivo: {str(e)}"
             )
-    
-    def get_files(self, db: Session, page: int = 1, size: int = 10, search: Optional[str] = None):
+
+    async def _read_preview(self, file_path: str, file_type: str) -> Optional[str]:
+        # Only the first few hundred characters are read; a file that cannot be
+        # decoded is still queued so its job reports the actual error.
+        try:
+            return await asyncio.to_thread(self.file_processor.read_preview, file_path, file_type)
+        except Exception as e:
+            print(f"Warning: Could not read preview of {file_path}: {e}")
+            return None
+
+    async def process_job(self, job_id: str):
+        async with SessionLocal() as db:
+            job = await db.scalar(select(IngestionJob).where(IngestionJob.job_id == job_id))
+            if job is None:
+                return
+            file_record = await db.scalar(select(FileRecord).where(FileRecord.file_id == job.file_id))
+
+            job.status = JobStatus.PROCESSING.value
+            await db.commit()
+
+            async def on_progress(processed: int):
+                job.processed_chunks = processed
+                job.total_chunks = max(job.total_chunks, processed)
+                await db.commit()
+
+            try:
+                if job.staged_path:
+                    await self._apply_update(db, job, file_record, on_progress)
+                else:
+                    job.total_chunks = self.chunk_service.estimate_chunks(file_record.file_size, file_record.file_type)
+                    await db.commit()
+
+                    total = await self.ingest_file(
+                        file_record.file_id, file_record.file_path, file_record.file_type, on_progress
+                    )
+
+                    job.total_chunks = total
+                    job.processed_chunks = total
+                    job.status = JobStatus.COMPLETED.value
+                    await db.commit()
+                self._invalidate_answers(file_record.file_id)
+
+            except Exception as e:
+                staged_path = job.staged_path
+                await db.rollback()
+                if staged_path:
+                    self._remove_staged(staged_path)
+                    job.staged_path = None
+                job.status = JobStatus.FAILED.value
+                job.error = str(e)
+                await db.commit()
+                print(f"Ingestion job {job_id} failed: {e}")
+
+    async def _apply_update(
+        self,
+        db: AsyncSession,
+        job: IngestionJob,
+        file_record: FileRecord,
+        on_progress: Callable[[int], Awaitable[None]]
+    ):
+        """Syncs the staged upload's chunks, then swaps the file and its record in.
+
+        The record and the file on disk only change once the collection holds
+        the new version, so a failed update leaves the previous one in place.
+        """
+        file_type = job.staged_filename.split('.')[-1].lower()
+        job.total_chunks = self.chunk_service.estimate_chunks(os.path.getsize(job.staged_path), file_type)
+        await db.commit()
+
+        counts = await self.sync_file_chunks(file_record.file_id, job.staged_path, file_type, on_progress)
+
+        old_path = file_record.file_path
+        file_path = os.path.join(self.upload_dir, f"{file_record.file_id}_{job.staged_filename}")
+        os.replace(job.staged_path, file_path)
+
+        file_record.original_filename = job.staged_filename
+        file_record.file_path = file_path
+        file_record.file_type = file_type
+        file_record.file_size = os.path.getsize(file_path)
+        file_record.content_preview = await self._read_preview(file_path, file_type)
+        job.staged_path = None
+        job.total_chunks = counts["total_chunks"]
+        job.processed_chunks = counts["total_chunks"]
+        job.reused_chunks = counts["reused_chunks"]
+        job.added_chunks = counts["added_chunks"]
+        job.removed_chunks = counts["removed_chunks"]
+        job.status = JobStatus.COMPLETED.value
+        await db.commit()
+
+        if old_path != file_path and os.path.exists(old_path):
+            os.remove(old_path)
+
+    @staticmethod
+    def _remove_staged(staged_path: str):
+        if os.path.exists(staged_path):
+            os.remove(staged_path)
+
+    async def ingest_file(
+        self,
+        file_id: str,
+        file_path: str,
+        file_type: str,
+        on_progress: Optional[Callable[[int], Awaitable[None]]] = None
+    ) -> int:
+        """Reads, cleans, chunks, embeds and stores a file in fixed-size batches.
+
+        Only one batch of chunks plus the chunker's window is held in memory,
+        so peak memory does not grow with the file size.
+        """
+        with tracer.start_as_current_span("upload", attributes={"file.id": file_id, "file.type": file_type}) as span:
+            timer = StageTimer("upload")
+            chunks = self._iter_file_chunks(file_path, file_type, timer)
+
+            def next_batch() -> List[str]:
+                return list(itertools.islice(chunks, self.batch_size))
+
+            processed = 0
+            try:
+                while True:
+                    batch = await asyncio.to_thread(next_batch)
+                    if not batch:
+                        break
+
+                    with timer.stage("embed", chunks=len(batch)):
+                        embeddings = await self.embedding_service.create_embeddings(batch)
+                    chunks_data = {
+                        "chunks": batch,
+                        "embeddings": embeddings,
+                        "start_index": processed,
+                        "total_chunks": len(batch)
+                    }
+
+                    with timer.stage("store", chunks=len(batch)):
+                        storage_result = await self.vector_db_service.store_document_chunks(file_id, chunks_data)
+                    if not storage_result["success"]:
+                        raise Exception(storage_result["message"])
+
+                    processed += len(batch)
+                    if on_progress:
+                        await on_progress(processed)
+            finally:
+                span.set_attribute("upload.chunks", processed)
+                timer.finish(span)
+
+            return processed
+
+    async def update_file(self, file_id: str, file: UploadFile, db: AsyncSession):
+        """Stages a file's new content and queues a job that re-syncs its chunks.
+
+        Only chunks that are not stored yet get embedded; the file and its
+        record are replaced once the job has synced the collection.
+        """
+        try:
+            file_record = await db.scalar(select(FileRecord).where(FileRecord.file_id == file_id))
+            if file_record is None:
+                raise HTTPException(status_code=404, detail=f"File {file_id} not found")
+
+            active_job = await db.scalar(select(IngestionJob).where(
+                IngestionJob.file_id == file_id,
+                IngestionJob.status.in_([JobStatus.QUEUED.value, JobStatus.PROCESSING.value])
+            ).limit(1))
+            if active_job is not None:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"File {file_id} is still being ingested by job {active_job.job_id}"
+                )
+
+            if not file.filename:
+                raise HTTPException(status_code=400, detail="No filename provided")
+
+            file_extension = file.filename.split('.')[-1].lower()
+            if file_extension not in ['txt', 'csv']:
+                raise HTTPException(
+                    status_code=400, 
+                    detail="Unsupported file type. Only TXT and CSV files are allowed."
+                )
+
+            job_id = str(uuid.uuid4())
+            staged_path = os.path.join(self.upload_dir, f"{file_id}_{job_id}.part")
+            await self._save_upload(file, staged_path)
+
+            job = IngestionJob(
+                job_id=job_id,
+                file_id=file_id,
+                status=JobStatus.QUEUED.value,
+                staged_path=staged_path,
+                staged_filename=file.filename
+            )
+            db.add(job)
+            await db.commit()
+            await db.refresh(job)
+
+            try:
+                self.ingestion_queue.enqueue(job.job_id)
+            except IngestionQueueUnavailable as e:
+                self._remove_staged(staged_path)
+                job.staged_path = None
+                job.status = JobStatus.FAILED.value
+                job.error = str(e)
+                await db.commit()
+                raise HTTPException(status_code=503, detail=f"{e}, try again later")
+
+            data = FileUpdateData(file=self._to_file_info(file_record), job=self._to_job_info(job))
+            return 202, ResponseUtils.success(data=data, message="File uploaded, update queued")
+        except HTTPException as http_exc:
+            return http_exc.status_code, ResponseUtils.error(
+                error="FILE_UPDATE_FAILED",
+                message=str(http_exc.detail)
+            )
+        except Exception as e:
+            return 500, ResponseUtils.error(
+                error="FILE_UPDATE_FAILED",
+                message=f"Error al actualizar el archivo: {str(e)}"
+            )
+
+    async def sync_file_chunks(
+        self,
+        file_id: str,
+        file_path: str,
+        file_type: str,
+        on_progress: Optional[Callable[[int], Awaitable[None]]] = None
+    ) -> Dict[str, int]:
+        """Diffs the file's chunks against the collection by content hash.
+
+        New chunks are embedded and stored, unchanged ones only get their
+        chunk_index updated, and chunks no longer present (or stored twice)
+        are deleted in one call at the end. If anything fails before that,
+        the added chunks are deleted and the reused ones get their previous
+        metadata back.
+        """
+        with tracer.start_as_current_span("upload.sync", attributes={"file.id": file_id, "file.type": file_type}) as span:
+            timer = StageTimer("upload")
+            try:
+                return await self._sync_file_chunks(file_id, file_path, file_type, timer, on_progress)
+            finally:
+                timer.finish(span)
+
+    async def _sync_file_chunks(
+        self,
+        file_id: str,
+        file_path: str,
+        file_type: str,
+        timer: StageTimer,
+        on_progress: Optional[Callable[[int], Awaitable[None]]]
+    ) -> Dict[str, int]:
+        existing = await self.vector_db_service.get_document_chunks(file_id)
+        added_ids: List[str] = []
+        reused_ids: List[str] = []
+        reused_metadatas: List[Dict[str, Any]] = []
+        try:
+            return await self._diff_file_chunks(
+                file_id, file_path, file_type, timer, on_progress, existing, added_ids, reused_ids, reused_metadatas
+            )
+        except BaseException:
+            # Also on cancellation, so a shutdown mid-sync leaves the previous version.
+            previous = {doc_id: metadata for stored in existing.values() for doc_id, metadata in stored}
+            await self.vector_db_service.delete_chunks(added_ids)
+            for start in range(0, len(reused_ids), self.batch_size):
+                ids = reused_ids[start:start + self.batch_size]
+                await self.vector_db_service.update_chunk_metadata(ids, [previous[doc_id] for doc_id in ids])
+            raise
+
+    async def _diff_file_chunks(
+        self,
+        file_id: str,
+        file_path: str,
+        file_type: str,
+        timer: StageTimer,
+        on_progress: Optional[Callable[[int], Awaitable[None]]],
+        existing: Dict[str, List[Tuple[str, Dict[str, Any]]]],
+        added_ids: List[str],
+        reused_ids: List[str],
+        reused_metadatas: List[Dict[str, Any]]
+    ) -> Dict[str, int]:
+        chunks = self._iter_file_chunks(file_path, file_type, timer)
+
+        def next_batch() -> List[str]:
+            return list(itertools.islice(chunks, self.batch_size))
+
+        seen = set()
+        chunk_index = 0
+
+        while True:
+            batch = await asyncio.to_thread(next_batch)
+            if not batch:
+                break
+
+            new_chunks: List[str] = []
+            new_indexes: List[int] = []
+            for chunk in batch:
+                content = chunk.strip()
+                chunk_hash = self.vector_db_service.chunk_hash(content)
+                if not content or chunk_hash in seen:
+                    continue
+                seen.add(chunk_hash)
+
+                if chunk_hash in existing:
+                    doc_id = existing[chunk_hash][0][0]
+                    metadata = self.vector_db_service.chunk_metadata(file_id, chunk_index, content)
+                    metadata["source"] = doc_id
+                    reused_ids.append(doc_id)
+                    reused_metadatas.append(metadata)
+                else:
+                    new_chunks.append(content)
+                    new_indexes.append(chunk_index)
+                chunk_index += 1
+
+            if new_chunks:
+                with timer.stage("embed", chunks=len(new_chunks)):
+                    embeddings = await self.embedding_service.create_embeddings(new_chunks)
+                # Recorded before the write, so a partial write is rolled back too.
+                added_ids.extend(
+                    self.vector_db_service.chunk_metadata(file_id, index, content)["source"]
+                    for index, content in zip(new_indexes, new_chunks)
+                )
+                with timer.stage("store", chunks=len(new_chunks)):
+                    storage_result = await self.vector_db_service.store_document_chunks(file_id, {
+                        "chunks": new_chunks,
+                        "embeddings": embeddings,
+                        "chunk_indexes": new_indexes
+                    })
+                if not storage_result["success"]:
+                    raise Exception(storage_result["message"])
+
+            if on_progress:
+                await on_progress(chunk_index)
+
+        with timer.stage("store", chunks=len(reused_ids)):
+            for start in range(0, len(reused_ids), self.batch_size):
+                await self.vector_db_service.update_chunk_metadata(
+                    reused_ids[start:start + self.batch_size],
+                    reused_metadatas[start:start + self.batch_size]
+                )
+
+            # Every id of a dropped chunk, plus the extra ids of legacy chunks stored more than once.
+            stale_ids = [
+                doc_id
+                for chunk_hash, stored in existing.items()
+                for doc_id, _ in (stored if chunk_hash not in seen else stored[1:])
+            ]
+            await self.vector_db_service.delete_chunks(stale_ids)
+
+        return {
+            "total_chunks": chunk_index,
+            "reused_chunks": len(reused_ids),
+            "added_chunks": len(added_ids),
+            "removed_chunks": len(stale_ids)
+        }
+
+    def _invalidate_answers(self, file_id: str):
+        # Cached answers are already keyed by the retrieved context; this just
+        # frees the entries built on the previous version of the file.
+        if self.answer_cache is not None:
+            self.answer_cache.invalidate_files({file_id})
+
+    def _iter_file_chunks(self, file_path: str, file_type: str, timer: Optional[StageTimer] = None) -> Iterator[str]:
+        """Builds the lazy read -> clean -> chunk pipeline; with a timer each step is timed separately."""
+        def timed(stage: str, iterable):
+            return timer.wrap(stage, iterable) if timer is not None else iterable
+
+        parallel = self.ingestion_executor.handles(file_path)
+
+        if file_type.lower() == 'csv':
+            raw_rows = timed("read", self.file_processor.iter_raw_csv_rows(file_path))
+            if parallel:
+                row_texts = timed("clean", self.ingestion_executor.iter_csv_row_texts(raw_rows))
+                if settings.CONTENT_DEFINED_CHUNKING:
+                    return timed("chunk", self.chunk_service.iter_content_defined_chunks(row_texts, settings.CSV_CHUNK_SIZE))
+                return timed("chunk", self.chunk_service.pack_csv_row_texts(row_texts))
+
+            rows = timed("clean", self.file_processor.clean_csv_rows(raw_rows))
+            if settings.CONTENT_DEFINED_CHUNKING:
+                units = self.chunk_service.iter_csv_row_texts(rows)
+                return timed("chunk", self.chunk_service.iter_content_defined_chunks(units, settings.CSV_CHUNK_SIZE))
+            return timed("chunk", self.chunk_service.iter_csv_chunks(rows))
+
+        if file_type.lower() != 'txt':
+            raise ValueError(f"Unsupported file type: {file_type}")
+
+        if parallel:
+            # Workers clean and chunk each section, so "chunk" includes cleaning here.
+            sections = timed("read", self.ingestion_executor.iter_txt_sections(file_path))
+            if settings.STRUCTURED_CHUNKING:
+                blocks = self.ingestion_executor.iter_txt_blocks(sections, settings.CHUNK_MAX_TOKENS)
+                return timed("chunk", self.chunk_service.pack_structured_blocks(blocks, settings.CHUNK_MAX_TOKENS))
+            return timed("chunk", self.ingestion_executor.iter_txt_chunks(sections, settings.CONTENT_DEFINED_CHUNKING))
+
+        raw_lines = timed("read", self.file_processor.iter_raw_lines(file_path, self.block_size))
+        pieces = timed("clean", self.file_processor.clean_lines(raw_lines))
+        if settings.STRUCTURED_CHUNKING:
+            lines = self.chunk_service.iter_lines(pieces)
+            return timed("chunk", self.chunk_service.iter_structured_chunks(lines, settings.CHUNK_MAX_TOKENS))
+        if settings.CONTENT_DEFINED_CHUNKING:
+            lines = self.chunk_service.iter_lines(pieces)
+            return timed("chunk", self.chunk_service.iter_content_defined_chunks(lines, settings.TXT_CHUNK_SIZE))
+        return timed("chunk", self.chunk_service.iter_chunks(pieces, file_type))
+
+    async def _save_upload(self, file: UploadFile, file_path: str) -> int:
+        size = 0
         try:
-            offset = (page - 1) * size
+            async with aiofiles.open(file_path, 'wb') as f:
+                while block := await file.read(self.block_size):
+                    size += len(block)
+                    if size > self.max_file_size:
+                        raise HTTPException(
+                            status_code=413,
+                            detail=f"File size exceeds maximum allowed size"
+                        )
+                    await f.write(block)
+        except Exception:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
+        return size
 
-            query = db.query(FileRecord)
+    async def get_job(self, db: AsyncSession, job_id: str):
+        try:
+            job = await db.scalar(select(IngestionJob).where(IngestionJob.job_id == job_id))
+            if job is None:
+                raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
 
-            print(f"Fetching files: page={page}, size={size}, search={search}")
+            return 200, ResponseUtils.success(data=self._to_job_info(job), message="Job founded")
+        except HTTPException as http_exc:
+            return http_exc.status_code, ResponseUtils.error(
+                error="JOB_NOT_FOUND",
+                message=str(http_exc.detail)
+            )
+        except Exception as e:
+            return 500, ResponseUtils.error(
+                error="JOB_RETRIEVAL_FAILED",
+                message=f"Error in retrieving job: {str(e)}"
+            )
+
+    def _to_file_info(self, file_record: FileRecord, include_preview: bool = True) -> FileInfo:
+        return FileInfo(
+            file_id=file_record.file_id,
+            original_filename=file_record.original_filename,
+            file_type=file_record.file_type,
+            file_size=file_record.file_size,
+            upload_date=file_record.upload_date,
+            content_preview=file_record.content_preview if include_preview else None,
+            id=file_record.id
+        )
+
+    def _to_job_info(self, job: IngestionJob) -> JobInfo:
+        return JobInfo(
+            job_id=job.job_id,
+            file_id=job.file_id,
+            status=job.status,
+            total_chunks=job.total_chunks,
+            processed_chunks=job.processed_chunks,
+            error=job.error,
+            reused_chunks=job.reused_chunks,
+            added_chunks=job.added_chunks,
+            removed_chunks=job.removed_chunks,
+            created_at=job.created_at,
+            updated_at=job.updated_at
+        )
+    
+    async def get_files(
+        self,
+        db: AsyncSession,
+        page: int = 1,
+        size: int = 10,
+        search: Optional[str] = None,
+        cursor: Optional[str] = None,
+        count: TotalCount = TotalCount.EXACT,
+        include_preview: bool = False
+    ):
+        """Lists files newest first.
+
+        With ``cursor`` (the ``next_cursor`` of the previous page) the page
+        starts right after that file using the (upload_date, id) index, so deep
+        pages cost the same as the first one; ``page`` is only used without it.
+        """
+        try:
+            # Without include_preview only the head of each preview is read, one
+            # character past LIST_PREVIEW_CHARS so clients can tell it was cut.
+            if include_preview:
+                preview = FileRecord.content_preview
+            else:
+                preview = func.substr(FileRecord.content_preview, 1, LIST_PREVIEW_CHARS + 1)
+            query = select(FileRecord, preview).options(defer(FileRecord.content_preview, raiseload=True))
+
+            debug_log(f"Fetching files: page={page}, size={size}, search={search}")
 
             if search:
-                query = query.filter(FileRecord.original_filename.ilike(f"%{search}%"))
+                query = query.where(FileRecord.original_filename.ilike(f"%{search}%"))
+            filtered = query
 
-            total = query.count()
+            if cursor:
+                # The bound is read from the stored row, so it compares exactly
+                # however the database serialises timestamps.
+                anchor_id = self._decode_cursor(cursor)
+                anchor = aliased(FileRecord)
+                anchor_date = select(anchor.upload_date).where(anchor.id == anchor_id).scalar_subquery()
+                query = query.where(tuple_(FileRecord.upload_date, FileRecord.id) < tuple_(anchor_date, anchor_id))
+            else:
+                query = query.offset((page - 1) * size)
+
+            rows = (await db.execute(
+                query.order_by(FileRecord.upload_date.desc(), FileRecord.id.desc()).limit(size + 1)
+            )).all()
+            files = rows[:size]
+
+            total, estimated = await self._count_files(db, filtered, search, count)
 
-            files = query.order_by(FileRecord.upload_date.desc())\
-                        .offset(offset)\
-                        .limit(size)\
-                        .all()
-            
             file_responses = [
-                FileInfo(
-                    id=f.id,
-                    file_id=f.file_id,
-                    original_filename=f.original_filename,
-                    file_type=f.file_type,
-                    file_size=f.file_size,
-                    upload_date=f.upload_date,
-                    content_preview=f.content_preview
-                ) for f in files
+                self._to_file_info(f, include_preview=False).model_copy(update={"content_preview": content_preview})
+                for f, content_preview in files
             ]
 
             pagination = PaginationInfo(
                 page=page,
                 size=size,
                 total=total,
+                total_estimated=estimated,
+                next_cursor=self._encode_cursor(files[-1][0].id) if len(rows) > size else None
             )
 
             data = FilesListData(files=file_responses, pagination=pagination)
@@ -148,10 +661,49 @@ class FileService:
                 data=data,
                 message="Files founded"
             )
-            
+
+        except HTTPException as http_exc:
+            return http_exc.status_code, ResponseUtils.error(
+                error="FILES_RETRIEVAL_FAILED",
+                message=str(http_exc.detail)
+            )
         except Exception as e:
             return 500, ResponseUtils.error(
                 error="FILES_RETRIEVAL_FAILED",
                 message=f"Error in retrieving files: {str(e)}"
             )
-    
+
+    async def _count_files(self, db: AsyncSession, query, search: Optional[str], count: TotalCount):
+        """Returns (total, is_estimate); estimates come from PostgreSQL statistics and fall back to COUNT(*)."""
+        if count == TotalCount.NONE:
+            return None, False
+        if count == TotalCount.ESTIMATED and db.bind.dialect.name == "postgresql":
+            estimate = await self._estimate_files(db, search)
+            if estimate is not None:
+                return estimate, True
+        return await db.scalar(select(func.count()).select_from(query.subquery())), False
+
+    @staticmethod
+    async def _estimate_files(db: AsyncSession, search: Optional[str]) -> Optional[int]:
+        if search:
+            plan = await db.scalar(
+                text("EXPLAIN (FORMAT JSON) SELECT 1 FROM file_records WHERE original_filename ILIKE :pattern"),
+                {"pattern": f"%{search}%"}
+            )
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            return int(plan[0]["Plan"]["Plan Rows"])
+
+        rows = await db.scalar(text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'file_records'::regclass"))
+        # reltuples is -1 until the table has been vacuumed or analyzed.
+        return rows if rows is not None and rows >= 0 else None
+
+    @staticmethod
+    def _encode_cursor(file_record_id: int) -> str:
+        return base64.urlsafe_b64encode(str(file_record_id).encode()).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> int:
+        try:
+            return int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+        except (ValueError, UnicodeDecodeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
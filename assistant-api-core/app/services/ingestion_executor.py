@@ -0,0 +1,253 @@
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Deque, Iterable, Iterator, List, Optional, Tuple
+import io
+import itertools
+import multiprocessing
+import os
+import threading
+
+from ..config.settings import settings
+from ..utils.file_processor import FileProcessor
+from .chunk_service import Block, ChunkService
+
+# Per-process services for pool workers, built once by _init_worker.
+_worker_processor: Optional[FileProcessor] = None
+_worker_chunker: Optional[ChunkService] = None
+
+
+def _init_worker() -> None:
+    global _worker_processor, _worker_chunker
+    _worker_processor = FileProcessor()
+    _worker_chunker = ChunkService()
+
+
+def _clean_and_chunk_txt(section: str, content_defined: bool) -> List[str]:
+    pieces = _worker_processor.clean_lines(io.StringIO(section))
+    if content_defined:
+        lines = _worker_chunker.iter_lines(pieces)
+        return list(_worker_chunker.iter_content_defined_chunks(lines, settings.TXT_CHUNK_SIZE))
+    cleaned = "".join(pieces)
+    return _worker_chunker.txt_splitter.split_text(cleaned) if cleaned else []
+
+
+def _clean_and_split_txt_blocks(section: str, max_tokens: int) -> List[Block]:
+    lines = _worker_chunker.iter_lines(_worker_processor.clean_lines(io.StringIO(section)))
+    return list(_worker_chunker.iter_structured_blocks(lines, max_tokens))
+
+
+def _render_csv_rows(headers: List[str], rows: List[List[str]]) -> List[str]:
+    cleaned = _worker_processor.clean_csv_rows(itertools.chain([headers], rows))
+    return list(_worker_chunker.iter_csv_row_texts(cleaned))
+
+
+def _is_safe_byte(byte: int) -> bool:
+    # Printable ASCII other than space: the cleaner keeps it as is.
+    return 0x21 <= byte <= 0x7E
+
+
+class IngestionExecutor:
+    """Cleans and chunks large files on a process pool so ingestion is not bound to one core.
+
+    TXT files are cut into sections of about ``section_size`` bytes at newlines
+    between two printable non-space characters. Line cleaning carries no state
+    across such a newline, so the cleaned file is exactly the cleaned sections
+    joined by newlines. Workers clean and chunk whole sections and the results
+    are merged in file order:
+
+    * content-defined chunks are re-packed from the last boundary before each
+      seam until they line up with the next section's boundaries again, which
+      gives the same chunks as the sequential pipeline;
+    * splitter chunks are re-split around each seam, the same way ``iter_chunks``
+      carries its last chunk into the next window, so neighbours overlap there too.
+
+    For structured chunking workers only clean, classify and token-count the
+    paragraphs of each section; packing them under their headings is cheap and
+    stays sequential, so the chunks are the same as in one pass.
+
+    For CSV, rows are parsed in order by the caller and workers clean and render
+    them in batches; packing rows into chunks stays sequential.
+
+    Iterators are synchronous and meant to run in a worker thread; waiting on
+    the pool releases the GIL. At most ``2 * processes`` sections are in flight,
+    so memory stays bounded whatever the file size. The pool is started on
+    first use and each process builds its services once.
+    """
+
+    def __init__(self, processes: int, section_size: int, min_file_size: int):
+        self.processes = processes
+        self.section_size = section_size
+        self.min_file_size = min_file_size
+        self.chunk_service = ChunkService()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.processes > 0
+
+    def handles(self, file_path: str) -> bool:
+        """Whether a file is large enough for the pool to beat the in-thread pipeline."""
+        try:
+            return self.enabled and os.path.getsize(file_path) >= self.min_file_size
+        except OSError:
+            return False
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a process that runs an event loop and HTTP client threads is unsafe.
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker
+                )
+            return self._pool
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+
+    def _map_ordered(self, fn: Callable, arguments: Iterable[Tuple]) -> Iterator:
+        """Like ``Executor.map`` but submits lazily, keeping a bounded number of tasks in flight."""
+        pool = self._get_pool()
+        in_flight: Deque[Future] = deque()
+        try:
+            for args in arguments:
+                in_flight.append(pool.submit(fn, *args))
+                if len(in_flight) >= 2 * self.processes:
+                    yield in_flight.popleft().result()
+            while in_flight:
+                yield in_flight.popleft().result()
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def iter_txt_sections(self, file_path: str) -> Iterator[str]:
+        """Reads a TXT file as decoded sections that end at safe newlines."""
+        try:
+            with open(file_path, "rb") as file:
+                buffer = b""
+                while block := file.read(self.section_size):
+                    buffer += block
+                    cut = self._find_cut(buffer)
+                    if cut:
+                        yield self._decode(buffer[:cut])
+                        buffer = buffer[cut:]
+                if buffer:
+                    yield self._decode(buffer)
+        except Exception as e:
+            raise Exception(f"Error reading file: {str(e)}")
+
+    def _find_cut(self, buffer: bytes) -> int:
+        """Offset just past the last safe newline in the buffer, or 0 if there is none.
+
+        A line ending in ``**`` or ``**:`` may be a label that belongs to the
+        next paragraph, so sections never end on one.
+        """
+        end = len(buffer) - 1
+        while (position := buffer.rfind(b"\n", 1, end)) != -1:
+            if (
+                _is_safe_byte(buffer[position - 1])
+                and _is_safe_byte(buffer[position + 1])
+                and not buffer.endswith(b"**", 0, position)
+                and not buffer.endswith(b"**:", 0, position)
+            ):
+                return position + 1
+            end = position
+        return 0
+
+    def _decode(self, data: bytes) -> str:
+        text = data.decode("utf-8")
+        # Match the universal newlines of a file opened in text mode.
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
+
+    def iter_txt_chunks(self, sections: Iterable[str], content_defined: bool) -> Iterator[str]:
+        results = self._map_ordered(_clean_and_chunk_txt, ((section, content_defined) for section in sections))
+        if content_defined:
+            return self._merge_content_defined(results, settings.TXT_CHUNK_SIZE)
+        return self._merge_overlapping(results)
+
+    def iter_txt_blocks(self, sections: Iterable[str], max_tokens: int) -> Iterator[Block]:
+        """Structured blocks of each section in file order, for ``ChunkService.pack_structured_blocks``."""
+        for blocks in self._map_ordered(_clean_and_split_txt_blocks, ((section, max_tokens) for section in sections)):
+            yield from blocks
+
+    def _merge_overlapping(self, sections: Iterable[List[str]]) -> Iterator[str]:
+        carry: Optional[str] = None
+        for chunks in sections:
+            if not chunks:
+                continue
+            if carry is not None:
+                # Both ends touch the seam, so together they are contiguous cleaned text.
+                seam = self.chunk_service.txt_splitter.split_text(f"{carry}\n{chunks[0]}")
+                # The next chunk's overlap may already cover the seam's short tail.
+                if len(chunks) > 1 and chunks[1].startswith(seam[-1]):
+                    seam.pop()
+                chunks = seam + chunks[1:]
+            yield from chunks[:-1]
+            carry = chunks[-1]
+        if carry is not None:
+            yield carry
+
+    def _merge_content_defined(self, sections: Iterable[List[str]], max_size: int) -> Iterator[str]:
+        # Pieces after the last boundary; the worker that saw them closed
+        # them early only because its section ended.
+        carry: List[str] = []
+        for chunks in sections:
+            if not chunks:
+                continue
+            if carry:
+                chunks = self._repack_seam(carry, chunks, max_size)
+            if self.chunk_service.closes_content_defined_chunk(chunks[-1], max_size):
+                yield from chunks
+                carry = []
+            else:
+                yield from chunks[:-1]
+                carry = chunks[-1].split("\n")
+        if carry:
+            yield "\n".join(carry)
+
+    def _repack_seam(self, carry: List[str], chunks: List[str], max_size: int) -> List[str]:
+        # The packer starts empty after every boundary, so once re-packing
+        # closes a chunk where the worker started one, the rest is identical.
+        starts = {}
+        offset = 0
+        for index, chunk in enumerate(chunks):
+            starts[offset] = index
+            offset += chunk.count("\n") + 1
+
+        pieces = itertools.chain(carry, (piece for chunk in chunks for piece in chunk.split("\n")))
+        repacked: List[str] = []
+        consumed = -len(carry)
+        for chunk in self.chunk_service.pack_content_defined(pieces, max_size):
+            repacked.append(chunk)
+            consumed += chunk.count("\n") + 1
+            if consumed in starts:
+                return repacked + chunks[starts[consumed]:]
+        return repacked
+
+    def iter_csv_row_texts(self, raw_rows: Iterable[List[str]]) -> Iterator[str]:
+        """Cleans and renders raw CSV rows on the pool; the first row is the header."""
+        raw_rows = iter(raw_rows)
+        headers = next(raw_rows, None)
+        if not headers:
+            return
+        for row_texts in self._map_ordered(_render_csv_rows, self._iter_row_batches(headers, raw_rows)):
+            yield from row_texts
+
+    def _iter_row_batches(self, headers: List[str], rows: Iterator[List[str]]) -> Iterator[Tuple[List[str], List[List[str]]]]:
+        batch: List[List[str]] = []
+        size = 0
+        for row in rows:
+            batch.append(row)
+            size += sum(map(len, row))
+            if size >= self.section_size:
+                yield headers, batch
+                batch, size = [], 0
+        if batch:
+            yield headers, batch
@@ -0,0 +1,62 @@
+from typing import Awaitable, Callable, List, Optional
+import asyncio
+
+
+class IngestionQueueUnavailable(Exception):
+    pass
+
+
+class IngestionQueueFull(IngestionQueueUnavailable):
+    pass
+
+
+class IngestionQueue:
+    """Bounded queue of ingestion job ids drained by a fixed pool of worker tasks."""
+
+    def __init__(self, handler: Callable[[str], Awaitable[None]], workers: int, max_size: int):
+        self.handler = handler
+        self.workers = workers
+        self.max_size = max_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"ingestion-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def enqueue(self, job_id: str) -> None:
+        if self._queue is None:
+            raise IngestionQueueUnavailable("Ingestion queue is not running")
+        try:
+            self._queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            raise IngestionQueueFull(f"Ingestion queue is full ({self.max_size} pending jobs)")
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self.handler(job_id)
+            except Exception as e:
+                print(f"Ingestion worker {index} failed on job {job_id}: {e}")
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,60 @@
+from enum import Enum
+import re
+import unicodedata
+
+
+class Route(str, Enum):
+    DIRECT = "direct"
+    AGENT = "agent"
+
+
+# Matched against lowercased text without accents, so "Guárdalo" and
+# "guardalo" are the same. Spanish verbs match on their stem to cover every
+# inflection and enclitic ("guárdame", "anótalo", "almacénalas").
+TOOL_REQUEST_PATTERN = re.compile(
+    r"\b("
+    r"crea(r|me|la|lo|las|los|nos|rla|rlo|rlas|rlos)?|guard\w*|almacen\w*|anot\w*|apunt\w*|"
+    r"notas?|recordatorios?|"
+    r"creat(e|es|ing)|sav(e|es|ed|ing)|stor(e|es|ed|ing)|notes?|jot|reminders?|"
+    r"write\s+(\w+\s+){0,3}down"
+    r")\b"
+)
+
+# Looser: words that may ask to keep something without naming a note
+# ("recuérdame", "regístralo", "keep this"). They don't route to the agent,
+# but such a question must not reuse the answer of a similar plain question.
+NOTE_MENTION_PATTERN = re.compile(
+    r"\b(recuerd\w*|record\w*|registr\w*|escrib\w*|memo\w*|remember\w*|remind\w*|keep|kept|write|wrote)\b"
+)
+
+
+def fold(text: str) -> str:
+    """Lowercases and strips accents."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+class IntentRouter:
+    """Keyword rules that send plain questions to a single LLM call and tool requests to the agent.
+
+    The rules err towards the agent: any form of a note or saving verb routes
+    there, even in a question like "¿qué guarda el museo?", so a false
+    positive only costs the slower path.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+
+    @staticmethod
+    def wants_tool(question: str) -> bool:
+        return TOOL_REQUEST_PATTERN.search(fold(question)) is not None
+
+    @staticmethod
+    def mentions_notes(question: str) -> bool:
+        text = fold(question)
+        return TOOL_REQUEST_PATTERN.search(text) is not None or NOTE_MENTION_PATTERN.search(text) is not None
+
+    def route(self, question: str) -> Route:
+        if not self.enabled or self.wants_tool(question):
+            return Route.AGENT
+        return Route.DIRECT
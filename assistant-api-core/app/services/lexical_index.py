@@ -0,0 +1,182 @@
+from collections import Counter
+from contextlib import contextmanager
+from typing import List, Dict, Tuple, Optional, Set
+import heapq
+import math
+import os
+import re
+import sqlite3
+import threading
+from ..utils.file_processor import NON_PRINTABLE_PATTERN
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a al con de del el en es la las lo los o para por que se su sus un una y
+an and are as at be by for from in is it of on or the to with
+""".split())
+
+
+class LexicalIndex:
+    """BM25 inverted index over stored chunks, persisted in SQLite.
+
+    Postings live on disk and are read per query term. Corpus statistics are
+    kept in the database too, updated in the same transaction as the postings,
+    so several worker processes can share one index file. Ids are the same
+    content-addressed ids used in Chroma, so both indexes can be fused and
+    updated together.
+    """
+
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.k1 = k1
+        self.b = b
+
+        self._lock = threading.Lock()
+        # Autocommit mode; writes open their own BEGIN IMMEDIATE transaction.
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS lexical_docs (
+                doc_id TEXT PRIMARY KEY,
+                file_id TEXT NOT NULL,
+                length INTEGER NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS lexical_postings (
+                term TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, doc_id)
+            ) WITHOUT ROWID"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_lexical_postings_doc_id ON lexical_postings (doc_id)"
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS lexical_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                doc_count INTEGER NOT NULL,
+                total_length INTEGER NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "INSERT OR IGNORE INTO lexical_stats (id, doc_count, total_length) "
+            "SELECT 0, COUNT(*), COALESCE(SUM(length), 0) FROM lexical_docs"
+        )
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        # Stored chunks have non-ASCII characters stripped by FileProcessor, so
+        # queries go through the same filter ("París" and the chunk both become "pars").
+        text = NON_PRINTABLE_PATTERN.sub("", text).lower()
+        return [token for token in TOKEN_PATTERN.findall(text) if token not in STOPWORDS]
+
+    def add(self, ids: List[str], texts: List[str], file_ids: List[str]) -> None:
+        """Indexes (or re-indexes) each chunk under its id."""
+        if not len(ids) == len(texts) == len(file_ids):
+            raise ValueError(f"Cannot index {len(texts)} texts and {len(file_ids)} file ids for {len(ids)} ids")
+
+        docs = []
+        postings = []
+        for doc_id, text, file_id in zip(ids, texts, file_ids):
+            terms = Counter(self.tokenize(text))
+            docs.append((doc_id, str(file_id), sum(terms.values())))
+            postings.extend((term, doc_id, tf) for term, tf in terms.items())
+
+        with self._lock, self._transaction():
+            self._delete(ids)
+            self._conn.executemany(
+                "INSERT INTO lexical_docs (doc_id, file_id, length) VALUES (?, ?, ?)", docs
+            )
+            self._conn.executemany(
+                "INSERT INTO lexical_postings (term, doc_id, tf) VALUES (?, ?, ?)", postings
+            )
+            self._conn.execute(
+                "UPDATE lexical_stats SET doc_count = doc_count + ?, total_length = total_length + ? WHERE id = 0",
+                (len(docs), sum(length for _, _, length in docs))
+            )
+
+    def remove(self, ids: List[str]) -> None:
+        with self._lock, self._transaction():
+            self._delete(ids)
+
+    @contextmanager
+    def _transaction(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _stats(self) -> Tuple[int, int]:
+        return self._conn.execute("SELECT doc_count, total_length FROM lexical_stats WHERE id = 0").fetchone()
+
+    def _delete(self, ids: List[str]) -> None:
+        for start in range(0, len(ids), 900):
+            batch = ids[start:start + 900]
+            placeholders = ",".join("?" * len(batch))
+            removed, removed_length = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(length), 0) FROM lexical_docs WHERE doc_id IN ({placeholders})",
+                batch
+            ).fetchone()
+            if not removed:
+                continue
+            self._conn.execute(f"DELETE FROM lexical_postings WHERE doc_id IN ({placeholders})", batch)
+            self._conn.execute(f"DELETE FROM lexical_docs WHERE doc_id IN ({placeholders})", batch)
+            self._conn.execute(
+                "UPDATE lexical_stats SET doc_count = doc_count - ?, total_length = total_length - ? WHERE id = 0",
+                (removed, removed_length)
+            )
+
+    def search(self, query: str, k: int, file_id: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Returns up to ``k`` (doc_id, bm25 score) pairs, best first."""
+        terms = set(self.tokenize(query))
+        if not terms:
+            return []
+
+        file_id = str(file_id) if file_id is not None else None
+        scores: Dict[str, float] = {}
+
+        with self._lock:
+            doc_count, total_length = self._stats()
+            if not doc_count:
+                return []
+            avg_length = total_length / doc_count
+            for term in terms:
+                rows = self._conn.execute(
+                    "SELECT p.doc_id, p.tf, d.length, d.file_id FROM lexical_postings p "
+                    "JOIN lexical_docs d ON d.doc_id = p.doc_id WHERE p.term = ?",
+                    (term,)
+                ).fetchall()
+                if not rows:
+                    continue
+                # Document frequency is corpus wide so scores do not depend on the filter.
+                idf = math.log(1 + (doc_count - len(rows) + 0.5) / (len(rows) + 0.5))
+                for doc_id, tf, length, doc_file_id in rows:
+                    if file_id is not None and doc_file_id != file_id:
+                        continue
+                    norm = tf + self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def doc_ids(self) -> Set[str]:
+        with self._lock:
+            return {doc_id for doc_id, in self._conn.execute("SELECT doc_id FROM lexical_docs")}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._stats()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,26 +1,37 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 from langchain_openai import ChatOpenAI
+from langchain_core.language_models import BaseChatModel
 from langchain.chains import RetrievalQA
 from langchain.prompts import PromptTemplate, ChatPromptTemplate
 from langchain.schema import HumanMessage, SystemMessage
 from ..config.settings import settings
 from .vector_db_service import VectorDBService
+from .answer_cache import AnswerCache
+from .intent_router import IntentRouter, Route
+from .context_packer import ContextPacker, PackedContext
 from langchain.agents import AgentExecutor, create_tool_calling_agent
+from opentelemetry import trace
+import asyncio
 import json
+import time
 from ..utils.response_utils import ResponseUtils
-from ..models.schemas import ChatData
+from ..utils.metrics import LatencyStats
+from ..utils.telemetry import tracer, StageTimer, LLMCallbackHandler, debug_log, count_cache, count_tokens
+from ..models.schemas import ChatData, ChatBatchData, ChatBatchItem
 from ..tools.strapi_cms import create_note
 
 class RAGService:
-    def __init__(self):
-        self.llm = ChatOpenAI(
+    NO_CONTEXT_ANSWER = "No encontré información relevante para responder tu pregunta."
+
+    def __init__(self, llm: Optional[BaseChatModel] = None, vector_db_service: Optional[VectorDBService] = None):
+        self.llm = llm or ChatOpenAI(
             openai_api_key=settings.OPENAI_API_KEY,
             model_name=settings.LLM_MODEL,
             temperature=settings.LLM_TEMPERATURE,
             max_tokens=settings.MAX_TOKENS
         )
         
-        self.vector_db_service = VectorDBService()
+        self.vector_db_service = vector_db_service or VectorDBService()
 
         self.rag_template = """Eres un asistente multilingüe especializado en responder preguntas basándose únicamente en el contexto proporcionado.
 
@@ -37,6 +48,24 @@ Instrucciones:
 - Mantén un tono profesional y útil
 - Si el usuario solicita crear una nota, puedes usar la herramienta disponible para hacerlo
 
+Respuesta:"""
+
+        # The direct route has no tools bound, so its prompt must not offer one.
+        self.direct_template = """Eres un asistente multilingüe especializado en responder preguntas basándose únicamente en el contexto proporcionado.
+
+Contexto relevante:
+{context}
+
+Pregunta: {question}
+
+Instrucciones:
+- Responde únicamente basándote en la información del contexto proporcionado
+- Si la información no está en el contexto, di claramente que no tienes esa información
+- Sé preciso y conciso en tu respuesta
+- Si hay múltiples fuentes en el contexto, puedes combinar la información
+- Mantén un tono profesional y útil
+- No puedes crear ni guardar notas; si el usuario lo solicita, indícale que lo pida de forma explícita, por ejemplo "crea una nota con..."
+
 Respuesta:"""
 
 
@@ -44,6 +73,10 @@ Respuesta:"""
             template=self.rag_template,
             input_variables=["context", "question"]
         )
+        self.direct_prompt_template = PromptTemplate(
+            template=self.direct_template,
+            input_variables=["context", "question"]
+        )
         self.tools = [create_note]
 
         self.agent_prompt = ChatPromptTemplate.from_messages([
@@ -70,61 +103,454 @@ Instrucciones:
         self.agent_executor = AgentExecutor(
             agent=self.agent, 
             tools=self.tools, 
-            verbose=True
+            verbose=settings.DEBUG_LOGGING,
+            return_intermediate_steps=True
+        )
+
+        self.answer_cache = AnswerCache(
+            max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+            similarity_threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD
+        ) if settings.ANSWER_CACHE_ENABLED else None
+
+        self.intent_router = IntentRouter(enabled=settings.INTENT_ROUTER_ENABLED)
+        self.route_latency = {route.value: LatencyStats() for route in Route}
+        self.route_latency["cache"] = LatencyStats()
+
+        self.context_packer = ContextPacker(
+            max_tokens=settings.CONTEXT_MAX_TOKENS,
+            model=settings.LLM_MODEL,
+            dedup_threshold=settings.CONTEXT_DEDUP_THRESHOLD,
+            max_overlap=settings.CHUNK_OVERLAP
         )
+        self.context_usage = {"requests": 0, "context_tokens": 0, "tokens_saved": 0}
+
+        self.stream_ttfb = LatencyStats()
+        self.stream_first_token = LatencyStats()
     
-    async def query_documents(self, question: str, file_id: Optional[int] = None, max_chunks: int = None):
-        try:
-            if max_chunks is None:
-                max_chunks = settings.MAX_CONTEXT_CHUNKS
-            
-            relevant_docs = await self.vector_db_service.similarity_search_with_scores(
-                query=question,
-                k=max_chunks,
-                file_id=file_id
-            )
+    async def query_documents(
+        self,
+        question: str,
+        file_id: Optional[int] = None,
+        max_chunks: int = None,
+        section: Optional[str] = None
+    ):
+        with tracer.start_as_current_span("chat") as span:
+            timer = StageTimer("chat")
+            started = time.perf_counter()
+            try:
+                with timer.stage("embed_query"):
+                    query_embedding = await self.vector_db_service.embedding_service.embed_query(question)
+                with timer.stage("search"):
+                    relevant_docs = await self._retrieve(question, file_id, max_chunks, query_embedding, section)
+
+                debug_log(relevant_docs)
 
-            print(relevant_docs)
+                answer = await self._answer(question, query_embedding, relevant_docs, started, timer)
+                span.set_attribute("chat.route", answer["route"] or "none")
+                span.set_attribute("chat.cached", answer["cached"])
+                if answer.get("context_tokens") is not None:
+                    span.set_attribute("chat.context_tokens", answer["context_tokens"])
+                    span.set_attribute("chat.tokens_saved", answer["tokens_saved"])
+                data = ChatData(
+                    answer=answer["answer"],
+                    context_tokens=answer.get("context_tokens"),
+                    tokens_saved=answer.get("tokens_saved")
+                )
             
-            if not relevant_docs:
-                data = ChatData(answer="No encontré información relevante para responder tu pregunta.")
                 return 200, ResponseUtils.success(data=data, message="Assintan responded successfully")
-            
-            
-            context = self._build_context(relevant_docs)
-            
-            prompt = self.prompt_template.format(
-                context=context,
-                question=question
-            )
+                
+            except Exception as e:
+                span.record_exception(e)
+                return 500, ResponseUtils.error(
+                    error="CHAT_ERROR",
+                    message=f"Error when querying documents: {str(e)}"  
+                )
+            finally:
+                timer.add("total", time.perf_counter() - started)
+                timer.finish(span)
+
+    async def query_batch(
+        self,
+        messages: List[str],
+        file_id: Optional[int] = None,
+        max_chunks: int = None,
+        section: Optional[str] = None
+    ):
+        """Answers many questions with one embedding call and one vector-index lookup.
+
+        Identical questions (after trimming) are answered once; LLM calls run
+        with at most CHAT_BATCH_CONCURRENCY in flight. A failing item does not
+        fail the batch.
+        """
+        batch_span = tracer.start_span("chat_batch", attributes={"chat_batch.size": len(messages)})
+        try:
+            started = time.perf_counter()
+            timings: Dict[str, float] = {}
+
+            def lap(name: str, since: float) -> float:
+                timings[name] = round((time.perf_counter() - since) * 1000, 2)
+                return time.perf_counter()
+
+            questions = [message.strip() for message in messages]
+            unique = list(dict.fromkeys(question for question in questions if question))
+
+            batch_timer = StageTimer("chat_batch", parent=batch_span)
+            step = time.perf_counter()
+            with batch_timer.stage("embed_query", questions=len(unique)):
+                embeddings = await self.vector_db_service.embedding_service.create_embeddings(unique) if unique else []
+            step = lap("embedding_ms", step)
+            with batch_timer.stage("search"):
+                retrievals = await self.vector_db_service.similarity_search_many(
+                    unique, embeddings, k=max_chunks or settings.MAX_CONTEXT_CHUNKS, file_id=file_id, section=section
+                )
+            step = lap("retrieval_ms", step)
+
+            semaphore = asyncio.Semaphore(settings.CHAT_BATCH_CONCURRENCY)
+
+            async def answer(question: str, query_embedding: List[float], relevant_docs: List[Dict[str, Any]]) -> ChatBatchItem:
+                async with semaphore:
+                    item_started = time.perf_counter()
+                    item_timer = StageTimer("chat", parent=batch_span)
+                    try:
+                        result = await self._answer(question, query_embedding, relevant_docs, item_started, item_timer)
+                        item = ChatBatchItem(index=0, message=question, success=True, **result)
+                    except Exception as e:
+                        item = ChatBatchItem(
+                            index=0, message=question, success=False, error=f"Error when querying documents: {str(e)}"
+                        )
+                    item.elapsed_ms = round((time.perf_counter() - item_started) * 1000, 2)
+                    item_timer.finish()
+                    return item
+
+            answers = dict(zip(unique, await asyncio.gather(*(
+                answer(question, query_embedding, relevant_docs)
+                for question, query_embedding, relevant_docs in zip(unique, embeddings, retrievals)
+            ))))
+            batch_timer.add("generation", time.perf_counter() - step)
+            lap("generation_ms", step)
+
+            results: List[ChatBatchItem] = []
+            first_index: Dict[str, int] = {}
+            for index, question in enumerate(questions):
+                if not question:
+                    results.append(ChatBatchItem(index=index, message=messages[index], success=False, error="Message cannot be empty"))
+                    continue
+                duplicate_of = first_index.setdefault(question, index)
+                results.append(answers[question].model_copy(update={
+                    "index": index,
+                    "message": messages[index],
+                    "duplicate_of": duplicate_of if duplicate_of != index else None
+                }))
+
+            timings["total_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            batch_timer.add("total", time.perf_counter() - started)
+            batch_timer.finish(batch_span)
+            data = ChatBatchData(results=results, unique_questions=len(unique), timings=timings)
+            return 200, ResponseUtils.success(data=data, message="Batch answered")
 
-            result = self.agent_executor.invoke({"input": prompt})
-            response = result['output']
-            
-            data = ChatData(answer=response)
-        
-            return 200, ResponseUtils.success(data=data, message="Assintan responded successfully")
-            
         except Exception as e:
+            batch_span.record_exception(e)
             return 500, ResponseUtils.error(
                 error="CHAT_ERROR",
-                message=f"Error when querying documents: {str(e)}"  
+                message=f"Error when querying documents: {str(e)}"
             )
+        finally:
+            batch_span.end()
+
+    async def _answer(
+        self,
+        question: str,
+        query_embedding: List[float],
+        relevant_docs: List[Dict[str, Any]],
+        started: float,
+        timer: StageTimer
+    ) -> Dict[str, Any]:
+        """Answers from retrieved context via the answer cache, a direct LLM call or the agent.
+
+        Answers built from a fresh context also carry its token count and the
+        tokens packing saved.
+        """
+        if not relevant_docs:
+            return {"answer": self.NO_CONTEXT_ANSWER, "cached": False, "route": None}
+
+        cacheable = self._is_cacheable(question)
+        if cacheable:
+            cached = self._lookup_answer(question, query_embedding, relevant_docs)
+            if cached is not None:
+                self.route_latency["cache"].observe(time.perf_counter() - started)
+                return {"answer": cached.answer, "cached": True, "route": None}
+
+        route = self.intent_router.route(question)
+        with timer.stage("build_context"):
+            prompt, packed = self._build_prompt(question, relevant_docs, route)
+        callbacks = LLMCallbackHandler(parent=timer.parent)
+
+        with timer.stage("llm", route=route.value) as span:
+            if route == Route.DIRECT:
+                response = await self.generate_llm_response(prompt, callbacks=[callbacks])
+                used_tools = False
+            else:
+                result = await self.agent_executor.ainvoke({"input": prompt}, config={"callbacks": [callbacks]})
+                response = result['output']
+                used_tools = bool(result.get('intermediate_steps'))
+            callbacks.record(span)
+
+        # Tool time is reported as its own stage rather than as LLM time.
+        if callbacks.tool_seconds:
+            timer.add("llm", -callbacks.tool_seconds)
+            timer.add("tool_calls", callbacks.tool_seconds)
+
+        self.route_latency[route.value].observe(time.perf_counter() - started)
+
+        if cacheable and not used_tools:
+            self._cache_answer(question, query_embedding, response, relevant_docs)
+
+        return {
+            "answer": response,
+            "cached": False,
+            "route": route.value,
+            "context_tokens": packed.tokens,
+            "tokens_saved": packed.tokens_saved
+        }
+
+    async def stream_query(
+        self,
+        question: str,
+        file_id: Optional[int] = None,
+        max_chunks: int = None,
+        section: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yields retrieval, tool and token events as the model produces them, ending with ``done`` or ``error``."""
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+        # Spans are never made current here: the context would leak to the
+        # consumer across yields.
+        span = tracer.start_span("chat.stream")
+        timer = StageTimer("chat", parent=span)
+
+        def elapsed_ms() -> float:
+            return round((time.perf_counter() - started) * 1000, 2)
+
+        def event(name: str, data: Dict[str, Any]) -> Dict[str, Any]:
+            if "ttfb_ms" not in timings:
+                timings["ttfb_ms"] = elapsed_ms()
+                self.stream_ttfb.observe(timings["ttfb_ms"] / 1000)
+            return {"event": name, "data": data}
+
+        try:
+            with timer.stage("embed_query"):
+                query_embedding = await self.vector_db_service.embedding_service.embed_query(question)
+            with timer.stage("search"):
+                relevant_docs = await self._retrieve(question, file_id, max_chunks, query_embedding, section)
+            yield event("retrieval", {
+                "sources": [
+                    {
+                        "file_id": doc["file_id"],
+                        "chunk_index": doc["chunk_index"],
+                        "source": doc["source"],
+                        "similarity_score": doc["similarity_score"]
+                    } for doc in relevant_docs
+                ],
+                "elapsed_ms": elapsed_ms()
+            })
+
+            cacheable = bool(relevant_docs) and self._is_cacheable(question)
+            cached = None
+            if cacheable:
+                cached = self._lookup_answer(question, query_embedding, relevant_docs)
+
+            route = None
+            if not relevant_docs or cached is not None:
+                answer = cached.answer if cached is not None else self.NO_CONTEXT_ANSWER
+                yield event("token", {"content": answer})
+                if cached is not None:
+                    self.route_latency["cache"].observe(time.perf_counter() - started)
+            else:
+                route = self.intent_router.route(question)
+                with timer.stage("build_context"):
+                    prompt, packed = self._build_prompt(question, relevant_docs, route)
+                timings["context_tokens"] = packed.tokens
+                timings["tokens_saved"] = packed.tokens_saved
+                span.set_attribute("chat.context_tokens", packed.tokens)
+                span.set_attribute("chat.tokens_saved", packed.tokens_saved)
+                tokens: List[str] = []
+                output = None
+                used_tools = False
+                llm_span = tracer.start_span(
+                    "chat.llm", context=trace.set_span_in_context(span), attributes={"route": route.value}
+                )
+                callbacks = LLMCallbackHandler(parent=llm_span)
+                llm_started = time.perf_counter()
+
+                async for agent_event in self._stream_events(prompt, route, callbacks):
+                    kind = agent_event["event"]
+
+                    if kind == "on_chat_model_stream":
+                        content = agent_event["data"]["chunk"].content
+                        if content:
+                            if "first_token_ms" not in timings:
+                                timings["first_token_ms"] = elapsed_ms()
+                                self.stream_first_token.observe(timings["first_token_ms"] / 1000)
+                            tokens.append(content)
+                            yield event("token", {"content": content})
+                    elif kind == "on_tool_start":
+                        used_tools = True
+                        yield event("tool_start", {
+                            "name": agent_event["name"],
+                            "input": agent_event["data"].get("input")
+                        })
+                    elif kind == "on_tool_end":
+                        yield event("tool_end", {
+                            "name": agent_event["name"],
+                            "output": str(agent_event["data"].get("output"))
+                        })
+                    elif kind == "on_chain_end" and agent_event["name"] == "AgentExecutor":
+                        output = agent_event["data"]["output"]["output"]
+
+                callbacks.record(llm_span)
+                llm_span.end()
+                timer.add("llm", time.perf_counter() - llm_started - callbacks.tool_seconds)
+                if callbacks.tool_seconds:
+                    timer.add("tool_calls", callbacks.tool_seconds)
+
+                answer = output if output is not None else "".join(tokens)
+                self.route_latency[route.value].observe(time.perf_counter() - started)
+                if cacheable and not used_tools:
+                    self._cache_answer(question, query_embedding, answer, relevant_docs)
+
+            yield event("done", {
+                "answer": answer,
+                "cached": cached is not None,
+                "route": route.value if route is not None else None,
+                "total_ms": elapsed_ms(),
+                **timings
+            })
+
+        except Exception as e:
+            span.record_exception(e)
+            yield event("error", {
+                "error": "CHAT_ERROR",
+                "message": f"Error when querying documents: {str(e)}"
+            })
+
+        finally:
+            timer.add("total", time.perf_counter() - started)
+            timer.finish(span)
+            span.end()
+
+    def stream_stats(self) -> Dict[str, Any]:
+        return {
+            "ttfb": self.stream_ttfb.snapshot(),
+            "first_token": self.stream_first_token.snapshot()
+        }
+
+    def route_stats(self) -> Dict[str, Any]:
+        return {
+            "router_enabled": self.intent_router.enabled,
+            "routes": {route: stats.snapshot() for route, stats in self.route_latency.items()}
+        }
+
+    async def _stream_events(
+        self,
+        prompt: str,
+        route: Route,
+        callbacks: LLMCallbackHandler
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Streams the chosen path as ``astream_events`` v2 events so both paths share one consumer."""
+        config = {"callbacks": [callbacks]}
+        if route == Route.DIRECT:
+            async for chunk in self.llm.astream([HumanMessage(content=prompt)], config=config):
+                yield {"event": "on_chat_model_stream", "name": "direct", "data": {"chunk": chunk}}
+            return
+
+        async for agent_event in self.agent_executor.astream_events({"input": prompt}, config=config, version="v2"):
+            yield agent_event
+
+    def retrieval_stats(self) -> Dict[str, Any]:
+        return self.vector_db_service.retrieval_stats()
+
+    def context_stats(self) -> Dict[str, Any]:
+        requests = self.context_usage["requests"]
+        return {
+            **self.context_usage,
+            "max_tokens": self.context_packer.max_tokens,
+            "avg_context_tokens": round(self.context_usage["context_tokens"] / requests, 1) if requests else 0,
+            "avg_tokens_saved": round(self.context_usage["tokens_saved"] / requests, 1) if requests else 0
+        }
+
+    def answer_cache_stats(self) -> Dict[str, Any]:
+        if self.answer_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.answer_cache.stats()}
+
+    def _lookup_answer(self, question: str, query_embedding: List[float], relevant_docs: List[Dict[str, Any]]):
+        # A question about keeping something can embed close to the plain
+        # question it mentions, so only an exact match may answer it.
+        cached = self.answer_cache.lookup(
+            question,
+            query_embedding,
+            AnswerCache.fingerprint(relevant_docs),
+            semantic=not self.intent_router.mentions_notes(question)
+        )
+        count_cache("answer", int(cached is not None), int(cached is None))
+        return cached
+
+    def _is_cacheable(self, question: str) -> bool:
+        # Requests that ask for a tool (e.g. create_note) have side effects and
+        # must reach the agent every time, whatever the router setting.
+        return self.answer_cache is not None and not self.intent_router.wants_tool(question)
+
+    def _cache_answer(self, question: str, query_embedding: List[float], answer: str, relevant_docs: List[Dict[str, Any]]):
+        self.answer_cache.store(
+            question=question,
+            embedding=query_embedding,
+            answer=answer,
+            context_fingerprint=AnswerCache.fingerprint(relevant_docs),
+            file_ids={str(doc["file_id"]) for doc in relevant_docs}
+        )
+
+    async def _retrieve(
+        self,
+        question: str,
+        file_id: Optional[int],
+        max_chunks: Optional[int],
+        query_embedding: Optional[List[float]] = None,
+        section: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        if max_chunks is None:
+            max_chunks = settings.MAX_CONTEXT_CHUNKS
+
+        return await self.vector_db_service.similarity_search_with_scores(
+            query=question,
+            k=max_chunks,
+            file_id=file_id,
+            query_embedding=query_embedding,
+            section=section
+        )
+
+    def _build_prompt(self, question: str, relevant_docs: List[Dict[str, Any]], route: Route) -> Tuple[str, PackedContext]:
+        packed = self._build_context(relevant_docs)
+        template = self.direct_prompt_template if route == Route.DIRECT else self.prompt_template
+        prompt = template.format(
+            context=packed.text,
+            question=question
+        )
+        return prompt, packed
     
-    async def generate_llm_response(self, prompt: str) -> str:
+    async def generate_llm_response(self, prompt: str, callbacks: Optional[List[Any]] = None) -> str:
         try:
             messages = [HumanMessage(content=prompt)]
-            response = await self.llm.ainvoke(messages)
+            response = await self.llm.ainvoke(messages, config={"callbacks": callbacks or []})
             return response.content.strip()
         except Exception as e:
             raise Exception(f"Error when generating LLM response: {str(e)}")
     
-    def _build_context(self, relevant_docs: List[Dict[str, Any]]) -> str:
-        context_parts = []
-        for i, doc in enumerate(relevant_docs, 1):
-            context_parts.append(
-                f"Fuente {i}:\n{doc['content']}\n"
-            )
-        context = "\n".join(context_parts)
-        print('CONTEXT', context)
-        return context
\ No newline at end of file
+    def _build_context(self, relevant_docs: List[Dict[str, Any]]) -> PackedContext:
+        packed = self.context_packer.pack(relevant_docs)
+        self.context_usage["requests"] += 1
+        self.context_usage["context_tokens"] += packed.tokens
+        self.context_usage["tokens_saved"] += packed.tokens_saved
+        count_tokens("context", packed.tokens)
+        debug_log('CONTEXT', packed.text)
+        return packed
@@ -0,0 +1,62 @@
+from functools import lru_cache
+from typing import List, Optional
+import os
+import time
+import numpy as np
+
+
+class CrossEncoderReranker:
+    """Scores (query, passage) pairs with a cross-encoder exported to ONNX, on CPU.
+
+    ``model_dir`` must contain ``model.onnx`` and the Hugging Face ``tokenizer.json``
+    (e.g. an ONNX export of ms-marco-MiniLM-L-6-v2 or bge-reranker-base).
+    """
+
+    def __init__(self, model_dir: str, batch_size: int = 16, max_length: int = 512, threads: int = 0):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        self.model_dir = model_dir
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, "model.onnx"),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def score(self, query: str, passages: List[str], deadline: Optional[float] = None) -> Optional[List[float]]:
+        """Returns one relevance score per passage, or None if ``deadline`` (perf_counter) passes between batches."""
+        scores: List[float] = []
+        for start in range(0, len(passages), self.batch_size):
+            if deadline is not None and time.perf_counter() > deadline:
+                return None
+            batch = passages[start:start + self.batch_size]
+            encodings = self.tokenizer.encode_batch([(query, passage) for passage in batch])
+            inputs = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            logits = self.session.run(None, {name: value for name, value in inputs.items() if name in self.input_names})[0]
+            # Single-logit models output relevance directly; two-class models put it last.
+            scores.extend(logits[:, -1].astype(float).tolist() if logits.ndim == 2 else logits.astype(float).tolist())
+        return scores
+
+
+@lru_cache(maxsize=None)
+def get_reranker(model_dir: str, batch_size: int, max_length: int, threads: int) -> Optional[CrossEncoderReranker]:
+    """Loads the reranker once per process; returns None when the model cannot be loaded."""
+    try:
+        return CrossEncoderReranker(model_dir, batch_size=batch_size, max_length=max_length, threads=threads)
+    except Exception as e:
+        print(f"Warning: reranker unavailable, using vector order: {e}")
+        return None
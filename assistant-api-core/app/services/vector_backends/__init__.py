@@ -0,0 +1,27 @@
+import os
+from ...config.settings import settings
+from .base import VectorBackend, QueryResult, StoredChunk
+
+
+def create_vector_backend() -> VectorBackend:
+    """Builds the backend selected by VECTOR_BACKEND; only that backend's dependencies are imported."""
+    backend = settings.VECTOR_BACKEND.lower()
+    if backend == "chroma":
+        from .chroma import ChromaBackend
+        return ChromaBackend(
+            mode=settings.VECTOR_DB_MODE,
+            path=settings.CHROMA_DB_PATH,
+            collection_name=settings.CHROMA_COLLECTION_NAME,
+            host=settings.CHROMA_HOST,
+            port=settings.CHROMA_PORT,
+            ssl=settings.CHROMA_SSL
+        )
+    if backend == "numpy":
+        from .numpy_backend import NumpyBackend
+        collection = settings.CHROMA_COLLECTION_NAME
+        return NumpyBackend(
+            os.path.join(settings.NUMPY_INDEX_PATH, collection),
+            storage=settings.NUMPY_VECTOR_STORAGE_BY_COLLECTION.get(collection, settings.NUMPY_VECTOR_STORAGE),
+            rescore_multiplier=settings.NUMPY_RESCORE_MULTIPLIER
+        )
+    raise ValueError(f"Unsupported VECTOR_BACKEND {settings.VECTOR_BACKEND!r}, use 'chroma' or 'numpy'")
@@ -0,0 +1,79 @@
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+
+# (document, metadata, id, relevance score), best first
+QueryResult = Tuple[str, Dict[str, Any], str, float]
+# (id, document, metadata)
+StoredChunk = Tuple[str, str, Dict[str, Any]]
+
+
+class VectorBackend(ABC):
+    """Storage and nearest-neighbour search for chunk vectors used by VectorDBService.
+
+    ``where`` filters are equality matches on metadata fields, e.g. ``{"file_id": "42"}``;
+    with several fields all of them must match.
+    All methods are async so backends can do network I/O or push CPU work to a thread.
+    ``shared`` backends may be written by other hosts, so local derived state
+    such as the BM25 index has to be synced from them.
+    """
+
+    shared = False
+
+    async def connect(self) -> None:
+        """Opens connections or files; safe to call more than once."""
+
+    async def close(self) -> None:
+        """Releases connections, file handles and mappings."""
+
+    @abstractmethod
+    async def count(self) -> int:
+        ...
+
+    @abstractmethod
+    async def upsert(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ) -> None:
+        ...
+
+    @abstractmethod
+    async def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[StoredChunk]:
+        ...
+
+    async def ids(self, page_size: int = 1000) -> List[str]:
+        """Every stored id; backends override this to skip documents and metadata."""
+        ids: List[str] = []
+        while page := await self.get(limit=page_size, offset=len(ids)):
+            ids.extend(doc_id for doc_id, _, _ in page)
+        return ids
+
+    @abstractmethod
+    async def update_metadata(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, ids: List[str]) -> None:
+        ...
+
+    @abstractmethod
+    async def query(self, embedding: List[float], k: int, where: Optional[Dict[str, Any]] = None) -> List[QueryResult]:
+        ...
+
+    async def query_many(
+        self,
+        embeddings: List[List[float]],
+        k: int,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[List[QueryResult]]:
+        """Results for several query vectors; backends override this with a single lookup."""
+        return list(await asyncio.gather(*(self.query(embedding, k, where) for embedding in embeddings)))
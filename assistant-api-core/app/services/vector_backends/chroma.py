@@ -0,0 +1,145 @@
+from typing import List, Dict, Any, Optional
+import asyncio
+import math
+import os
+import chromadb
+from chromadb.config import Settings as ChromaSettings
+from .base import VectorBackend, QueryResult, StoredChunk
+
+
+class ChromaBackend(VectorBackend):
+    """Chroma collection, either embedded on local disk or on a Chroma server over HTTP."""
+
+    def __init__(self, mode: str, path: str, collection_name: str, host: str, port: int, ssl: bool):
+        mode = mode.lower()
+        if mode not in ("embedded", "http"):
+            raise ValueError(f"Unsupported VECTOR_DB_MODE {mode!r}, use 'embedded' or 'http'")
+
+        self.mode = mode
+        self.shared = mode == "http"
+        self.collection_name = collection_name
+        self.host = host
+        self.port = port
+        self.ssl = ssl
+        self.client = None
+        self.collection = None
+        self._connect_lock = asyncio.Lock()
+
+        if mode == "embedded":
+            # An embedded store must only be opened by one process; use
+            # VECTOR_DB_MODE=http to run several workers or replicas.
+            os.makedirs(path, exist_ok=True)
+            self.client = chromadb.PersistentClient(
+                path=path,
+                settings=ChromaSettings(
+                    anonymized_telemetry=False,
+                    allow_reset=True
+                )
+            )
+            self.collection = self.client.get_or_create_collection(
+                name=collection_name,
+                embedding_function=None
+            )
+
+    async def connect(self) -> None:
+        if self.collection is not None:
+            return
+        async with self._connect_lock:
+            if self.collection is not None:
+                return
+            # One AsyncHttpClient per process keeps a pool of keep-alive
+            # connections to the Chroma server.
+            self.client = await chromadb.AsyncHttpClient(
+                host=self.host,
+                port=self.port,
+                ssl=self.ssl,
+                settings=ChromaSettings(anonymized_telemetry=False)
+            )
+            self.collection = await self.client.get_or_create_collection(
+                name=self.collection_name,
+                embedding_function=None
+            )
+
+    async def _call(self, method: str, **kwargs) -> Any:
+        """Runs a collection method without blocking the event loop in either mode."""
+        await self.connect()
+        if self.mode == "http":
+            return await getattr(self.collection, method)(**kwargs)
+        return await asyncio.to_thread(getattr(self.collection, method), **kwargs)
+
+    @staticmethod
+    def _where(where: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        # Chroma only accepts one field per filter dict, several are combined with $and.
+        if where and len(where) > 1:
+            return {"$and": [{field: value} for field, value in where.items()]}
+        return where or None
+
+    async def count(self) -> int:
+        return await self._call("count")
+
+    async def upsert(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ) -> None:
+        await self._call("upsert", ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    async def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[StoredChunk]:
+        result = await self._call(
+            "get",
+            ids=ids,
+            where=self._where(where),
+            limit=limit,
+            offset=offset or None,
+            include=["documents", "metadatas"]
+        )
+        return [
+            (doc_id, document or "", metadata or {})
+            for doc_id, document, metadata in zip(result["ids"], result["documents"], result["metadatas"])
+        ]
+
+    async def ids(self, page_size: int = 1000) -> List[str]:
+        return (await self._call("get", include=[]))["ids"]
+
+    async def update_metadata(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        await self._call("update", ids=ids, metadatas=metadatas)
+
+    async def delete(self, ids: List[str]) -> None:
+        await self._call("delete", ids=ids)
+
+    async def query(self, embedding: List[float], k: int, where: Optional[Dict[str, Any]] = None) -> List[QueryResult]:
+        return (await self.query_many([embedding], k, where))[0]
+
+    async def query_many(
+        self,
+        embeddings: List[List[float]],
+        k: int,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[List[QueryResult]]:
+        if not embeddings:
+            return []
+        result = await self._call(
+            "query",
+            query_embeddings=embeddings,
+            n_results=k,
+            where=self._where(where),
+            include=["documents", "metadatas", "distances"]
+        )
+        return [
+            [
+                # Same L2 relevance scale langchain_chroma reported before.
+                (document or "", metadata or {}, doc_id, 1.0 - distance / math.sqrt(2))
+                for document, metadata, doc_id, distance in zip(documents, metadatas, ids, distances)
+            ]
+            for documents, metadatas, ids, distances in zip(
+                result["documents"], result["metadatas"], result["ids"], result["distances"]
+            )
+        ]
@@ -0,0 +1,413 @@
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple, Union
+import asyncio
+import json
+import math
+import os
+import sqlite3
+import threading
+import numpy as np
+from .base import VectorBackend, QueryResult, StoredChunk
+
+
+class NumpyBackend(VectorBackend):
+    """In-process exact search over a memory-mapped float32 matrix.
+
+    Row ``i`` of ``vectors.f32`` holds the L2-normalised embedding of chunk row
+    ``i``; ``file_codes.i32`` and ``alive.u8`` are columnar arrays used to mask
+    rows by ``file_id`` and deletion. Documents, full metadata and the row
+    allocator live in SQLite, which also resolves ``section_key`` filters through
+    an index on that metadata field. Every process maps the same files with a shared
+    mapping, so workers read one copy of the matrix from the OS page cache;
+    writers serialise on a SQLite ``BEGIN IMMEDIATE`` transaction and readers
+    remap when another process grows the files. Deleted rows are tombstoned,
+    not reused.
+
+    With ``storage`` set to ``float16`` or ``int8`` (symmetric, one scale per
+    vector) queries scan a compressed copy of the matrix instead and re-score
+    the best ``k * rescore_multiplier`` rows from the float32 file, so only
+    those rows of it are paged in. The format is fixed when the index is
+    created; reopening an existing index keeps its recorded format.
+    """
+
+    INITIAL_CAPACITY = 1024
+    FILTERABLE_FIELDS = ("file_id", "section_key")
+    STORAGE_FORMATS = ("float32", "float16", "int8")
+    # Compressed rows are widened to float32 in blocks of about this many
+    # values, small enough for the scratch block to stay in CPU cache.
+    SCAN_BLOCK_VALUES = 2 ** 18
+    # Queries scored together per pass over the matrix in query_many.
+    QUERY_BLOCK = 32
+
+    def __init__(self, path: str, storage: str = "float32", rescore_multiplier: int = 4):
+        if storage not in self.STORAGE_FORMATS:
+            raise ValueError(f"Unsupported vector storage {storage!r}, use one of {self.STORAGE_FORMATS}")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.rescore_multiplier = max(1, rescore_multiplier)
+        self.vectors: Optional[np.memmap] = None
+        self.file_codes: Optional[np.memmap] = None
+        self.alive: Optional[np.memmap] = None
+        self.quantized: Optional[np.memmap] = None
+        self.scales: Optional[np.memmap] = None
+        self._mapped_capacity = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(path, "chunks.sqlite3"), check_same_thread=False, timeout=30, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS chunks (
+                row INTEGER PRIMARY KEY,
+                doc_id TEXT UNIQUE NOT NULL,
+                file_id TEXT NOT NULL,
+                document TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_chunks_file_id ON chunks (file_id)")
+        self._conn.execute("DROP INDEX IF EXISTS ix_chunks_section")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_chunks_section_key ON chunks (json_extract(metadata, '$.section_key'))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files (code INTEGER PRIMARY KEY, file_id TEXT UNIQUE NOT NULL)"
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS meta (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                dimensions INTEGER,
+                rows INTEGER NOT NULL,
+                capacity INTEGER NOT NULL,
+                storage TEXT NOT NULL DEFAULT 'float32'
+            )"""
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(meta)")}
+        if "storage" not in columns:
+            # Indexes created before compressed storage are float32.
+            self._conn.execute("ALTER TABLE meta ADD COLUMN storage TEXT NOT NULL DEFAULT 'float32'")
+        self._conn.execute(
+            "INSERT OR IGNORE INTO meta (id, dimensions, rows, capacity, storage) VALUES (0, NULL, 0, 0, ?)",
+            (storage,)
+        )
+        self.storage = self._conn.execute("SELECT storage FROM meta WHERE id = 0").fetchone()[0]
+        if self.storage != storage:
+            print(f"Vector index {path} uses {self.storage} storage, ignoring requested {storage}")
+
+    # -- storage -----------------------------------------------------------
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _meta(self) -> Tuple[Optional[int], int, int]:
+        return self._conn.execute("SELECT dimensions, rows, capacity FROM meta WHERE id = 0").fetchone()
+
+    def _layout(self, dimensions: int) -> Dict[str, Tuple[str, Any, Tuple[int, ...]]]:
+        """Array attribute -> (file name, dtype, row shape) for this index's storage format."""
+        layout = {
+            "vectors": ("vectors.f32", np.float32, (dimensions,)),
+            "file_codes": ("file_codes.i32", np.int32, ()),
+            "alive": ("alive.u8", np.uint8, ()),
+        }
+        if self.storage == "float16":
+            layout["quantized"] = ("quantized.f16", np.float16, (dimensions,))
+        elif self.storage == "int8":
+            layout["quantized"] = ("quantized.i8", np.int8, (dimensions,))
+            layout["scales"] = ("scales.f32", np.float32, ())
+        return layout
+
+    def _remap(self) -> int:
+        """Maps the arrays at the current capacity and returns the number of allocated rows."""
+        dimensions, rows, capacity = self._meta()
+        if capacity and capacity != self._mapped_capacity:
+            for attribute, (name, dtype, shape) in self._layout(dimensions).items():
+                setattr(self, attribute, np.memmap(self._file(name), dtype=dtype, mode="r+", shape=(capacity, *shape)))
+            self._mapped_capacity = capacity
+        return rows
+
+    def _grow(self, needed: int, dimensions: int, capacity: int) -> None:
+        new_capacity = max(capacity, self.INITIAL_CAPACITY)
+        while new_capacity < needed:
+            new_capacity *= 2
+        for name, dtype, shape in self._layout(dimensions).values():
+            row_bytes = np.dtype(dtype).itemsize * int(np.prod(shape))
+            # Extending the file zero-fills the new rows; existing pages stay in place.
+            with open(self._file(name), "ab") as f:
+                f.truncate(new_capacity * row_bytes)
+        self._conn.execute("UPDATE meta SET capacity = ?, dimensions = ? WHERE id = 0", (new_capacity, dimensions))
+
+    @contextmanager
+    def _transaction(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _file_code(self, file_id: str, create: bool) -> Optional[int]:
+        if create:
+            self._conn.execute("INSERT OR IGNORE INTO files (file_id) VALUES (?)", (file_id,))
+        row = self._conn.execute("SELECT code FROM files WHERE file_id = ?", (file_id,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    @staticmethod
+    def quantize_int8(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Symmetric int8 codes and the per-row scale that maps them back to floats."""
+        scales = np.abs(matrix).max(axis=1) / 127
+        scales[scales == 0] = 1
+        codes = np.rint(matrix / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def _scan(self, matrix: np.ndarray, query: np.ndarray, rows: Union[int, np.ndarray]) -> np.ndarray:
+        """Dot products of ``query`` (a vector or a dimensions x n matrix) with the first ``rows`` rows of ``matrix``, or with the listed rows.
+
+        Compressed rows are widened to float32 one block at a time.
+        """
+        prefix = isinstance(rows, int)
+        if prefix and matrix.dtype == np.float32:
+            return matrix[:rows] @ query
+        count = rows if prefix else len(rows)
+        block_rows = max(256, self.SCAN_BLOCK_VALUES // matrix.shape[1])
+        scores = np.empty((count, *query.shape[1:]), dtype=np.float32)
+        for start in range(0, count, block_rows):
+            end = min(start + block_rows, count)
+            block = matrix[start:end] if prefix else matrix[rows[start:end]]
+            scores[start:end] = block.astype(np.float32, copy=False) @ query
+        return scores
+
+    def _check_where(self, where: Optional[Dict[str, Any]]) -> Tuple[Optional[str], Optional[str]]:
+        """Returns the (file_id, section_key) filter values, None where a field is not filtered."""
+        if not where:
+            return None, None
+        unsupported = set(where) - set(self.FILTERABLE_FIELDS)
+        if unsupported:
+            raise ValueError(f"NumpyBackend can only filter on {self.FILTERABLE_FIELDS}, got {sorted(unsupported)}")
+        file_id = str(where["file_id"]) if "file_id" in where else None
+        return file_id, where.get("section_key")
+
+    def _section_rows(self, section: str, file_id: Optional[str]) -> np.ndarray:
+        sql = "SELECT row FROM chunks WHERE json_extract(metadata, '$.section_key') = ?"
+        params = [section]
+        if file_id is not None:
+            sql += " AND file_id = ?"
+            params.append(file_id)
+        return np.fromiter((row for (row,) in self._conn.execute(sql, params)), dtype=np.int64)
+
+    # -- sync implementations (run in a worker thread) ----------------------
+
+    def _upsert(self, ids, embeddings, documents, metadatas) -> None:
+        matrix = self._normalize(np.asarray(embeddings, dtype=np.float32))
+        # Later duplicates of an id win, as with a sequence of upserts.
+        latest = {doc_id: i for i, doc_id in enumerate(ids)}
+
+        with self._lock, self._transaction():
+            dimensions, rows, capacity = self._meta()
+            if dimensions is not None and matrix.shape[1] != dimensions:
+                raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match index dimension {dimensions}")
+
+            existing = dict(self._conn.execute(
+                f"SELECT doc_id, row FROM chunks WHERE doc_id IN ({','.join('?' * len(latest))})",
+                list(latest)
+            ).fetchall()) if latest else {}
+            new_ids = [doc_id for doc_id in latest if doc_id not in existing]
+            assigned = {**existing, **{doc_id: rows + i for i, doc_id in enumerate(new_ids)}}
+
+            if rows + len(new_ids) > capacity or dimensions is None:
+                self._grow(rows + len(new_ids), matrix.shape[1], capacity)
+            self._remap()
+            if self.storage == "int8":
+                codes, scales = self.quantize_int8(matrix)
+
+            records = []
+            for doc_id, i in latest.items():
+                row = assigned[doc_id]
+                file_id = str(metadatas[i].get("file_id", ""))
+                self.vectors[row] = matrix[i]
+                if self.storage == "float16":
+                    self.quantized[row] = matrix[i]
+                elif self.storage == "int8":
+                    self.quantized[row] = codes[i]
+                    self.scales[row] = scales[i]
+                self.file_codes[row] = self._file_code(file_id, create=True)
+                self.alive[row] = 1
+                records.append((row, doc_id, file_id, documents[i], json.dumps(metadatas[i], ensure_ascii=False)))
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (row, doc_id, file_id, document, metadata) VALUES (?, ?, ?, ?, ?)",
+                records
+            )
+            self._conn.execute("UPDATE meta SET rows = ? WHERE id = 0", (rows + len(new_ids),))
+
+    def _get(self, ids, where, limit, offset) -> List[StoredChunk]:
+        file_id, section = self._check_where(where)
+        sql = "SELECT doc_id, document, metadata FROM chunks"
+        clauses, params = [], []
+        if ids is not None:
+            if not ids:
+                return []
+            clauses.append(f"doc_id IN ({','.join('?' * len(ids))})")
+            params.extend(ids)
+        if file_id is not None:
+            clauses.append("file_id = ?")
+            params.append(file_id)
+        if section is not None:
+            clauses.append("json_extract(metadata, '$.section_key') = ?")
+            params.append(section)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY row LIMIT ? OFFSET ?"
+        params.extend([limit if limit is not None else -1, offset])
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [(doc_id, document, json.loads(metadata)) for doc_id, document, metadata in rows]
+
+    def _update_metadata(self, ids, metadatas) -> None:
+        with self._lock, self._transaction():
+            self._conn.executemany(
+                "UPDATE chunks SET metadata = ? WHERE doc_id = ?",
+                [(json.dumps(metadata, ensure_ascii=False), doc_id) for doc_id, metadata in zip(ids, metadatas)]
+            )
+
+    def _delete(self, ids) -> None:
+        with self._lock, self._transaction():
+            placeholders = ",".join("?" * len(ids))
+            rows = [row for (row,) in self._conn.execute(
+                f"SELECT row FROM chunks WHERE doc_id IN ({placeholders})", ids
+            ).fetchall()]
+            if rows:
+                self._remap()
+                self.alive[rows] = 0
+                self._conn.execute(f"DELETE FROM chunks WHERE doc_id IN ({placeholders})", ids)
+
+    def _query_many(self, embeddings, k, where) -> List[List[QueryResult]]:
+        file_id, section = self._check_where(where)
+        with self._lock:
+            rows = self._remap()
+            code = self._file_code(file_id, create=False) if file_id is not None else None
+            section_rows = self._section_rows(section, file_id) if section is not None else None
+            # Keep references so a concurrent remap cannot swap arrays mid-query.
+            vectors, alive, file_codes = self.vectors, self.alive, self.file_codes
+            quantized, scales = self.quantized, self.scales
+        if not rows or (file_id is not None and code is None):
+            return [[] for _ in embeddings]
+
+        queries = self._normalize(np.asarray(embeddings, dtype=np.float32))
+        mask = alive[:rows] == 1
+        if code is not None:
+            mask &= file_codes[:rows] == code
+        if section_rows is not None:
+            in_section = np.zeros(rows, dtype=bool)
+            in_section[section_rows[section_rows < rows]] = True
+            mask &= in_section
+        candidates = np.flatnonzero(mask)
+        if not len(candidates):
+            return [[] for _ in embeddings]
+        if code is None and section_rows is None:
+            # Scanning the whole prefix is faster than gathering nearly every row.
+            scan_rows = rows
+            select = candidates
+        else:
+            # A file or section is a small slice of the index: only its rows are scored.
+            scan_rows = candidates
+            select = slice(None)
+
+        ranked: List[List[Tuple[int, float]]] = []
+        for start in range(0, len(queries), self.QUERY_BLOCK):
+            block = queries[start:start + self.QUERY_BLOCK]
+            # One pass over the matrix scores the whole block of queries.
+            scanned = self._scan(vectors if self.storage == "float32" else quantized, block.T, scan_rows)[select]
+            if self.storage == "int8":
+                scanned *= scales[candidates][:, None]
+            for j, query in enumerate(block):
+                ranked.append(self._top_k(scanned[:, j], candidates, query, k, vectors))
+
+        top_rows = sorted({row for rows_scores in ranked for row, _ in rows_scores})
+        stored = {}
+        with self._lock:
+            for start in range(0, len(top_rows), 500):
+                batch = top_rows[start:start + 500]
+                for row, doc_id, document, metadata in self._conn.execute(
+                    f"SELECT row, doc_id, document, metadata FROM chunks WHERE row IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall():
+                    stored[row] = (doc_id, document, json.loads(metadata))
+
+        results = []
+        for rows_scores in ranked:
+            results.append([])
+            for row, similarity in rows_scores:
+                if row not in stored:
+                    continue
+                doc_id, document, metadata = stored[row]
+                # Reported on the same scale as ChromaBackend (1 - squared L2 / sqrt(2)
+                # for unit vectors) so scores do not change with the backend.
+                score = 1.0 - (2.0 - 2.0 * similarity) / math.sqrt(2)
+                results[-1].append((document, dict(metadata), doc_id, score))
+        return results
+
+    def _top_k(
+        self,
+        scores: np.ndarray,
+        candidates: np.ndarray,
+        query: np.ndarray,
+        k: int,
+        vectors: np.ndarray
+    ) -> List[Tuple[int, float]]:
+        """Best (row, cosine) pairs; compressed scores only pick a shortlist that is re-scored in float32."""
+        if self.storage != "float32":
+            shortlist = min(len(candidates), k * self.rescore_multiplier)
+            candidates = candidates[np.argpartition(-scores, shortlist - 1)[:shortlist]]
+            scores = vectors[candidates] @ query
+
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(candidates[i]), float(scores[i])) for i in top]
+
+    # -- VectorBackend -----------------------------------------------------
+
+    async def count(self) -> int:
+        def count() -> int:
+            with self._lock:
+                return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        return await asyncio.to_thread(count)
+
+    async def upsert(self, ids, embeddings, documents, metadatas) -> None:
+        if ids:
+            await asyncio.to_thread(self._upsert, ids, embeddings, documents, metadatas)
+
+    async def get(self, ids=None, where=None, limit=None, offset=0) -> List[StoredChunk]:
+        return await asyncio.to_thread(self._get, ids, where, limit, offset)
+
+    async def update_metadata(self, ids, metadatas) -> None:
+        if ids:
+            await asyncio.to_thread(self._update_metadata, ids, metadatas)
+
+    async def delete(self, ids) -> None:
+        if ids:
+            await asyncio.to_thread(self._delete, ids)
+
+    async def query(self, embedding, k, where=None) -> List[QueryResult]:
+        return (await self.query_many([embedding], k, where))[0]
+
+    async def query_many(self, embeddings, k, where=None) -> List[List[QueryResult]]:
+        if not embeddings:
+            return []
+        return await asyncio.to_thread(self._query_many, embeddings, k, where)
+
+    async def close(self) -> None:
+        with self._lock:
+            for array in (self.vectors, self.file_codes, self.alive, self.quantized, self.scales):
+                if array is not None:
+                    array.flush()
+            self._conn.close()
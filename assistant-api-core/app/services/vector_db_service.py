@@ -1,75 +1,195 @@
-from typing import List, Dict, Any, Optional
-import chromadb
-from chromadb.config import Settings as ChromaSettings
-from langchain_chroma import Chroma
+from typing import List, Dict, Any, Optional, Tuple
 from langchain_openai.embeddings import OpenAIEmbeddings
-from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
 from ..config.settings import settings
+from .embedding_service import EmbeddingService
+from .chunk_service import section_key, section_metadata
+from .lexical_index import LexicalIndex
+from .reranker import CrossEncoderReranker, get_reranker
+from .vector_backends import VectorBackend, QueryResult, create_vector_backend
+from ..utils.metrics import LatencyStats
+import asyncio
+import hashlib
 import os
+import time
 
 class VectorDBService:
-    def __init__(self):
+    def __init__(
+        self,
+        embeddings: Optional[Embeddings] = None,
+        embedding_service: Optional[EmbeddingService] = None,
+        reranker: Optional[CrossEncoderReranker] = None,
+        backend: Optional[VectorBackend] = None
+    ):
         os.makedirs(settings.CHROMA_DB_PATH, exist_ok=True)
         
-        self.embeddings = OpenAIEmbeddings(
+        if embeddings is None and embedding_service is not None:
+            embeddings = embedding_service.embeddings
+
+        self.embeddings = embeddings or OpenAIEmbeddings(
             openai_api_key=settings.OPENAI_API_KEY,
             model=settings.EMBEDDING_MODEL,
-            dimensions=settings.EMBEDDING_DIMENSIONS
+            dimensions=settings.EMBEDDING_DIMENSIONS,
+            check_embedding_ctx_length=settings.EMBEDDING_CHECK_CTX_LENGTH
         )
+        self.embedding_service = embedding_service or EmbeddingService(embeddings=self.embeddings)
         
-        self.chroma_client = chromadb.PersistentClient(
-            path=settings.CHROMA_DB_PATH,
-            settings=ChromaSettings(
-                anonymized_telemetry=False,
-                allow_reset=True
+        self.backend = backend or create_vector_backend()
+        self._connected = False
+        self._connect_lock = asyncio.Lock()
+        self._lexical_sync_task: Optional[asyncio.Task] = None
+
+        self.lexical_index = None
+        if settings.HYBRID_SEARCH_ENABLED:
+            self.lexical_index = LexicalIndex(
+                os.path.join(settings.CHROMA_DB_PATH, f"{settings.CHROMA_COLLECTION_NAME}_bm25.sqlite3")
             )
-        )
-        
-        self.vector_store = Chroma(
-            client=self.chroma_client,
-            collection_name=settings.CHROMA_COLLECTION_NAME,
-            embedding_function=self.embeddings,
-            persist_directory=settings.CHROMA_DB_PATH
-        )
+
+        if reranker is None and settings.RERANKER_ENABLED:
+            reranker = get_reranker(
+                settings.RERANKER_MODEL_PATH,
+                settings.RERANK_BATCH_SIZE,
+                settings.RERANK_MAX_LENGTH,
+                settings.RERANK_THREADS
+            )
+        self.reranker = reranker
+        self.rerank_latency = LatencyStats()
+        self.rerank_fallbacks = 0
+
+    async def connect(self) -> None:
+        """Connects the vector backend and syncs the lexical index with it.
+
+        Called by the service container at startup; every index access also
+        calls it, so a service used outside the app connects on first use.
+
+        The lexical index is a SQLite file local to this host. With a shared
+        backend, chunks written by other replicas only reach it through a
+        sync every LEXICAL_SYNC_INTERVAL_SECONDS, so they become lexically
+        searchable here with that delay.
+        """
+        if self._connected:
+            return
+        async with self._connect_lock:
+            if self._connected:
+                return
+            await self.backend.connect()
+            self._connected = True
+
+            if self.lexical_index is not None:
+                await self.sync_lexical_index()
+                if self.backend.shared and settings.LEXICAL_SYNC_INTERVAL_SECONDS > 0:
+                    self._lexical_sync_task = asyncio.create_task(self._sync_lexical_periodically())
+
+    async def close(self) -> None:
+        if self._lexical_sync_task is not None:
+            self._lexical_sync_task.cancel()
+            await asyncio.gather(self._lexical_sync_task, return_exceptions=True)
+            self._lexical_sync_task = None
+        await self.backend.close()
+        if self.lexical_index is not None:
+            self.lexical_index.close()
+
+    async def sync_lexical_index(self, page_size: int = 1000) -> Tuple[int, int]:
+        """Indexes stored chunks missing from the lexical index and drops ids no longer stored.
+
+        Returns (added, removed).
+        """
+        await self.connect()
+        # Indexed ids are read first: writers store a chunk before indexing it
+        # and delete it before unindexing it, so a chunk written meanwhile is
+        # never removed by mistake.
+        indexed = await asyncio.to_thread(self.lexical_index.doc_ids)
+        stored = set(await self.backend.ids(page_size))
+
+        removed = list(indexed - stored)
+        if removed:
+            await asyncio.to_thread(self.lexical_index.remove, removed)
+
+        missing = list(stored - indexed)
+        for start in range(0, len(missing), page_size):
+            page = await self.backend.get(ids=missing[start:start + page_size])
+            await asyncio.to_thread(
+                self.lexical_index.add,
+                ids=[doc_id for doc_id, _, _ in page],
+                texts=[document for _, document, _ in page],
+                file_ids=[str(metadata.get("file_id", "")) for _, _, metadata in page]
+            )
+        return len(missing), len(removed)
+
+    async def _sync_lexical_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(settings.LEXICAL_SYNC_INTERVAL_SECONDS)
+            try:
+                await self.sync_lexical_index()
+            except Exception as e:
+                print(f"Warning: lexical index sync failed: {e}")
     
     async def store_document_chunks(self, file_id: int, chunks_data: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            documents = []
-            for i, chunk in enumerate(chunks_data['chunks']):
-                if chunk.strip():
-                    doc = Document(
-                        page_content=chunk.strip(),
-                        metadata={
-                            "file_id": str(file_id),
-                            "chunk_index": i,
-                            "chunk_length": len(chunk.strip()),
-                            "source": f"file_{file_id}_chunk_{i}"
-                        }
-                    )
-                    documents.append(doc)
-            
-            if documents:
-                doc_ids = [f"file_{file_id}_chunk_{i}" for i in range(len(documents))]
-                
-                self.vector_store.add_documents(
-                    documents=documents,
-                    ids=doc_ids
+            embeddings = chunks_data.get('embeddings')
+            start_index = chunks_data.get('start_index', 0)
+            chunk_indexes = chunks_data.get('chunk_indexes') or range(start_index, start_index + len(chunks_data['chunks']))
+            indexed = [
+                (chunk_index, chunk.strip())
+                for chunk_index, chunk in zip(chunk_indexes, chunks_data['chunks'])
+                if chunk.strip()
+            ]
+            if embeddings is not None and len(embeddings) != len(indexed):
+                raise ValueError(
+                    f"Embedding count mismatch: got {len(embeddings)} vectors for {len(indexed)} chunks"
                 )
-                
-                return {
-                    "success": True,
-                    "message": f"Save {len(documents)} chunks in Chroma DB",
-                    "stored_chunks": len(documents),
-                    "file_id": file_id
-                }
-            else:
+
+            documents = []
+            doc_embeddings = []
+            seen_ids = set()
+            for i, (chunk_index, content) in enumerate(indexed):
+                metadata = self.chunk_metadata(file_id, chunk_index, content)
+                # Ids are content addressed, so a chunk repeated in the same
+                # document is stored once.
+                if metadata["source"] in seen_ids:
+                    continue
+                seen_ids.add(metadata["source"])
+                documents.append({"content": content, "metadata": metadata})
+                if embeddings is not None:
+                    doc_embeddings.append(embeddings[i])
+
+            if not documents:
                 return {
                     "success": False,
                     "message": "Dont have chunks to store",
                     "stored_chunks": 0,
                     "file_id": file_id
                 }
-                
+
+            doc_ids = [doc["metadata"]["source"] for doc in documents]
+
+            if embeddings is None:
+                doc_embeddings = await self.embedding_service.create_embeddings(
+                    [doc["content"] for doc in documents]
+                )
+
+            await self.add_embeddings(
+                ids=doc_ids,
+                embeddings=doc_embeddings,
+                documents=[doc["content"] for doc in documents],
+                metadatas=[doc["metadata"] for doc in documents]
+            )
+
+            if self.lexical_index is not None:
+                await asyncio.to_thread(
+                    self.lexical_index.add,
+                    ids=doc_ids,
+                    texts=[doc["content"] for doc in documents],
+                    file_ids=[str(file_id)] * len(documents)
+                )
+
+            return {
+                "success": True,
+                "message": f"Save {len(documents)} chunks in Chroma DB",
+                "stored_chunks": len(documents),
+                "file_id": file_id
+            }
+
         except Exception as e:
             return {
                 "success": False,
@@ -77,71 +197,259 @@ class VectorDBService:
                 "stored_chunks": 0,
                 "file_id": file_id
             }
-    
-    async def similarity_search(self, query: str, k: int = 5, file_id: Optional[int] = None) -> List[Dict[str, Any]]:
+
+    @staticmethod
+    def chunk_hash(content: str) -> str:
+        return hashlib.sha256(content.strip().encode("utf-8")).hexdigest()
+
+    def chunk_metadata(self, file_id: Any, chunk_index: int, content: str) -> Dict[str, Any]:
+        chunk_hash = self.chunk_hash(content)
+        return {
+            "file_id": str(file_id),
+            "chunk_index": chunk_index,
+            "chunk_length": len(content),
+            "chunk_hash": chunk_hash,
+            "source": f"file_{file_id}_{chunk_hash[:16]}",
+            # Derived from the content, so it stays in step with content-addressed ids.
+            **section_metadata(content)
+        }
+
+    @staticmethod
+    def _where(file_id: Optional[Any], section: Optional[str]) -> Optional[Dict[str, Any]]:
+        where = {}
+        if file_id is not None:
+            where["file_id"] = str(file_id)
+        if section is not None:
+            where["section_key"] = section_key(section)
+        return where or None
+
+    async def get_document_chunks(self, file_id: Any) -> Dict[str, List[Tuple[str, Dict[str, Any]]]]:
+        """Maps chunk hash to the (id, metadata) of every stored chunk of a file with that content.
+
+        Chunks written before hashes were stored in metadata are hashed from
+        their text; their ids are not content addressed, so the same text can
+        be stored under several ids.
+        """
+        await self.connect()
+        chunks: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+        for doc_id, document, metadata in await self.backend.get(where={"file_id": str(file_id)}):
+            chunk_hash = metadata.get("chunk_hash") or self.chunk_hash(document)
+            chunks.setdefault(chunk_hash, []).append((doc_id, metadata))
+        return chunks
+
+    async def update_chunk_metadata(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        if ids:
+            await self.connect()
+            await self.backend.update_metadata(ids, metadatas)
+
+    async def delete_chunks(self, ids: List[str]) -> None:
+        if ids:
+            await self.connect()
+            await self.backend.delete(ids)
+            if self.lexical_index is not None:
+                await asyncio.to_thread(self.lexical_index.remove, ids)
+
+    async def add_embeddings(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ) -> None:
+        if len(embeddings) != len(documents):
+            raise ValueError(
+                f"Embedding count mismatch: got {len(embeddings)} vectors for {len(documents)} chunks"
+            )
+
+        # Vectors were already computed by EmbeddingService, so write them
+        # straight into the index instead of letting the backend embed again.
+        await self.connect()
+        await self.backend.upsert(ids, embeddings, documents, metadatas)
+
+    async def similarity_search(
+        self,
+        query: str,
+        k: int = 5,
+        file_id: Optional[int] = None,
+        section: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
         try:
-            filter_dict = None
-            if file_id is not None:
-                filter_dict = {"file_id": str(file_id)}
+            filter_dict = self._where(file_id, section)
             
-            if filter_dict:
-                results = self.vector_store.similarity_search(
-                    query=query,
-                    k=k,
-                    filter=filter_dict
-                )
-            else:
-                results = self.vector_store.similarity_search(
-                    query=query,
-                    k=k
-                )
+            query_embedding = await self.embedding_service.embed_query(query)
+            results = await self._query(query_embedding, k, filter_dict)
             
             formatted_results = []
-            for doc in results:
+            for content, metadata, _, _ in results:
                 formatted_results.append({
-                    "content": doc.page_content,
-                    "metadata": doc.metadata,
-                    "file_id": doc.metadata.get("file_id"),
-                    "chunk_index": doc.metadata.get("chunk_index"),
-                    "source": doc.metadata.get("source")
+                    "content": content,
+                    "metadata": metadata,
+                    "file_id": metadata.get("file_id"),
+                    "chunk_index": metadata.get("chunk_index"),
+                    "source": metadata.get("source")
                 })
             
             return formatted_results
             
         except Exception as e:
             return []
+
+    async def _query(
+        self,
+        query_embedding: List[float],
+        k: int,
+        where: Optional[Dict[str, Any]]
+    ) -> List[QueryResult]:
+        """Nearest chunks as (content, metadata, id, relevance score) tuples."""
+        await self.connect()
+        return await self.backend.query(query_embedding, k, where)
     
-    async def similarity_search_with_scores(self, query: str, k: int = 5, file_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    async def similarity_search_with_scores(
+        self,
+        query: str,
+        k: int = 5,
+        file_id: Optional[int] = None,
+        query_embedding: Optional[List[float]] = None,
+        section: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
 
         try:
-            filter_dict = None
-            if file_id is not None:
-                filter_dict = {"file_id": str(file_id)}
-            
-            if filter_dict:
-                results = self.vector_store.similarity_search_with_score(
-                    query=query,
-                    k=k,
-                    filter=filter_dict
-                )
-            else:
-                results = self.vector_store.similarity_search_with_score(
-                    query=query,
-                    k=k
-                )
-            
-            formatted_results = []
-            for doc, score in results:
-                formatted_results.append({
-                    "content": doc.page_content,
-                    "metadata": doc.metadata,
-                    "similarity_score": float(score),
-                    "file_id": doc.metadata.get("file_id"),
-                    "chunk_index": doc.metadata.get("chunk_index"),
-                    "source": doc.metadata.get("source")
-                })
-            
-            return formatted_results
+            if query_embedding is None:
+                query_embedding = await self.embedding_service.embed_query(query)
+
+            (results,) = await self.similarity_search_many([query], [query_embedding], k, file_id, section)
+            return results
             
         except Exception as e:
-            return []
\ No newline at end of file
+            return []
+
+    async def similarity_search_many(
+        self,
+        queries: List[str],
+        query_embeddings: List[List[float]],
+        k: int = 5,
+        file_id: Optional[int] = None,
+        section: Optional[str] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Retrieval for several queries with one vector-index lookup; returns one result list per query.
+
+        ``section`` restricts results to chunks under that heading. It is compared
+        by ``section_key``, so case and heading markup do not matter and the heading
+        can be given as written in the file, accents included.
+        """
+        if not queries:
+            return []
+
+        filter_dict = self._where(file_id, section)
+
+        # With a reranker, over-fetch candidates and let it pick the top k.
+        candidates = k if self.reranker is None else max(k, settings.RERANK_CANDIDATES)
+        fetch_k = candidates if self.lexical_index is None else candidates * settings.HYBRID_CANDIDATES_MULTIPLIER
+        await self.connect()
+        vector_search = self.backend.query_many(query_embeddings, fetch_k, filter_dict)
+
+        if self.lexical_index is None:
+            results = [
+                [self._format_result(content, metadata, score) for content, metadata, _, score in vector_results]
+                for vector_results in await vector_search
+            ]
+        else:
+            vector_results, lexical_results = await asyncio.gather(
+                vector_search,
+                asyncio.to_thread(lambda: [self.lexical_index.search(query, fetch_k, file_id) for query in queries])
+            )
+            results = await asyncio.gather(*(
+                self._fuse_results(vector, lexical, candidates)
+                for vector, lexical in zip(vector_results, lexical_results)
+            ))
+            if section is not None:
+                # The lexical index only filters by file.
+                key = filter_dict["section_key"]
+                results = [
+                    [result for result in query_results if result["metadata"].get("section_key") == key]
+                    for query_results in results
+                ]
+
+        if self.reranker is not None:
+            results = await asyncio.gather(*(
+                self._rerank(query, query_results, k) for query, query_results in zip(queries, results)
+            ))
+        return list(results)
+
+    async def _rerank(self, query: str, results: List[Dict[str, Any]], k: int) -> List[Dict[str, Any]]:
+        """Reorders candidates by cross-encoder score, falling back to retrieval order past RERANK_TIMEOUT_MS."""
+        if len(results) <= 1:
+            return results[:k]
+
+        started = time.perf_counter()
+        deadline = started + settings.RERANK_TIMEOUT_MS / 1000
+        try:
+            scores = await asyncio.to_thread(
+                self.reranker.score, query, [result["content"] for result in results], deadline
+            )
+        except Exception as e:
+            print(f"Reranking failed, using retrieval order: {e}")
+            scores = None
+        self.rerank_latency.observe(time.perf_counter() - started)
+
+        if scores is None:
+            self.rerank_fallbacks += 1
+            return results[:k]
+
+        ranked = sorted(zip(scores, results), key=lambda item: item[0], reverse=True)[:k]
+        return [{**result, "rerank_score": score} for score, result in ranked]
+
+    def retrieval_stats(self) -> Dict[str, Any]:
+        return {
+            "hybrid_search": self.lexical_index is not None,
+            "reranker_enabled": self.reranker is not None,
+            "rerank": self.rerank_latency.snapshot(),
+            "rerank_fallbacks": self.rerank_fallbacks
+        }
+
+    async def _fuse_results(
+        self,
+        vector_results: List[QueryResult],
+        lexical_results: List[Tuple[str, float]],
+        k: int
+    ) -> List[Dict[str, Any]]:
+        found = {
+            doc_id: self._format_result(content, metadata, score)
+            for content, metadata, doc_id, score in vector_results
+        }
+        fused = reciprocal_rank_fusion(
+            [[doc_id for _, _, doc_id, _ in vector_results], [doc_id for doc_id, _ in lexical_results]],
+            settings.HYBRID_RRF_K
+        )[:k]
+
+        missing = [doc_id for doc_id, _ in fused if doc_id not in found]
+        if missing:
+            for doc_id, document, metadata in await self.backend.get(ids=missing):
+                found[doc_id] = self._format_result(document, metadata, None)
+
+        fused_results = []
+        for doc_id, fusion_score in fused:
+            if doc_id in found:
+                fused_results.append({**found[doc_id], "fusion_score": fusion_score})
+        return fused_results
+
+    @staticmethod
+    def _format_result(content: str, metadata: Dict[str, Any], score: Optional[float]) -> Dict[str, Any]:
+        # Chunks found only by the lexical index have no vector similarity.
+        return {
+            "content": content,
+            "metadata": metadata,
+            "similarity_score": float(score) if score is not None else None,
+            "file_id": metadata.get("file_id"),
+            "chunk_index": metadata.get("chunk_index"),
+            "source": metadata.get("source")
+        }
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Merges ranked id lists by summing 1 / (k + rank); ids ranked high in any list come first."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -1,12 +1,23 @@
 from pydantic import BaseModel, Field
 from langchain.tools import StructuredTool, tool
 from datetime import datetime
+from typing import Optional
 from ..config.settings import settings
-import requests
+import httpx
 import json
 
+STRAPI_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+
+# Shared client set by the service container at startup; without one each call opens its own.
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def configure_http_client(client: Optional[httpx.AsyncClient]):
+    global _http_client
+    _http_client = client
+
 @tool
-def create_note(note_data: str):
+async def create_note(note_data: str):
     """
     Creates a note in Strapi. Input must be a valid JSON string.
     
@@ -56,7 +67,11 @@ def create_note(note_data: str):
         }
     }
     
-    response = requests.post(url, json=payload, headers=headers)
+    if _http_client is not None:
+        response = await _http_client.post(url, json=payload, headers=headers)
+    else:
+        async with httpx.AsyncClient(timeout=STRAPI_TIMEOUT) as client:
+            response = await client.post(url, json=payload, headers=headers)
     
     if response.status_code not in (200, 201):
         return {"error": f"Error creating note: {response.status_code} {response.text}"}
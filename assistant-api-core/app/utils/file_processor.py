@@ -1,8 +1,11 @@
-import pandas as pd
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Iterator, List
 import re
 import csv
 
+NON_PRINTABLE_PATTERN = re.compile(r"[^\x20-\x7E\n]")
+SPACES_PATTERN = re.compile(r"[ \t]+")
+BLANK_LINES_PATTERN = re.compile(r"\n{2,}")
+
 class FileProcessor:
     
     async def read_txt_file(self, file_path: str) -> str:
@@ -15,11 +18,30 @@ class FileProcessor:
     
     async def read_csv_file(self, file_path: str) -> str:
         try:
-            df = pd.read_csv(file_path)
-            content = df.to_string(index=False)
+            with open(file_path, 'r', encoding='utf-8', newline='') as file:
+                content = file.read()
             return content
         except Exception as e:
             raise Exception(f"Error reading CSV file: {str(e)}")
+
+    def iter_csv_rows(self, file_path: str) -> Iterator[List[str]]:
+        """Parses the CSV once, yielding the header row and then each data row with cleaned values."""
+        return self.clean_csv_rows(self.iter_raw_csv_rows(file_path))
+
+    def iter_raw_csv_rows(self, file_path: str) -> Iterator[List[str]]:
+        try:
+            with open(file_path, 'r', encoding='utf-8', newline='') as file:
+                yield from csv.reader(file)
+        except Exception as e:
+            raise Exception(f"Error reading CSV file: {str(e)}")
+
+    def clean_csv_rows(self, rows: Iterable[List[str]]) -> Iterator[List[str]]:
+        for row in rows:
+            yield [self.clean_csv_value(value) for value in row]
+
+    def clean_csv_value(self, value: str) -> str:
+        value = NON_PRINTABLE_PATTERN.sub("", value.replace("\n", " "))
+        return SPACES_PATTERN.sub(" ", value).strip()
     
     async def read_file_content(self, file_path: str, file_type: str) -> str:
         content = ""
@@ -49,9 +71,71 @@ class FileProcessor:
             return {"exists": False}
     
     def clean_text_content(self, content: str, type: str) -> str:
-        content = re.sub(r"[^\x20-\x7E\n]", "", content)
-        content = re.sub(r"[ \t]+", " ", content)
-        content = re.sub(r"\n{2,}", "\n", content)
+        content = NON_PRINTABLE_PATTERN.sub("", content)
+        content = SPACES_PATTERN.sub(" ", content)
+        content = BLANK_LINES_PATTERN.sub("\n", content)
         content = content.strip()
 
         return content
+
+    def iter_file_content(self, file_path: str, file_type: str, block_size: int) -> Iterator[str]:
+        """Streams cleaned content in pieces of at most ``block_size`` characters.
+
+        Joining the pieces gives the same text as ``read_file_content``.
+        """
+        if file_type.lower() in ("txt", "csv"):
+            yield from self.iter_clean_txt_file(file_path, block_size)
+        else:
+            raise ValueError(f"Unsupported file type: {file_type}")
+
+    def iter_clean_txt_file(self, file_path: str, block_size: int) -> Iterator[str]:
+        return self.clean_lines(self.iter_raw_lines(file_path, block_size))
+
+    def iter_raw_lines(self, file_path: str, block_size: int) -> Iterator[str]:
+        """Yields the file's lines, splitting lines longer than ``block_size`` characters."""
+        try:
+            with open(file_path, 'r', encoding='utf-8') as file:
+                yield from iter(lambda: file.readline(block_size), "")
+        except Exception as e:
+            raise Exception(f"Error reading file: {str(e)}")
+
+    def clean_lines(self, pieces: Iterable[str]) -> Iterator[str]:
+        # Cleaning line by line is equivalent to clean_text_content: the
+        # character filters never cross a newline, and blank lines are what
+        # the newline collapse removes. Whitespace is held back until more
+        # content follows so the trailing strip() also matches.
+        started = False
+        pending = ""
+        line_has_content = False
+        for piece in pieces:
+            ends_line = piece.endswith("\n")
+            text = piece[:-1] if ends_line else piece
+            text = SPACES_PATTERN.sub(" ", NON_PRINTABLE_PATTERN.sub("", text))
+            if not started:
+                text = text.lstrip()
+            elif pending.endswith(" ") and text.startswith(" "):
+                text = text[1:]
+
+            if text:
+                started = True
+                line_has_content = True
+                content = text.rstrip(" ")
+                if content:
+                    yield pending + content
+                    pending = text[len(content):]
+                else:
+                    pending += text
+
+            if ends_line and line_has_content:
+                pending += "\n"
+                line_has_content = False
+
+    def read_preview(self, file_path: str, file_type: str, max_length: int = 500) -> str:
+        pieces = []
+        length = 0
+        for piece in self.iter_file_content(file_path, file_type, max_length):
+            pieces.append(piece)
+            length += len(piece)
+            if length > max_length:
+                break
+        return self.get_content_preview("".join(pieces).rstrip(), max_length)
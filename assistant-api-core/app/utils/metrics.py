@@ -0,0 +1,38 @@
+from collections import deque
+from typing import Dict
+import threading
+
+
+class LatencyStats:
+    """Rolling window of latency samples with percentile snapshots."""
+
+    def __init__(self, window: int = 1000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            samples = sorted(self._samples)
+            count = self.count
+
+        if not samples:
+            return {"count": count}
+
+        def percentile(p: float) -> float:
+            index = min(len(samples) - 1, max(0, round(p / 100 * len(samples)) - 1))
+            return round(samples[index] * 1000, 2)
+
+        return {
+            "count": count,
+            "avg_ms": round(sum(samples) / len(samples) * 1000, 2),
+            "p50_ms": percentile(50),
+            "p95_ms": percentile(95),
+            "p99_ms": percentile(99),
+            "max_ms": round(samples[-1] * 1000, 2)
+        }
@@ -0,0 +1,213 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from uuid import UUID
+import os
+import time
+
+from fastapi import Response
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from opentelemetry import trace
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess, REGISTRY
+
+from ..config.settings import settings
+
+tracer = trace.get_tracer("assistant-api")
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+STAGE_SECONDS = Histogram(
+    "assistant_stage_duration_seconds",
+    "Time spent per pipeline stage, observed once per chat request or ingested file",
+    ["pipeline", "stage"],
+    buckets=STAGE_BUCKETS
+)
+TOOL_SECONDS = Histogram(
+    "assistant_tool_duration_seconds",
+    "Agent tool call duration",
+    ["tool", "status"],
+    buckets=STAGE_BUCKETS
+)
+TOKENS = Counter(
+    "assistant_tokens_total",
+    "Tokens sent to embeddings (embedding), packed into prompts (context) and counted by the LLM (llm_input, llm_output)",
+    ["kind"]
+)
+CACHE_LOOKUPS = Counter(
+    "assistant_cache_lookups_total",
+    "Embedding and answer cache lookups",
+    ["cache", "result"]
+)
+
+
+def debug_log(*args: Any) -> None:
+    """Prints only when DEBUG_LOGGING is on; used for payload dumps that are too noisy for production."""
+    if settings.DEBUG_LOGGING:
+        print(*args)
+
+
+def count_cache(cache: str, hits: int, misses: int) -> None:
+    if hits:
+        CACHE_LOOKUPS.labels(cache, "hit").inc(hits)
+    if misses:
+        CACHE_LOOKUPS.labels(cache, "miss").inc(misses)
+
+
+def count_tokens(kind: str, tokens: int) -> None:
+    if tokens:
+        TOKENS.labels(kind).inc(tokens)
+
+
+class StageTimer:
+    """Per-stage wall time for one run of a pipeline (a chat request or an ingested file).
+
+    ``stage()`` times a block and opens a child span. ``wrap()`` times a lazy
+    iterator; chained wrappers report exclusive time, so wrapping read, clean
+    and chunk generators in that order splits one streamed pass into three
+    stages. ``finish()`` records one histogram sample per stage.
+
+    Stage spans are children of the current span, or of ``parent`` for code
+    such as async generators that cannot keep a span current across yields.
+    """
+
+    def __init__(self, pipeline: str, parent: Optional[trace.Span] = None):
+        self.pipeline = pipeline
+        self.parent = parent
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self._chain: List[str] = []
+        self._inclusive: Dict[str, float] = defaultdict(float)
+
+    @contextmanager
+    def stage(self, name: str, **attributes: Any) -> Iterator[trace.Span]:
+        started = time.perf_counter()
+        context = trace.set_span_in_context(self.parent) if self.parent is not None else None
+        with tracer.start_as_current_span(f"{self.pipeline}.{name}", context=context, attributes=attributes) as span:
+            try:
+                yield span
+            finally:
+                self.seconds[name] += time.perf_counter() - started
+
+    def add(self, name: str, seconds: float) -> None:
+        self.seconds[name] += seconds
+
+    def wrap(self, name: str, iterable: Iterable) -> Iterator:
+        self._chain.append(name)
+        return self._timed(name, iter(iterable))
+
+    def _timed(self, name: str, iterator: Iterator) -> Iterator:
+        clock = time.perf_counter
+        inclusive = self._inclusive
+        while True:
+            started = clock()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                inclusive[name] += clock() - started
+                return
+            inclusive[name] += clock() - started
+            yield item
+
+    def timings_ms(self) -> Dict[str, float]:
+        seconds = dict(self.seconds)
+        upstream = 0.0
+        for name in self._chain:
+            seconds[name] = seconds.get(name, 0.0) + self._inclusive[name] - upstream
+            upstream = self._inclusive[name]
+        return {name: round(value * 1000, 2) for name, value in seconds.items()}
+
+    def finish(self, span: Optional[trace.Span] = None) -> Dict[str, float]:
+        timings = self.timings_ms()
+        for name, ms in timings.items():
+            STAGE_SECONDS.labels(self.pipeline, name).observe(ms / 1000)
+            if span is not None:
+                span.set_attribute(f"{self.pipeline}.{name}_ms", ms)
+        return timings
+
+
+class LLMCallbackHandler(BaseCallbackHandler):
+    """Counts LLM token usage and times tool calls for one chat request."""
+
+    # Run in the event loop so tool spans nest under the request span.
+    run_inline = True
+
+    def __init__(self, parent: Optional[trace.Span] = None):
+        self.parent = parent
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.tool_seconds = 0.0
+        self._tools: Dict[UUID, tuple] = {}
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    self.input_tokens += usage.get("input_tokens", 0)
+                    self.output_tokens += usage.get("output_tokens", 0)
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any) -> None:
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        context = trace.set_span_in_context(self.parent) if self.parent is not None else None
+        span = tracer.start_span(f"chat.tool.{name}", context=context, attributes={"tool.name": name})
+        self._tools[run_id] = (name, time.perf_counter(), span)
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_tool(run_id, "ok")
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_tool(run_id, "error", error)
+
+    def _end_tool(self, run_id: UUID, status: str, error: Optional[BaseException] = None) -> None:
+        if run_id not in self._tools:
+            return
+        name, started, span = self._tools.pop(run_id)
+        seconds = time.perf_counter() - started
+        self.tool_seconds += seconds
+        TOOL_SECONDS.labels(name, status).observe(seconds)
+        if error is not None:
+            span.record_exception(error)
+        span.end()
+
+    def record(self, span: Optional[trace.Span] = None) -> None:
+        count_tokens("llm_input", self.input_tokens)
+        count_tokens("llm_output", self.output_tokens)
+        if span is not None:
+            span.set_attribute("llm.input_tokens", self.input_tokens)
+            span.set_attribute("llm.output_tokens", self.output_tokens)
+
+
+def configure_tracing() -> None:
+    """Installs an SDK tracer provider exporting over OTLP when OTEL_EXPORTER_OTLP_ENDPOINT is set.
+
+    Without an endpoint the OpenTelemetry API stays a no-op, so spans cost
+    next to nothing.
+    """
+    if not settings.OTEL_EXPORTER_OTLP_ENDPOINT:
+        return
+
+    from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    provider = TracerProvider(resource=Resource.create({"service.name": settings.OTEL_SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=settings.OTEL_EXPORTER_OTLP_ENDPOINT)))
+    trace.set_tracer_provider(provider)
+
+
+def shutdown_tracing() -> None:
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "shutdown"):
+        provider.shutdown()
+
+
+def metrics_response() -> Response:
+    # Under gunicorn each worker writes to PROMETHEUS_MULTIPROC_DIR and any
+    # worker can serve the combined view.
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
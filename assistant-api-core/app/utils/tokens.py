@@ -0,0 +1,35 @@
+from functools import lru_cache
+from typing import Callable, Optional
+import tiktoken
+
+# Rough characters-per-token ratio for OpenAI BPEs, used only when the
+# tiktoken encoding files cannot be loaded (e.g. no network on first run).
+APPROX_CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str) -> Optional[tiktoken.Encoding]:
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        try:
+            return tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            print(f"Warning: tiktoken encoding unavailable, approximating token counts: {e}")
+            return None
+    except Exception as e:
+        print(f"Warning: tiktoken encoding unavailable, approximating token counts: {e}")
+        return None
+
+
+def approximate_tokens(text: str) -> int:
+    # Rounded up, so the counts of the pieces of a text never add up to less
+    # than the count of the whole.
+    return -(-len(text) // APPROX_CHARS_PER_TOKEN)
+
+
+def get_token_counter(model: str) -> Callable[[str], int]:
+    encoding = get_encoding(model)
+    if encoding is None:
+        return approximate_tokens
+    return lambda text: len(encoding.encode_ordinary(text))
@@ -0,0 +1,17 @@
+"""Offline benchmarks for the assistant API.
+
+Run from ``assistant-api-core`` with ``python -m benchmarks.<name>``. Every
+benchmark uses local stand-ins for OpenAI so no API key or network is needed.
+"""
+import os
+import tempfile
+
+_workdir = tempfile.mkdtemp(prefix="am_bench_")
+
+os.environ.setdefault("PORT", "9000")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_workdir, 'bench.db')}")
+os.environ.setdefault("UPLOAD_DIR", os.path.join(_workdir, "uploads"))
+os.environ.setdefault("CHROMA_DB_PATH", os.path.join(_workdir, "chroma_db"))
+os.environ.setdefault("NUMPY_INDEX_PATH", os.path.join(_workdir, "vector_index"))
+os.environ.setdefault("EMBEDDING_CACHE_PATH", os.path.join(_workdir, "embedding_cache", "embeddings.sqlite3"))
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
@@ -0,0 +1,106 @@
+"""Throughput of POST /assistant/chat/batch versus sequential /assistant/chat calls.
+
+Query embeddings come from the local stub OpenAI server (so every embedding
+request pays its HTTP round trip and latency) and answers from the fake chat
+model. A share of the questions repeat, as in FAQ pre-generation. The answer
+cache is off so both paths call the LLM for every distinct question.
+
+    python -m benchmarks.chat_batch [--questions 200] [--duplicates 0.2] [--delay 0.2] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import random
+import time
+
+from langchain_openai.embeddings import OpenAIEmbeddings
+
+from app.config.settings import settings
+from app.services.embedding_service import EmbeddingService
+from app.services.rag_service import RAGService
+from app.services.vector_db_service import VectorDBService
+
+from .fakes import FakeChatModel
+from .stub_openai import StubOpenAI
+
+TEMPLATES = [
+    "¿Cuál es la moneda local de la ciudad {i}?",
+    "¿Qué atracciones recomiendas en la ciudad {i}?",
+    "What is the best season to visit city {i}?",
+]
+
+
+def make_questions(count: int, duplicates: float, seed: int = 3) -> list:
+    rng = random.Random(seed)
+    questions = []
+    for i in range(count):
+        if questions and rng.random() < duplicates:
+            questions.append(rng.choice(questions))
+        else:
+            questions.append(TEMPLATES[i % len(TEMPLATES)].format(i=i))
+    return questions
+
+
+async def run(args):
+    settings.EMBEDDING_CACHE_ENABLED = False
+    settings.CHAT_BATCH_CONCURRENCY = args.concurrency
+    stub = StubOpenAI()
+    embeddings = OpenAIEmbeddings(
+        openai_api_base=stub.start(),
+        openai_api_key="sk-stub",
+        model="text-embedding-3-small",
+        dimensions=stub.dimensions,
+        check_embedding_ctx_length=False,
+        max_retries=0
+    )
+    try:
+        embedding_service = EmbeddingService(embeddings=embeddings)
+        vector_db_service = VectorDBService(embedding_service=embedding_service)
+        chunks = [f"Ciudad {i}: moneda local, atracciones y mejor temporada para viajar." for i in range(100)]
+        await vector_db_service.store_document_chunks(
+            "bench", {"chunks": chunks, "embeddings": await embedding_service.create_embeddings(chunks)}
+        )
+
+        rag_service = RAGService(llm=FakeChatModel(delay=args.delay), vector_db_service=vector_db_service)
+        rag_service.answer_cache = None
+        questions = make_questions(args.questions, args.duplicates)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            requests_before = stub.requests
+            started = time.perf_counter()
+            for question in questions:
+                code, response = await rag_service.query_documents(question)
+                if code != 200:
+                    raise RuntimeError(response.message)
+            sequential = time.perf_counter() - started
+            sequential_requests = stub.requests - requests_before
+
+            requests_before = stub.requests
+            started = time.perf_counter()
+            code, response = await rag_service.query_batch(questions)
+            batch = time.perf_counter() - started
+            batch_requests = stub.requests - requests_before
+        if code != 200 or not all(item.success for item in response.data.results):
+            raise RuntimeError(response.message)
+    finally:
+        stub.stop()
+
+    print(
+        f"{len(questions)} questions ({response.data.unique_questions} distinct), "
+        f"fake LLM {args.delay:.2f}s, batch concurrency {args.concurrency}"
+    )
+    print(f"{'mode':<12} {'seconds':>8} {'q/s':>8} {'embedding requests':>19}")
+    print(f"{'sequential':<12} {sequential:>8.2f} {len(questions) / sequential:>8.1f} {sequential_requests:>19}")
+    print(f"{'batch':<12} {batch:>8.2f} {len(questions) / batch:>8.1f} {batch_requests:>19}")
+    print(f"batch timings: {response.data.timings}")
+    print(f"speedup {sequential / batch:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--duplicates", type=float, default=0.2)
+    parser.add_argument("--delay", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, default=8)
+    asyncio.run(run(parser.parse_args()))
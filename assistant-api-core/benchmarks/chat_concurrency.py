@@ -0,0 +1,65 @@
+"""Concurrency load test for /assistant/chat with a local fake LLM.
+
+N concurrent requests should finish in roughly the time of one when the
+chat path never blocks the event loop.
+
+    python -m benchmarks.chat_concurrency [--concurrency 20] [--delay 0.5]
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from app.main import app
+from app.services.container import ServiceContainer
+from app.services.embedding_service import EmbeddingService
+from app.services.rag_service import RAGService
+from app.services.vector_db_service import VectorDBService
+
+from .fakes import CountingEmbeddings, FakeChatModel
+
+
+async def chat(client: httpx.AsyncClient, message: str) -> float:
+    started = time.perf_counter()
+    response = await client.post("/api/v1/assistant/chat", json={"message": message})
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+
+async def run(concurrency: int, delay: float):
+    embedding_service = EmbeddingService(embeddings=CountingEmbeddings())
+    vector_db_service = VectorDBService(embedding_service=embedding_service)
+    chunks = [f"Ciudad {i}: clima cálido, moneda local y atracciones." for i in range(50)]
+    await vector_db_service.store_document_chunks(
+        "bench",
+        {"chunks": chunks, "embeddings": await embedding_service.create_embeddings(chunks)}
+    )
+    app.state.services = ServiceContainer(
+        rag_service=RAGService(llm=FakeChatModel(delay=delay), vector_db_service=vector_db_service)
+    )
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await chat(client, "warm up")
+
+        single = await chat(client, "¿Qué ciudades son cálidas?")
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(
+            chat(client, f"¿Qué ciudades son cálidas? #{i}") for i in range(concurrency)
+        ))
+        total = time.perf_counter() - started
+
+    print(f"fake LLM delay      {delay:.2f}s")
+    print(f"single request      {single:.2f}s")
+    print(f"{concurrency} concurrent      {total:.2f}s wall, max latency {max(latencies):.2f}s")
+    print(f"ratio vs single     {total / single:.2f}x (sequential would be ~{concurrency}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(run(args.concurrency, args.delay))
@@ -0,0 +1,84 @@
+"""CSV chunking throughput and peak RSS: pandas rendering vs native row streaming.
+
+    python -m benchmarks.csv_ingestion [--rows 100000 1000000]
+"""
+import argparse
+import csv
+import io
+import json
+import time
+
+from .datasets import scaled_csv_dataset
+from .utils import peak_rss_mb, run_in_subprocess
+
+
+def legacy_chunks(path: str):
+    """The pre-existing path: pandas to_string, clean, re-parse the padded text and split it."""
+    import pandas as pd
+
+    from app.services.chunk_service import ChunkService
+    from app.utils.file_processor import FileProcessor
+
+    content = pd.read_csv(path).to_string(index=False)
+    content = FileProcessor().clean_text_content(content, "csv")
+
+    rows = list(csv.reader(io.StringIO(content)))
+    headers, data_rows = rows[0], rows[1:]
+    text_content = ""
+    for row in data_rows:
+        row_text = ""
+        for i, value in enumerate(row):
+            if i < len(headers):
+                row_text += f"{headers[i]}: {value}, "
+        text_content += row_text.rstrip(", ") + "\n"
+    return ChunkService().csv_splitter.split_text(text_content)
+
+
+def native_chunks(path: str):
+    from app.services.chunk_service import ChunkService
+    from app.utils.file_processor import FileProcessor
+
+    chunks = ChunkService().iter_csv_chunks(FileProcessor().iter_csv_rows(path))
+    count = 0
+    for _ in chunks:
+        count += 1
+    return count
+
+
+def run_child(mode: str, path: str, rows: int) -> dict:
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    result = legacy_chunks(path) if mode == "legacy" else native_chunks(path)
+    seconds = time.perf_counter() - started
+    return {
+        "mode": mode,
+        "chunks": result if isinstance(result, int) else len(result),
+        "seconds": round(seconds, 2),
+        "rows_per_s": round(rows / seconds),
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "PATH", "ROWS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, path, rows = args.child
+        print(json.dumps(run_child(mode, path, int(rows))))
+        return
+
+    print(f"{'rows':>9} {'mode':>7} {'chunks':>8} {'seconds':>8} {'rows/s':>9} {'baseline_mb':>12} {'peak_rss_mb':>12}")
+    for rows in args.rows:
+        path = scaled_csv_dataset(rows)
+        for mode in ("legacy", "native"):
+            r = run_in_subprocess("benchmarks.csv_ingestion", [mode, path, str(rows)])
+            print(f"{rows:>9} {mode:>7} {r['chunks']:>8} {r['seconds']:>8} {r['rows_per_s']:>9} "
+                  f"{r['baseline_rss_mb']:>12} {r['peak_rss_mb']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import os
+from typing import Optional
+
+from . import _workdir
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DATASETS = [
+    os.path.join(ROOT, "cities_tourism_dataset.txt"),
+    os.path.join(ROOT, "cities_tourism_dataset_2.txt"),
+]
+
+
+def scaled_txt_dataset(size_mb: float, directory: str = _workdir, variant: Optional[int] = None) -> str:
+    """Writes the bundled datasets repeated until the file reaches ``size_mb`` MB.
+
+    With a ``variant`` every line of copy N is prefixed with ``[variant.N]``,
+    so no chunk repeats within the file or across variants and caches cannot
+    short-circuit embedding.
+    """
+    suffix = f"_v{variant}" if variant is not None else ""
+    path = os.path.join(directory, f"cities_{size_mb}mb{suffix}.txt")
+    target = int(size_mb * 1024 * 1024)
+    if os.path.exists(path) and os.path.getsize(path) >= target:
+        return path
+
+    source = "\n\n".join(open(dataset, encoding="utf-8").read() for dataset in DATASETS) + "\n\n"
+    written = 0
+    copy = 0
+    with open(path, "wb") as f:
+        while written < target:
+            text = source
+            if variant is not None:
+                text = "\n".join(f"[{variant}.{copy}] {line}" if line.strip() else line for line in source.split("\n"))
+            block = text.encode("utf-8")
+            f.write(block)
+            written += len(block)
+            copy += 1
+    return path
+
+
+CSV_HEADERS = ["city", "country", "population", "currency", "climate", "avg_temp_c", "daily_budget_usd", "best_months"]
+CSV_CITIES = [
+    ("Paris", "Francia", "2160000", "Euro", "templado oceanico", "12", "150-200", "abril-junio"),
+    ("Tokio", "Japon", "13960000", "Yen", "subtropical humedo", "16", "100-150", "marzo-mayo"),
+    ("Cancun", "Mexico", "888797", "Peso mexicano", "tropical", "27", "80-120", "diciembre-abril"),
+    ("Reikiavik", "Islandia", "131136", "Corona islandesa", "subpolar oceanico", "5", "200-250", "junio-agosto"),
+]
+
+
+def scaled_csv_dataset(rows: int, directory: str = _workdir) -> str:
+    """Writes a CSV with ``rows`` data rows of synthetic city records."""
+    path = os.path.join(directory, f"cities_{rows}_rows.csv")
+    if os.path.exists(path):
+        return path
+
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(",".join(CSV_HEADERS) + "\n")
+        for i in range(rows):
+            city = CSV_CITIES[i % len(CSV_CITIES)]
+            f.write(f"{city[0]} {i},{','.join(city[1:])}\n")
+    return path
@@ -0,0 +1,71 @@
+"""Embedding calls per upload: legacy double-embedding vs precomputed vectors,
+plus a re-upload served from the embedding cache.
+
+    python -m benchmarks.embedding_calls [dataset.txt ...]
+"""
+import asyncio
+import os
+import sys
+import time
+
+from app.config.settings import settings
+from app.services.chunk_service import ChunkService
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_service import EmbeddingService
+from app.services.vector_db_service import VectorDBService
+from app.utils.file_processor import FileProcessor
+
+from .datasets import DATASETS
+from .fakes import CountingEmbeddings
+
+
+async def upload(embedding_service, vector_db_service, file_id, chunks, precomputed):
+    embeddings = await embedding_service.create_embeddings(chunks)
+    chunks_data = {"chunks": chunks, "embeddings": embeddings if precomputed else None}
+    result = await vector_db_service.store_document_chunks(file_id, chunks_data)
+    assert result["success"], result["message"]
+
+
+async def run(paths):
+    settings.EMBEDDING_CACHE_ENABLED = False
+    fake = CountingEmbeddings()
+    uncached = EmbeddingService(embeddings=fake)
+    cached = EmbeddingService(
+        embeddings=fake,
+        cache=EmbeddingCache(
+            path=settings.EMBEDDING_CACHE_PATH,
+            model="bench-fake",
+            dimensions=fake.dimensions,
+            max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES
+        )
+    )
+    vector_db_service = VectorDBService(embedding_service=uncached)
+    chunk_service = ChunkService()
+    processor = FileProcessor()
+
+    modes = [
+        ("legacy", uncached, False),
+        ("precomputed", uncached, True),
+        ("cache_cold", cached, True),
+        ("cache_warm", cached, True),
+    ]
+    print(f"{'dataset':<30} {'chunks':>7}" + "".join(f" {name:>12}" for name, _, _ in modes))
+    for path in paths:
+        content = await processor.read_file_content(path, "txt")
+        chunks = chunk_service.create_chunks(content, "txt")
+        name = os.path.basename(path)
+
+        cells = []
+        for mode, service, precomputed in modes:
+            fake.reset()
+            started = time.perf_counter()
+            await upload(service, vector_db_service, f"{mode}-{name}", chunks, precomputed)
+            cells.append(f"{fake.texts_embedded}/{time.perf_counter() - started:.2f}s")
+
+        print(f"{name:<30} {len(chunks):>7}" + "".join(f" {cell:>12}" for cell in cells))
+
+    print("\nEmbedded texts / wall time per upload. Cache:", cached.cache.stats())
+
+
+if __name__ == "__main__":
+    asyncio.run(run(sys.argv[1:] or DATASETS))
@@ -0,0 +1,86 @@
+"""Embedding throughput against a local stub OpenAI server.
+
+Compares the previous single embed_documents call with EmbeddingScheduler at
+several concurrency levels, and once more under a tokens-per-minute limit
+that forces 429 responses.
+
+Token counts are approximated when tiktoken cannot download its encoding.
+
+    python -m benchmarks.embedding_throughput [--chunks 4000]
+"""
+import argparse
+import asyncio
+import time
+
+from langchain_openai.embeddings import OpenAIEmbeddings
+
+from app.services.chunk_service import ChunkService
+from app.services.embedding_scheduler import EmbeddingScheduler
+from app.utils.file_processor import FileProcessor
+
+from .datasets import scaled_txt_dataset
+from .stub_openai import StubOpenAI
+
+
+def make_embeddings(base_url: str, dimensions: int) -> OpenAIEmbeddings:
+    return OpenAIEmbeddings(
+        openai_api_base=base_url,
+        openai_api_key="sk-stub",
+        model="text-embedding-3-small",
+        dimensions=dimensions,
+        check_embedding_ctx_length=False,
+        max_retries=0
+    )
+
+
+def load_chunks(count: int):
+    path = scaled_txt_dataset(max(1, count // 1000 + 1))
+    pieces = FileProcessor().iter_file_content(path, "txt", 1 << 20)
+    chunks = []
+    for chunk in ChunkService().iter_chunks(pieces, "txt"):
+        chunks.append(chunk)
+        if len(chunks) == count:
+            break
+    return chunks
+
+
+async def run(count: int):
+    chunks = load_chunks(count)
+    print(f"{len(chunks)} chunks\n")
+    print(f"{'mode':<28} {'seconds':>8} {'chunks/s':>9} {'tokens/s':>10} {'requests':>9} {'429s':>5} {'retries':>8}")
+
+    scenarios = [("legacy embed_documents", None, None)]
+    scenarios += [(f"scheduler K={k}", k, None) for k in (1, 4, 8)]
+    scenarios += [("scheduler K=8, rate limited", 8, 100000)]
+
+    for name, concurrency, tokens_per_second in scenarios:
+        stub = StubOpenAI(rate_limit_tokens=tokens_per_second, rate_limit_window=1.0)
+        embeddings = make_embeddings(stub.start(), stub.dimensions)
+        try:
+            if concurrency is None:
+                started = time.perf_counter()
+                vectors = await asyncio.to_thread(embeddings.embed_documents, chunks)
+                seconds = time.perf_counter() - started
+                tokens_per_s, retries = "", ""
+            else:
+                scheduler = EmbeddingScheduler(
+                    embeddings, max_batch_tokens=8000, max_batch_items=128,
+                    concurrency=concurrency, max_retries=20
+                )
+                vectors = await scheduler.embed(chunks)
+                seconds = scheduler.last_run["seconds"]
+                tokens_per_s, retries = scheduler.last_run["tokens_per_s"], scheduler.last_run["retries"]
+
+            assert len(vectors) == len(chunks)
+            assert all(abs(a - b) < 1e-5 for a, b in zip(vectors[-1], stub.vector(chunks[-1])))
+            print(f"{name:<28} {seconds:>8.2f} {len(chunks) / seconds:>9.1f} {tokens_per_s:>10} "
+                  f"{stub.requests:>9} {stub.rate_limited:>5} {retries:>8}")
+        finally:
+            stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=4000)
+    args = parser.parse_args()
+    asyncio.run(run(args.chunks))
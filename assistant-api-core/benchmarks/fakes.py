@@ -0,0 +1,126 @@
+import asyncio
+import hashlib
+import json
+import math
+import time
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic local embedding model that counts every text it embeds."""
+
+    def __init__(self, dimensions: int = 64):
+        self.dimensions = dimensions
+        self.calls = 0
+        self.texts_embedded = 0
+
+    def reset(self) -> None:
+        self.calls = 0
+        self.texts_embedded = 0
+
+    def _vector(self, text: str) -> List[float]:
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        values = [digest[i % len(digest)] / 255.0 - 0.5 for i in range(self.dimensions)]
+        norm = math.sqrt(sum(v * v for v in values)) or 1.0
+        return [v / norm for v in values]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        self.texts_embedded += len(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        self.texts_embedded += 1
+        return self._vector(text)
+
+
+class HashingEmbeddings(Embeddings):
+    """Local bag-of-character-trigrams embedding, a weak but meaningful dense model for retrieval benchmarks."""
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+
+    def _vector(self, text: str) -> List[float]:
+        values = [0.0] * self.dimensions
+        text = f" {' '.join(text.lower().split())} "
+        for i in range(len(text) - 2):
+            digest = hashlib.md5(text[i:i + 3].encode("utf-8")).digest()
+            values[int.from_bytes(digest[:4], "little") % self.dimensions] += 1.0
+        norm = math.sqrt(sum(v * v for v in values)) or 1.0
+        return [v / norm for v in values]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._vector(text)
+
+
+class FakeChatModel(BaseChatModel):
+    """Local chat model that answers after a fixed delay and can stream tokens.
+
+    ``delay_per_1k_chars`` adds latency proportional to the prompt, including
+    the schemas of any bound tools, to model prefill cost.
+    """
+
+    delay: float = 0.5
+    delay_per_1k_chars: float = 0.0
+    tool_schema_chars: int = 0
+    answer: str = "Respuesta de prueba basada en el contexto proporcionado."
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def bind_tools(self, tools, **kwargs):
+        schemas = json.dumps([convert_to_openai_tool(tool) for tool in tools])
+        return self.model_copy(update={"tool_schema_chars": len(schemas)})
+
+    def _latency(self, messages) -> float:
+        prompt_chars = sum(len(str(message.content)) for message in messages) + self.tool_schema_chars
+        return self.delay + self.delay_per_1k_chars * prompt_chars / 1000
+
+    def _message(self) -> AIMessage:
+        self.calls += 1
+        return AIMessage(content=self.answer)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self._latency(messages))
+        return ChatResult(generations=[ChatGeneration(message=self._message())])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self._latency(messages))
+        return ChatResult(generations=[ChatGeneration(message=self._message())])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self._message()
+        tokens = message.content.split(" ")
+        latency = self._latency(messages)
+        for i, token in enumerate(tokens):
+            await asyncio.sleep(latency / len(tokens))
+            chunk = ChatGenerationChunk(
+                message=AIMessageChunk(content=token if i == 0 else f" {token}")
+            )
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.message.content, chunk=chunk)
+            yield chunk
+
+
+class NullVectorStore:
+    """Stands in for VectorDBService when only the ingestion pipeline is measured."""
+
+    def __init__(self):
+        self.stored_chunks = 0
+
+    async def store_document_chunks(self, file_id, chunks_data):
+        stored = sum(1 for chunk in chunks_data["chunks"] if chunk.strip())
+        self.stored_chunks += stored
+        return {"success": True, "message": "", "stored_chunks": stored, "file_id": file_id}
@@ -0,0 +1,369 @@
+"""Reproducible end-to-end benchmark of the real FastAPI app against local stand-ins.
+
+The app is served by uvicorn with its normal lifespan and service container;
+only the network edges are replaced: OpenAI embeddings and chat completions by
+StubOpenAI and the Strapi notes API by StubStrapi. Each workload runs in a
+fresh subprocess with its own database, vector index and caches, so peak RSS
+and call counts belong to that workload alone.
+
+- ingest: uploads scaled copies of cities_tourism_dataset*.txt through
+  POST /platform/upload-file and waits for each ingestion job.
+- chat: ingests both datasets, then replays a JSONL chat trace (one
+  ``{"message": ..., "endpoint": "chat" | "stream"}`` per line) against
+  /assistant/chat and /assistant/chat/stream at a fixed concurrency.
+
+The result is a single JSON document meant to be committed or diffed:
+
+    python -m benchmarks.harness [--workloads ingest chat] [--output head.json]
+    python -m benchmarks.harness --compare base.json head.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from .datasets import DATASETS, scaled_txt_dataset
+from .utils import free_port, peak_rss_mb, percentile, run_in_subprocess
+
+SCHEMA_VERSION = 1
+DEFAULT_TRACE = os.path.join(os.path.dirname(__file__), "traces", "chat_trace.jsonl")
+POLL_INTERVAL = 0.02
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds."""
+    if not samples:
+        return {"count": 0}
+    return {
+        "count": len(samples),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 2),
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2)
+    }
+
+
+def load_trace(path: str) -> List[Dict[str, str]]:
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                items.append({"message": entry["message"], "endpoint": entry.get("endpoint", "chat")})
+    return items
+
+
+def git_revision() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def parse_metrics(text: str) -> Dict[str, Any]:
+    """Reduces the app's /metrics output to per-stage means, token totals and cache lookups."""
+    from prometheus_client.parser import text_string_to_metric_families
+
+    stages: Dict[str, Dict[str, float]] = {}
+    tokens: Dict[str, int] = {}
+    caches: Dict[str, int] = {}
+    for family in text_string_to_metric_families(text):
+        for sample in family.samples:
+            labels = sample.labels
+            if sample.name in ("assistant_stage_duration_seconds_sum", "assistant_stage_duration_seconds_count"):
+                stage = stages.setdefault(f"{labels['pipeline']}.{labels['stage']}", {})
+                stage["sum" if sample.name.endswith("_sum") else "count"] = sample.value
+            elif sample.name == "assistant_tokens_total":
+                tokens[labels["kind"]] = int(sample.value)
+            elif sample.name == "assistant_cache_lookups_total":
+                caches[f"{labels['cache']}.{labels['result']}"] = int(sample.value)
+
+    return {
+        "stages": {
+            name: {"count": int(values["count"]), "mean_ms": round(values["sum"] / values["count"] * 1000, 2)}
+            for name, values in sorted(stages.items()) if values.get("count")
+        },
+        "tokens": dict(sorted(tokens.items())),
+        "cache_lookups": dict(sorted(caches.items()))
+    }
+
+
+async def upload_and_wait(client, path: str) -> Dict[str, Any]:
+    started = time.perf_counter()
+    with open(path, "rb") as f:
+        response = await client.post("/api/v1/platform/upload-file", files={"file": (os.path.basename(path), f, "text/plain")})
+    uploaded = time.perf_counter()
+    response.raise_for_status()
+    job_id = response.json()["data"]["job"]["job_id"]
+
+    while True:
+        job = (await client.get(f"/api/v1/platform/jobs/{job_id}")).json()["data"]
+        if job["status"] in ("completed", "failed"):
+            break
+        await asyncio.sleep(POLL_INTERVAL)
+
+    if job["status"] == "failed":
+        raise RuntimeError(f"Ingestion of {path} failed: {job['error']}")
+    return {
+        "upload_seconds": uploaded - started,
+        "ingest_seconds": time.perf_counter() - started,
+        "chunks": job["processed_chunks"]
+    }
+
+
+async def ingest_workload(client, config: Dict[str, Any], workdir: str) -> Dict[str, Any]:
+    sizes: Dict[str, Any] = {}
+    total_bytes = 0
+    total_seconds = 0.0
+    variant = 0
+
+    for size_mb in config["upload_mb"]:
+        runs = []
+        for _ in range(config["upload_repeats"]):
+            path = scaled_txt_dataset(size_mb, directory=workdir, variant=variant)
+            variant += 1
+            run = await upload_and_wait(client, path)
+            run["bytes"] = os.path.getsize(path)
+            runs.append(run)
+
+        seconds = [run["ingest_seconds"] for run in runs]
+        size_bytes = sum(run["bytes"] for run in runs)
+        chunks = sum(run["chunks"] for run in runs)
+        total_bytes += size_bytes
+        total_seconds += sum(seconds)
+        sizes[f"{size_mb}mb"] = {
+            "uploads": len(runs),
+            "chunks_per_upload": runs[0]["chunks"],
+            "upload_request": summarize([run["upload_seconds"] for run in runs]),
+            "ingest": summarize(seconds),
+            "mb_per_s": round(size_bytes / 1024 / 1024 / sum(seconds), 3),
+            "chunks_per_s": round(chunks / sum(seconds), 1)
+        }
+
+    return {
+        "sizes": sizes,
+        "total_mb": round(total_bytes / 1024 / 1024, 2),
+        "mb_per_s": round(total_bytes / 1024 / 1024 / total_seconds, 3) if total_seconds else 0.0
+    }
+
+
+async def chat_workload(client, config: Dict[str, Any], workdir: str) -> Dict[str, Any]:
+    for path in DATASETS:
+        await upload_and_wait(client, path)
+
+    trace = load_trace(config["trace"])
+    semaphore = asyncio.Semaphore(config["concurrency"])
+    latencies: Dict[str, List[float]] = {"chat": [], "stream": []}
+    first_tokens: List[float] = []
+    errors: Dict[str, int] = {"chat": 0, "stream": 0}
+
+    async def replay(item: Dict[str, str]) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            ok = False
+            if item["endpoint"] == "stream":
+                first_token = None
+                async with client.stream("POST", "/api/v1/assistant/chat/stream", json={"message": item["message"]}) as response:
+                    async for line in response.aiter_lines():
+                        if line == "event: token" and first_token is None:
+                            first_token = time.perf_counter() - started
+                        elif line == "event: done":
+                            ok = True
+                if first_token is not None:
+                    first_tokens.append(first_token)
+            else:
+                response = await client.post("/api/v1/assistant/chat", json={"message": item["message"]})
+                ok = response.status_code == 200 and response.json()["success"]
+
+            latencies[item["endpoint"]].append(time.perf_counter() - started)
+            if not ok:
+                errors[item["endpoint"]] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(replay(item) for item in trace))
+    wall = time.perf_counter() - started
+
+    return {
+        "requests": len(trace),
+        "errors": sum(errors.values()),
+        "wall_s": round(wall, 3),
+        "requests_per_s": round(len(trace) / wall, 2),
+        "latency": summarize(latencies["chat"] + latencies["stream"]),
+        "endpoints": {
+            endpoint: {**summarize(samples), "errors": errors[endpoint]}
+            for endpoint, samples in latencies.items() if samples
+        },
+        "stream_first_token": summarize(first_tokens)
+    }
+
+
+WORKLOADS = {"ingest": ingest_workload, "chat": chat_workload}
+
+
+async def run_child(workload: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    from .stub_openai import StubOpenAI
+    from .stub_strapi import StubStrapi
+
+    openai = StubOpenAI(
+        dimensions=config["dimensions"],
+        base_latency=config["embedding_latency"],
+        per_item_latency=config["embedding_item_latency"],
+        chat_latency=config["chat_latency"],
+        chat_token_latency=config["chat_token_latency"]
+    )
+    strapi = StubStrapi(latency=config["strapi_latency"])
+    workdir = tempfile.mkdtemp(prefix=f"am_harness_{workload}_")
+
+    # Settings are read at import, so the app is imported only after this.
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "UPLOAD_DIR": os.path.join(workdir, "uploads"),
+        "CHROMA_DB_PATH": os.path.join(workdir, "chroma_db"),
+        "NUMPY_INDEX_PATH": os.path.join(workdir, "vector_index"),
+        "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embedding_cache", "embeddings.sqlite3"),
+        "OPENAI_API_BASE": openai.start(),
+        "STRAPI_URL": strapi.start(),
+        "EMBEDDING_DIMENSIONS": str(config["dimensions"]),
+        "EMBEDDING_CHECK_CTX_LENGTH": "False",
+        "VECTOR_BACKEND": config["vector_backend"],
+        "DEBUG_LOGGING": "False"
+    })
+
+    import httpx
+    import uvicorn
+    from app.main import app
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        if serving.done():
+            serving.result()
+        await asyncio.sleep(0.01)
+
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+            result = await WORKLOADS[workload](client, config, workdir)
+            result["app_metrics"] = parse_metrics((await client.get("/metrics")).text)
+    finally:
+        server.should_exit = True
+        await serving
+
+    result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    result["calls"] = {
+        "embedding_requests": openai.requests,
+        "embedded_texts": openai.items,
+        "chat_requests": openai.chat_requests,
+        "chat_streams": openai.chat_streams,
+        "tool_calls": openai.tool_calls,
+        "strapi_requests": strapi.requests
+    }
+    return result
+
+
+def flatten(value: Any, prefix: str = "") -> Dict[str, float]:
+    if isinstance(value, dict):
+        flat = {}
+        for key, item in value.items():
+            flat.update(flatten(item, f"{prefix}.{key}" if prefix else key))
+        return flat
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: value}
+    return {}
+
+
+def compare(base_path: str, head_path: str) -> None:
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(head_path) as f:
+        head = json.load(f)
+
+    print(f"base {base.get('commit')}  head {head.get('commit')}")
+    if base.get("config") != head.get("config"):
+        print("warning: configs differ, numbers are not directly comparable")
+
+    base_values = flatten(base["workloads"])
+    head_values = flatten(head["workloads"])
+    width = max((len(key) for key in base_values), default=10)
+    print(f"{'metric':<{width}} {'base':>12} {'head':>12} {'change':>8}")
+    for key in sorted(base_values.keys() & head_values.keys()):
+        before, after = base_values[key], head_values[key]
+        change = f"{(after - before) / before * 100:+.1f}%" if before else ""
+        print(f"{key:<{width}} {before:>12g} {after:>12g} {change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workloads", nargs="+", choices=list(WORKLOADS), default=list(WORKLOADS))
+    parser.add_argument("--upload-mb", nargs="+", type=float, default=[1, 4])
+    parser.add_argument("--upload-repeats", type=int, default=3)
+    parser.add_argument("--trace", default=DEFAULT_TRACE)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--vector-backend", default="chroma", choices=["chroma", "numpy"])
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--embedding-latency", type=float, default=0.05)
+    parser.add_argument("--embedding-item-latency", type=float, default=0.0005)
+    parser.add_argument("--chat-latency", type=float, default=0.2)
+    parser.add_argument("--chat-token-latency", type=float, default=0.005)
+    parser.add_argument("--strapi-latency", type=float, default=0.02)
+    parser.add_argument("--output", help="write the JSON here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "HEAD"), help="print metric changes between two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    config = {
+        "upload_mb": args.upload_mb,
+        "upload_repeats": args.upload_repeats,
+        "trace": os.path.relpath(args.trace),
+        "concurrency": args.concurrency,
+        "vector_backend": args.vector_backend,
+        "dimensions": args.dimensions,
+        "embedding_latency": args.embedding_latency,
+        "embedding_item_latency": args.embedding_item_latency,
+        "chat_latency": args.chat_latency,
+        "chat_token_latency": args.chat_token_latency,
+        "strapi_latency": args.strapi_latency
+    }
+
+    workloads = {}
+    for workload in args.workloads:
+        print(f"running {workload}...", file=sys.stderr)
+        try:
+            workloads[workload] = run_in_subprocess("benchmarks.harness", [workload, json.dumps(config)])
+        except subprocess.CalledProcessError as e:
+            print(e.stderr, file=sys.stderr)
+            raise
+
+    result = {
+        "schema_version": SCHEMA_VERSION,
+        "commit": git_revision(),
+        "python": platform.python_version(),
+        "config": config,
+        "workloads": workloads
+    }
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"wrote {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        print(json.dumps(asyncio.run(run_child(sys.argv[2], json.loads(sys.argv[3])))))
+    else:
+        main()
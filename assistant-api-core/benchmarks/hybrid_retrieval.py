@@ -0,0 +1,123 @@
+"""Recall@k and latency for vector, BM25 and hybrid (RRF) retrieval over the bundled datasets.
+
+Queries are generated from each chunk's rarest terms (city names, currencies,
+numbers) wrapped in a question, and every chunk containing all of those terms
+counts as relevant. Dense vectors come from a local character-trigram model,
+so absolute numbers only show the relative effect of adding the lexical index.
+
+    python -m benchmarks.hybrid_retrieval [--k 5] [--queries 200]
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+
+from app.services.chunk_service import ChunkService
+from app.services.embedding_service import EmbeddingService
+from app.services.lexical_index import LexicalIndex
+from app.services.vector_db_service import VectorDBService
+from app.utils.file_processor import FileProcessor
+
+from .datasets import DATASETS
+from .fakes import HashingEmbeddings
+from .utils import percentile
+
+TEMPLATES = [
+    "¿Qué información hay sobre {terms}?",
+    "Cuéntame acerca de {terms}",
+    "What do you know about {terms}?",
+]
+
+
+def build_queries(chunks, count: int, seed: int = 7):
+    """Returns (question, relevant chunk ids, file_id) triples."""
+    tokens = {doc_id: set(LexicalIndex.tokenize(text)) for doc_id, (_, text) in chunks.items()}
+    df = Counter(token for chunk_tokens in tokens.values() for token in chunk_tokens)
+    rng = random.Random(seed)
+
+    queries = []
+    for doc_id, (file_id, _) in chunks.items():
+        rare = sorted(
+            (token for token in tokens[doc_id] if df[token] <= 3 and len(token) > 2),
+            key=lambda token: (df[token], token)
+        )
+        if len(rare) < 2:
+            continue
+        terms = rng.sample(rare[:6], 2)
+        relevant = {other for other, other_tokens in tokens.items() if set(terms) <= other_tokens}
+        question = rng.choice(TEMPLATES).format(terms=" y ".join(terms))
+        queries.append((question, relevant, file_id))
+
+    rng.shuffle(queries)
+    return queries[:count]
+
+
+def recall(results, relevant, k: int) -> float:
+    return len(set(results[:k]) & relevant) / min(len(relevant), k)
+
+
+async def run(k: int, query_count: int):
+    embedding_service = EmbeddingService(embeddings=HashingEmbeddings())
+    vector_db_service = VectorDBService(embedding_service=embedding_service)
+    lexical_index = vector_db_service.lexical_index
+    processor = FileProcessor()
+    chunk_service = ChunkService()
+
+    chunks = {}
+    for file_id, path in enumerate(DATASETS, 1):
+        content = await processor.read_file_content(path, "txt")
+        texts = chunk_service.create_chunks(content, "txt")
+        await vector_db_service.store_document_chunks(
+            file_id, {"chunks": texts, "embeddings": await embedding_service.create_embeddings(texts)}
+        )
+        for i, text in enumerate(texts):
+            chunks[vector_db_service.chunk_metadata(file_id, i, text)["source"]] = (str(file_id), text.strip())
+
+    queries = build_queries(chunks, query_count)
+
+    async def vector(question, file_id):
+        vector_db_service.lexical_index = None
+        try:
+            results = await vector_db_service.similarity_search_with_scores(question, k=k, file_id=file_id)
+        finally:
+            vector_db_service.lexical_index = lexical_index
+        return [result["source"] for result in results]
+
+    async def lexical(question, file_id):
+        return [doc_id for doc_id, _ in lexical_index.search(question, k, file_id)]
+
+    async def hybrid(question, file_id):
+        results = await vector_db_service.similarity_search_with_scores(question, k=k, file_id=file_id)
+        return [result["source"] for result in results]
+
+    print(f"{len(chunks)} chunks, {len(queries)} queries, k={k}")
+    print(f"{'mode':<18} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, search, filtered in (
+        ("vector", vector, False),
+        ("bm25", lexical, False),
+        ("hybrid", hybrid, False),
+        ("hybrid + file_id", hybrid, True),
+    ):
+        recalls, latencies = [], []
+        for question, relevant, file_id in queries:
+            if filtered:
+                relevant = {doc_id for doc_id in relevant if chunks[doc_id][0] == file_id}
+            started = time.perf_counter()
+            results = await search(question, file_id if filtered else None)
+            latencies.append(time.perf_counter() - started)
+            if filtered:
+                assert all(chunks[doc_id][0] == file_id for doc_id in results), "file_id filter leaked"
+            recalls.append(recall(results, relevant, k))
+        print(
+            f"{name:<18} {sum(recalls) / len(recalls):>9.3f} "
+            f"{percentile(latencies, 50) * 1000:>8.2f} {percentile(latencies, 95) * 1000:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.k, args.queries))
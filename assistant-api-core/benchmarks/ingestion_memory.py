@@ -0,0 +1,72 @@
+"""Peak RSS of file ingestion: whole-file legacy path vs streaming pipeline.
+
+Each run happens in a fresh subprocess so ru_maxrss reflects that run only.
+
+    python -m benchmarks.ingestion_memory [--sizes 10 100 500] [--legacy-max-mb 100]
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from app.config.settings import settings
+
+from .datasets import scaled_txt_dataset
+from .utils import peak_rss_mb, run_in_subprocess
+
+
+async def run_child(mode: str, path: str) -> dict:
+    from app.services.chunk_service import ChunkService
+    from app.services.embedding_service import EmbeddingService
+    from app.services.file_service import FileService
+    from app.utils.file_processor import FileProcessor
+
+    from .fakes import CountingEmbeddings, NullVectorStore
+
+    settings.EMBEDDING_CACHE_ENABLED = False
+    embedding_service = EmbeddingService(embeddings=CountingEmbeddings(dimensions=64))
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+
+    if mode == "legacy":
+        content = await FileProcessor().read_file_content(path, "txt")
+        chunks = ChunkService().create_chunks(content, "txt")
+        await embedding_service.create_embeddings(chunks)
+        total = len(chunks)
+    else:
+        file_service = FileService(embedding_service=embedding_service, vector_db_service=NullVectorStore())
+        total = await file_service.ingest_file("bench", path, "txt")
+
+    return {
+        "mode": mode,
+        "chunks": total,
+        "seconds": round(time.perf_counter() - started, 2),
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--legacy-max-mb", type=int, default=100,
+                        help="skip the legacy path above this size, it needs several times the file size in RAM")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(run_child(*args.child))))
+        return
+
+    print(f"{'size_mb':>8} {'mode':>10} {'chunks':>9} {'seconds':>8} {'baseline_mb':>12} {'peak_rss_mb':>12}")
+    for size_mb in args.sizes:
+        path = scaled_txt_dataset(size_mb)
+        modes = ["streaming"] + (["legacy"] if size_mb <= args.legacy_max_mb else [])
+        for mode in modes:
+            result = run_in_subprocess("benchmarks.ingestion_memory", [mode, path])
+            print(f"{size_mb:>8} {mode:>10} {result['chunks']:>9} {result['seconds']:>8} "
+                  f"{result['baseline_rss_mb']:>12} {result['peak_rss_mb']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Chat latency on a QA-only workload with the intent router on and off.
+
+With the router off every turn goes through AgentExecutor; with it on plain
+questions take a single direct LLM call. The fake LLM charges latency per
+prompt character (including bound tool schemas) to model prefill cost.
+
+    python -m benchmarks.intent_routing [--requests 50] [--delay 0.2] [--delay-per-1k 0.05]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from app.services.embedding_service import EmbeddingService
+from app.services.rag_service import RAGService
+from app.services.vector_db_service import VectorDBService
+
+from .fakes import CountingEmbeddings, FakeChatModel
+from .utils import percentile
+
+QUESTIONS = [
+    "¿Qué ciudades tienen clima cálido?",
+    "¿Cuál es la moneda local de la ciudad {i}?",
+    "¿Qué atracciones recomiendas en la ciudad {i}?",
+    "What is the best season to visit city {i}?",
+]
+
+
+async def measure(rag_service: RAGService, requests: int) -> list:
+    latencies = []
+    for i in range(requests):
+        question = QUESTIONS[i % len(QUESTIONS)].format(i=i)
+        started = time.perf_counter()
+        code, response = await rag_service.query_documents(question)
+        latencies.append(time.perf_counter() - started)
+        if code != 200:
+            raise RuntimeError(response.message)
+    return latencies
+
+
+async def run(requests: int, delay: float, delay_per_1k: float):
+    embedding_service = EmbeddingService(embeddings=CountingEmbeddings())
+    vector_db_service = VectorDBService(embedding_service=embedding_service)
+    chunks = [f"Ciudad {i}: clima cálido, moneda local y atracciones." for i in range(50)]
+    await vector_db_service.store_document_chunks(
+        "bench",
+        {"chunks": chunks, "embeddings": await embedding_service.create_embeddings(chunks)}
+    )
+
+    llm = FakeChatModel(delay=delay, delay_per_1k_chars=delay_per_1k)
+    rag_service = RAGService(llm=llm, vector_db_service=vector_db_service)
+    rag_service.answer_cache = None
+
+    results = {}
+    for label, enabled in (("agent only", False), ("router", True)):
+        rag_service.intent_router.enabled = enabled
+        with contextlib.redirect_stdout(io.StringIO()):
+            await measure(rag_service, 2)
+            results[label] = await measure(rag_service, requests)
+
+    print(f"{requests} QA requests, fake LLM {delay:.2f}s + {delay_per_1k:.3f}s per 1k prompt chars")
+    for label, latencies in results.items():
+        print(
+            f"{label:<12} p50 {percentile(latencies, 50) * 1000:8.1f} ms   "
+            f"p95 {percentile(latencies, 95) * 1000:8.1f} ms"
+        )
+    baseline, routed = results["agent only"], results["router"]
+    for p in (50, 95):
+        saved = 1 - percentile(routed, p) / percentile(baseline, p)
+        print(f"p{p} reduction  {saved:.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--delay", type=float, default=0.2)
+    parser.add_argument("--delay-per-1k", type=float, default=0.05)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.delay, args.delay_per_1k))
@@ -0,0 +1,123 @@
+"""Cleaning and chunking throughput of large TXT files: ingestion thread vs process pool.
+
+Only the read -> clean -> chunk pipeline runs, pulled in batches from a worker
+thread as ``ingest_file`` does, while a ticker measures how late the event loop
+wakes up. Cores used is the CPU time of the run and its pool processes divided
+by wall time. With content-defined chunking every process count must produce
+the same chunks, so the digest column should not change.
+
+    python -m benchmarks.parallel_chunking [--sizes 200 500] [--processes 0 1 2 4]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import resource
+import time
+
+from app.config.settings import settings
+
+from .datasets import scaled_txt_dataset
+from .utils import peak_rss_mb, percentile, run_in_subprocess
+
+
+def cpu_seconds() -> float:
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+async def run_child(processes: int, path: str, section_mb: float) -> dict:
+    from app.services.embedding_service import EmbeddingService
+    from app.services.file_service import FileService
+
+    from .fakes import CountingEmbeddings, NullVectorStore
+
+    settings.INGESTION_PROCESSES = processes
+    settings.INGESTION_SECTION_SIZE = int(section_mb * 1024 * 1024)
+    settings.INGESTION_PARALLEL_MIN_SIZE = 0
+    settings.EMBEDDING_CACHE_ENABLED = False
+    file_service = FileService(
+        embedding_service=EmbeddingService(embeddings=CountingEmbeddings(dimensions=64)),
+        vector_db_service=NullVectorStore()
+    )
+
+    lags = []
+    running = True
+
+    async def ticker():
+        while running:
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append(time.perf_counter() - started - 0.01)
+
+    tick_task = asyncio.create_task(ticker())
+    cpu_started = cpu_seconds()
+    started = time.perf_counter()
+
+    chunks = file_service._iter_file_chunks(path, "txt")
+    digest = hashlib.sha256()
+    total = 0
+
+    def next_batch():
+        batch = []
+        for chunk in chunks:
+            batch.append(chunk)
+            digest.update(chunk.encode("utf-8"))
+            if len(batch) >= settings.INGESTION_BATCH_SIZE:
+                break
+        return batch
+
+    while batch := await asyncio.to_thread(next_batch):
+        total += len(batch)
+
+    seconds = time.perf_counter() - started
+    running = False
+    await tick_task
+    # Pool processes only count towards RUSAGE_CHILDREN once they are reaped.
+    await file_service.stop()
+    cpu = cpu_seconds() - cpu_started
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+
+    return {
+        "processes": processes,
+        "chunks": total,
+        "seconds": round(seconds, 2),
+        "mb_per_s": round(size_mb / seconds, 1),
+        "cores_used": round(cpu / seconds, 2),
+        "loop_lag_p99_ms": round(percentile(lags, 99) * 1000, 1) if lags else 0.0,
+        "loop_lag_max_ms": round(max(lags) * 1000, 1) if lags else 0.0,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "digest": digest.hexdigest()[:12],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 500])
+    parser.add_argument("--processes", type=int, nargs="+", default=[0, 1, 2, 4],
+                        help="0 runs the pipeline in the ingestion thread")
+    parser.add_argument("--section-mb", type=float, default=settings.INGESTION_SECTION_SIZE / (1024 * 1024))
+    parser.add_argument("--child", nargs=3, metavar=("PROCESSES", "PATH", "SECTION_MB"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        processes, path, section_mb = args.child
+        print(json.dumps(asyncio.run(run_child(int(processes), path, float(section_mb)))))
+        return
+
+    print(f"cpus: {os.cpu_count()}, content-defined chunking: {settings.CONTENT_DEFINED_CHUNKING}")
+    print(f"{'size_mb':>8} {'procs':>6} {'chunks':>9} {'seconds':>8} {'MB/s':>7} {'cores':>6} "
+          f"{'lag_p99_ms':>11} {'lag_max_ms':>11} {'peak_mb':>8} {'digest':>13}")
+    for size_mb in args.sizes:
+        path = scaled_txt_dataset(size_mb)
+        for processes in args.processes:
+            result = run_in_subprocess("benchmarks.parallel_chunking", [str(processes), path, str(args.section_mb)])
+            print(f"{size_mb:>8} {processes:>6} {result['chunks']:>9} {result['seconds']:>8} {result['mb_per_s']:>7} "
+                  f"{result['cores_used']:>6} {result['loop_lag_p99_ms']:>11} {result['loop_lag_max_ms']:>11} "
+                  f"{result['peak_rss_mb']:>8} {result['digest']:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Chunk count, embedding tokens per MB and token spread: character splitters vs the structured chunker.
+
+Every strategy chunks the same cleaned text. ``cross_section`` is the share of
+chunks that contain a heading below their first line, i.e. mix two sections.
+Tokens are counted with tiktoken for EMBEDDING_MODEL, or approximated from
+characters when its encoding cannot be loaded (printed at the top).
+
+Before measuring, the bundled datasets are indexed in both vector backends
+and searched with a ``section`` filter spelled as in the file
+("PARÍS, FRANCIA"), which must return chunks of that section only.
+
+    python -m benchmarks.structured_chunking [--size-mb 20] [--max-tokens 128 256 512]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from app.config.settings import settings
+from app.services.chunk_service import ChunkService, is_heading, section_key
+from app.services.embedding_service import EmbeddingService
+from app.services.vector_db_service import VectorDBService
+from app.utils.file_processor import FileProcessor
+from app.utils.tokens import get_encoding
+
+from . import _workdir
+from .datasets import DATASETS, scaled_txt_dataset
+from .fakes import HashingEmbeddings
+from .utils import percentile
+from .vector_backends import BACKENDS, make_backend
+
+# Headings of the bundled datasets as a client would type them.
+SECTION_FILTERS = ["PARÍS, FRANCIA", "## Dubái, Emiratos Árabes Unidos 🇦🇪"]
+
+
+def strategies(max_tokens_options):
+    chunker = ChunkService()
+    yield "characters", lambda pieces: chunker.iter_chunks(pieces, "txt")
+    yield "content_defined", lambda pieces: chunker.iter_content_defined_chunks(
+        chunker.iter_lines(pieces), settings.TXT_CHUNK_SIZE
+    )
+    for max_tokens in max_tokens_options:
+        yield f"structured_{max_tokens}", lambda pieces, max_tokens=max_tokens: chunker.iter_structured_chunks(
+            chunker.iter_lines(pieces), max_tokens
+        )
+
+
+def measure(path: str, chunk, count_tokens) -> dict:
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    started = time.perf_counter()
+    chunks = list(chunk(FileProcessor().iter_clean_txt_file(path, settings.INGESTION_BLOCK_SIZE)))
+    seconds = time.perf_counter() - started
+
+    tokens = [count_tokens(text) for text in chunks]
+    cross_section = sum(1 for text in chunks if any(is_heading(line.strip()) for line in text.split("\n")[1:]))
+    mean = statistics.fmean(tokens)
+    return {
+        "chunks": len(chunks),
+        "chunks_per_mb": round(len(chunks) / size_mb),
+        "tokens_per_mb": round(sum(tokens) / size_mb),
+        "tokens_mean": round(mean),
+        "tokens_p50": percentile(tokens, 50),
+        "tokens_p95": percentile(tokens, 95),
+        "tokens_max": max(tokens),
+        "tokens_cv": round(statistics.pstdev(tokens) / mean, 2),
+        "cross_section_pct": round(100 * cross_section / len(chunks), 1),
+        "mb_per_s": round(size_mb / seconds, 1),
+    }
+
+
+async def check_section_filter(backend: str) -> None:
+    embedding_service = EmbeddingService(embeddings=HashingEmbeddings())
+    vector_db_service = VectorDBService(
+        embedding_service=embedding_service,
+        backend=make_backend(backend, os.path.join(_workdir, f"section_filter_{backend}"))
+    )
+    chunker = ChunkService()
+    for file_id, path in enumerate(DATASETS, 1):
+        lines = chunker.iter_lines(FileProcessor().iter_clean_txt_file(path, settings.INGESTION_BLOCK_SIZE))
+        texts = list(chunker.iter_structured_chunks(lines, settings.CHUNK_MAX_TOKENS))
+        await vector_db_service.store_document_chunks(
+            file_id, {"chunks": texts, "embeddings": await embedding_service.create_embeddings(texts)}
+        )
+
+    lexical_index = vector_db_service.lexical_index
+    for section in SECTION_FILTERS:
+        for lexical in (lexical_index, None):
+            vector_db_service.lexical_index = lexical
+            results = await vector_db_service.similarity_search_with_scores("clima y moneda", k=5, section=section)
+            assert results, f"{backend}: no chunks for section {section!r}"
+            assert all(result["metadata"]["section_key"] == section_key(section) for result in results), \
+                f"{backend}: section filter {section!r} leaked"
+    vector_db_service.lexical_index = lexical_index
+    await vector_db_service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=float, default=20, help="scaled copy of the datasets used for throughput")
+    parser.add_argument("--max-tokens", type=int, nargs="+", default=[settings.CHUNK_MAX_TOKENS])
+    args = parser.parse_args()
+
+    for backend in BACKENDS:
+        asyncio.run(check_section_filter(backend))
+    print(f"section filter: {', '.join(repr(section) for section in SECTION_FILTERS)} found on {', '.join(BACKENDS)}")
+
+    count_tokens = ChunkService().count_tokens
+    counter = "tiktoken" if get_encoding(settings.EMBEDDING_MODEL) is not None else "approximate (tiktoken unavailable)"
+    print(f"model: {settings.EMBEDDING_MODEL}, token counter: {counter}, "
+          f"characters: {settings.TXT_CHUNK_SIZE} chars / {settings.CHUNK_OVERLAP} overlap")
+
+    inputs = [(os.path.basename(path), path) for path in DATASETS]
+    inputs.append((f"scaled_{args.size_mb}mb", scaled_txt_dataset(args.size_mb)))
+
+    print(f"{'input':>30} {'strategy':>16} {'chunks':>8} {'chunks/MB':>10} {'tokens/MB':>10} {'mean':>5} "
+          f"{'p50':>5} {'p95':>5} {'max':>5} {'cv':>5} {'cross%':>7} {'MB/s':>6}")
+    for name, path in inputs:
+        for strategy, chunk in strategies(args.max_tokens):
+            result = measure(path, chunk, count_tokens)
+            print(f"{name:>30} {strategy:>16} {result['chunks']:>8} {result['chunks_per_mb']:>10} "
+                  f"{result['tokens_per_mb']:>10} {result['tokens_mean']:>5} {result['tokens_p50']:>5} "
+                  f"{result['tokens_p95']:>5} {result['tokens_max']:>5} {result['tokens_cv']:>5} "
+                  f"{result['cross_section_pct']:>7} {result['mb_per_s']:>6}")
+
+
+if __name__ == "__main__":
+    main()
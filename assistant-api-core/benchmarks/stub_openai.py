@@ -0,0 +1,205 @@
+"""Local stand-in for the OpenAI HTTP API, served by uvicorn on a random port.
+
+Embeddings are deterministic hashes of the input text. Latency and a
+sliding-window token limit (answered with 429 + Retry-After) are configurable
+so client-side batching, concurrency and backoff can be exercised offline.
+
+Chat completions answer with a fixed-length text derived from the question,
+streamed as SSE when asked. When tools are offered and the user asks for a
+note ("nota"), the first reply calls the first tool and the reply after the
+tool result is the answer, so agent paths run end to end.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from .utils import serve_in_thread
+
+
+class StubOpenAI:
+    def __init__(
+        self,
+        dimensions: int = 64,
+        base_latency: float = 0.05,
+        per_item_latency: float = 0.002,
+        rate_limit_tokens: Optional[int] = None,
+        rate_limit_window: float = 60.0,
+        chat_latency: float = 0.2,
+        chat_token_latency: float = 0.005,
+        answer_words: int = 40
+    ):
+        self.dimensions = dimensions
+        self.base_latency = base_latency
+        self.per_item_latency = per_item_latency
+        self.rate_limit_tokens = rate_limit_tokens
+        self.rate_limit_window = rate_limit_window
+        self.chat_latency = chat_latency
+        self.chat_token_latency = chat_token_latency
+        self.answer_words = answer_words
+        self.requests = 0
+        self.rate_limited = 0
+        self.items = 0
+        self.chat_requests = 0
+        self.chat_streams = 0
+        self.tool_calls = 0
+        self._window = deque()
+        self.app = self._build_app()
+        self.server: Optional[uvicorn.Server] = None
+        self.base_url = ""
+
+    def vector(self, text: str) -> np.ndarray:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        values = np.random.default_rng(seed).standard_normal(self.dimensions).astype(np.float32)
+        return values / np.linalg.norm(values)
+
+    def _retry_after(self, tokens: int) -> Optional[float]:
+        """Seconds until the request fits in the rate-limit window, or None if it fits now."""
+        if not self.rate_limit_tokens:
+            return None
+        now = time.monotonic()
+        while self._window and now - self._window[0][0] > self.rate_limit_window:
+            self._window.popleft()
+        if self._window and sum(t for _, t in self._window) + tokens > self.rate_limit_tokens:
+            return max(0.01, self.rate_limit_window - (now - self._window[0][0]))
+        self._window.append((now, tokens))
+        return None
+
+    def _answer_words(self, question: str) -> List[str]:
+        digest = hashlib.sha256(question.encode("utf-8")).hexdigest()
+        return [f"Respuesta {digest[:8]}:"] + [f"dato{digest[i % 56:i % 56 + 8]}" for i in range(self.answer_words - 1)]
+
+    def _reply(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """The assistant message for a chat request: either a tool call or answer text."""
+        messages = body.get("messages", [])
+        last = messages[-1] if messages else {}
+        question = next((str(m.get("content", "")) for m in reversed(messages) if m.get("role") == "user"), "")
+        tools = body.get("tools") or []
+
+        if tools and last.get("role") == "user" and "nota" in question.lower():
+            self.tool_calls += 1
+            name = tools[0]["function"]["name"]
+            # Plain content: create_note un-escapes quotes and newlines before parsing.
+            content = " ".join(self._answer_words(question)[:10])
+            note = json.dumps({"title": "Nota de prueba", "content": content}, ensure_ascii=False)
+            return {"tool_calls": [{
+                "id": f"call_{hashlib.sha256(question.encode('utf-8')).hexdigest()[:12]}",
+                "type": "function",
+                "function": {"name": name, "arguments": json.dumps({"note_data": note}, ensure_ascii=False)}
+            }]}
+        return {"content": " ".join(self._answer_words(question))}
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/v1/embeddings")
+        async def embeddings(request: Request):
+            body = await request.json()
+            inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+            tokens = sum(max(1, len(str(text)) // 4) for text in inputs)
+            self.requests += 1
+
+            retry_after = self._retry_after(tokens)
+            if retry_after is not None:
+                self.rate_limited += 1
+                return JSONResponse(
+                    status_code=429,
+                    headers={"retry-after": f"{retry_after:.3f}"},
+                    content={"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}
+                )
+
+            await asyncio.sleep(self.base_latency + self.per_item_latency * len(inputs))
+            self.items += len(inputs)
+
+            data = []
+            for index, text in enumerate(inputs):
+                vector = self.vector(str(text))
+                if body.get("encoding_format") == "base64":
+                    embedding = base64.b64encode(vector.tobytes()).decode("ascii")
+                else:
+                    embedding = vector.tolist()
+                data.append({"object": "embedding", "index": index, "embedding": embedding})
+
+            return {
+                "object": "list",
+                "data": data,
+                "model": body.get("model", "stub"),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+            }
+
+        @app.post("/v1/chat/completions")
+        async def chat_completions(request: Request):
+            body = await request.json()
+            self.chat_requests += 1
+            reply = self._reply(body)
+            model = body.get("model", "stub")
+            prompt_tokens = sum(max(1, len(str(m.get("content") or "")) // 4) for m in body.get("messages", []))
+            words = reply["content"].split(" ") if "content" in reply else []
+            usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": max(1, len(words)),
+                "total_tokens": prompt_tokens + max(1, len(words))
+            }
+            finish_reason = "tool_calls" if "tool_calls" in reply else "stop"
+            response_id = f"chatcmpl-{self.chat_requests}"
+
+            if not body.get("stream"):
+                await asyncio.sleep(self.chat_latency + self.chat_token_latency * len(words))
+                return {
+                    "id": response_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": None, **reply}, "finish_reason": finish_reason}],
+                    "usage": usage
+                }
+
+            self.chat_streams += 1
+            include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+            def chunk(delta: Dict[str, Any], finish: Optional[str] = None, **extra) -> str:
+                payload = {
+                    "id": response_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish}] if delta is not None else [],
+                    **extra
+                }
+                return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+            async def events():
+                await asyncio.sleep(self.chat_latency)
+                if "tool_calls" in reply:
+                    calls = [{"index": i, **call} for i, call in enumerate(reply["tool_calls"])]
+                    yield chunk({"role": "assistant", "content": None, "tool_calls": calls})
+                else:
+                    yield chunk({"role": "assistant", "content": ""})
+                    for i, word in enumerate(words):
+                        await asyncio.sleep(self.chat_token_latency)
+                        yield chunk({"content": word if i == 0 else f" {word}"})
+                yield chunk({}, finish_reason)
+                if include_usage:
+                    yield chunk(None, usage=usage)
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        return app
+
+    def start(self) -> str:
+        self.server, base_url = serve_in_thread(self.app)
+        self.base_url = f"{base_url}/v1"
+        return self.base_url
+
+    def stop(self) -> None:
+        if self.server is not None:
+            self.server.should_exit = True
@@ -0,0 +1,40 @@
+"""Local stand-in for the Strapi notes API used by the create_note tool."""
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+from .utils import serve_in_thread
+
+
+class StubStrapi:
+    def __init__(self, latency: float = 0.02):
+        self.latency = latency
+        self.requests = 0
+        self.notes: List[Dict[str, Any]] = []
+        self.app = self._build_app()
+        self.server: Optional[uvicorn.Server] = None
+        self.base_url = ""
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/api/notes", status_code=201)
+        async def create_note(request: Request):
+            body = await request.json()
+            self.requests += 1
+            await asyncio.sleep(self.latency)
+            note = {"id": len(self.notes) + 1, "documentId": f"note{len(self.notes) + 1}", **body["data"]}
+            self.notes.append(note)
+            return {"data": note, "meta": {}}
+
+        return app
+
+    def start(self) -> str:
+        self.server, self.base_url = serve_in_thread(self.app)
+        return self.base_url
+
+    def stop(self) -> None:
+        if self.server is not None:
+            self.server.should_exit = True
@@ -0,0 +1,49 @@
+import json
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import List, Tuple
+
+import uvicorn
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_in_subprocess(module: str, args: List[str]) -> dict:
+    """Runs ``python -m module --child *args`` and parses the JSON line it prints last.
+
+    A fresh process per measurement keeps ru_maxrss specific to that run.
+    """
+    output = subprocess.run(
+        [sys.executable, "-m", module, "--child", *args],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def percentile(samples: List[float], p: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_in_thread(app) -> Tuple[uvicorn.Server, str]:
+    """Serves an ASGI app on a free localhost port from a daemon thread; returns the server and its base URL."""
+    port = free_port()
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}"
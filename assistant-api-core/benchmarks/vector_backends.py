@@ -0,0 +1,138 @@
+"""Query latency and memory of the Chroma and NumPy vector backends at growing sizes.
+
+For every size and backend one subprocess loads random unit vectors (spread
+over 100 files) and a second, fresh subprocess opens the index and runs
+top-k queries with and without a ``file_id`` filter, so the reported memory
+is what a serving worker holds. ``anon MB`` is memory no other worker can
+share: the NumPy matrix is a file-backed mapping served from the page cache,
+so it counts towards RSS but not here. Loading 1M chunks
+into Chroma takes a long time; pass smaller ``--sizes`` for a quick run.
+
+    python -m benchmarks.vector_backends [--sizes 10000 100000 1000000] [--dimensions 256] [--queries 200]
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from . import _workdir
+from .utils import peak_rss_mb, percentile, run_in_subprocess
+
+BACKENDS = ("chroma", "numpy")
+FILES = 100
+BATCH = 5000
+
+
+def make_backend(backend: str, path: str):
+    if backend == "numpy":
+        from app.services.vector_backends.numpy_backend import NumpyBackend
+        return NumpyBackend(path)
+    from app.services.vector_backends.chroma import ChromaBackend
+    return ChromaBackend("embedded", path, "benchmark", host="", port=0, ssl=False)
+
+
+def random_vectors(rng: np.random.Generator, count: int, dimensions: int) -> np.ndarray:
+    vectors = rng.standard_normal((count, dimensions), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def anonymous_mb() -> float:
+    """Resident memory not backed by a file (heap, private copies), Linux only."""
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        return float("nan")
+    return int(fields["Anonymous"].split()[0]) / 1024
+
+
+async def build(backend: str, path: str, size: int, dimensions: int) -> dict:
+    index = make_backend(backend, path)
+    rng = np.random.default_rng(0)
+    started = time.perf_counter()
+    for start in range(0, size, BATCH):
+        count = min(BATCH, size - start)
+        await index.upsert(
+            ids=[f"chunk_{i}" for i in range(start, start + count)],
+            embeddings=random_vectors(rng, count, dimensions).tolist(),
+            documents=[f"chunk {i}" for i in range(start, start + count)],
+            metadatas=[{"file_id": str(i % FILES), "chunk_index": i} for i in range(start, start + count)]
+        )
+    elapsed = time.perf_counter() - started
+    await index.close()
+    return {"build_s": elapsed}
+
+
+async def query(backend: str, path: str, dimensions: int, queries: int, k: int) -> dict:
+    started = time.perf_counter()
+    index = make_backend(backend, path)
+    await index.connect()
+    open_ms = (time.perf_counter() - started) * 1000
+    rng = np.random.default_rng(1)
+    query_vectors = random_vectors(rng, queries, dimensions).tolist()
+
+    latencies = {"all": [], "file": []}
+    for i, vector in enumerate(query_vectors):
+        for name, where in (("all", None), ("file", {"file_id": str(i % FILES)})):
+            started = time.perf_counter()
+            results = await index.query(vector, k, where)
+            latencies[name].append((time.perf_counter() - started) * 1000)
+            assert len(results) == k
+    await index.close()
+    return {
+        "open_ms": open_ms,
+        **{f"{name}_p50": percentile(samples, 50) for name, samples in latencies.items()},
+        **{f"{name}_p95": percentile(samples, 95) for name, samples in latencies.items()},
+        "rss_mb": peak_rss_mb(),
+        "anon_mb": anonymous_mb(),
+    }
+
+
+def main(args):
+    print(f"{args.dimensions} dimensions, {args.queries} queries, k={args.k}, {FILES} files")
+    print(
+        f"{'backend':<8} {'chunks':>9} {'build s':>9} {'open ms':>9} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'file p50':>9} {'file p95':>9} {'RSS MB':>8} {'anon MB':>8}"
+    )
+    for size in args.sizes:
+        for backend in args.backends:
+            path = os.path.join(_workdir, f"{backend}_{size}")
+            common = ["--backend", backend, "--path", path, "--dimensions", str(args.dimensions)]
+            built = run_in_subprocess("benchmarks.vector_backends", [*common, "--phase", "build", "--size", str(size)])
+            result = run_in_subprocess(
+                "benchmarks.vector_backends",
+                [*common, "--phase", "query", "--queries", str(args.queries), "--k", str(args.k)]
+            )
+            print(
+                f"{backend:<8} {size:>9} {built['build_s']:>9.1f} {result['open_ms']:>9.1f} "
+                f"{result['all_p50']:>8.2f} {result['all_p95']:>8.2f} "
+                f"{result['file_p50']:>9.2f} {result['file_p95']:>9.2f} "
+                f"{result['rss_mb']:>8.1f} {result['anon_mb']:>8.1f}"
+            )
+            shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--child", action="store_true")
+    parser.add_argument("--phase", choices=["build", "query"])
+    parser.add_argument("--backend", choices=BACKENDS)
+    parser.add_argument("--path")
+    parser.add_argument("--size", type=int)
+    args = parser.parse_args()
+
+    if args.child and args.phase == "build":
+        print(json.dumps(asyncio.run(build(args.backend, args.path, args.size, args.dimensions))))
+    elif args.child:
+        print(json.dumps(asyncio.run(query(args.backend, args.path, args.dimensions, args.queries, args.k))))
+    else:
+        main(args)
@@ -0,0 +1,172 @@
+"""Retrieval throughput of N worker processes sharing one Chroma server.
+
+Starts a local Chroma server (``chroma run``), loads the bundled datasets
+through VECTOR_DB_MODE=http, then runs 1, 2 and 4 worker processes that each
+issue similarity searches over their own pooled async client, the way
+gunicorn workers would. The embedded single-process store is measured as the
+baseline. Requires the ``chroma`` CLI that ships with chromadb.
+
+    python -m benchmarks.vector_db_workers [--requests 300] [--concurrency 8] [--workers 1 2 4]
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from . import _workdir
+from .datasets import DATASETS
+
+QUERIES = [
+    "¿Qué moneda se usa en Tokio?",
+    "Mejor época para visitar París",
+    "Clima de Reikiavik en invierno",
+    "Presupuesto diario en Cancún",
+    "Atracciones principales de Roma",
+]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_chroma_server(port: int) -> subprocess.Popen:
+    executable = shutil.which("chroma") or os.path.join(os.path.dirname(sys.executable), "chroma")
+    process = subprocess.Popen(
+        [executable, "run", "--path", os.path.join(_workdir, "chroma_server"), "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://localhost:{port}/api/v2/heartbeat", timeout=1).raise_for_status()
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Chroma server did not start")
+
+
+def make_service():
+    from app.services.embedding_service import EmbeddingService
+    from app.services.vector_db_service import VectorDBService
+    from .fakes import HashingEmbeddings
+
+    embedding_service = EmbeddingService(embeddings=HashingEmbeddings())
+    return embedding_service, VectorDBService(embedding_service=embedding_service)
+
+
+async def load(embedding_service, vector_db_service) -> int:
+    from app.services.chunk_service import ChunkService
+    from app.utils.file_processor import FileProcessor
+
+    stored = 0
+    for file_id, path in enumerate(DATASETS, 1):
+        content = await FileProcessor().read_file_content(path, "txt")
+        chunks = ChunkService().create_chunks(content, "txt")
+        result = await vector_db_service.store_document_chunks(
+            file_id, {"chunks": chunks, "embeddings": await embedding_service.create_embeddings(chunks)}
+        )
+        stored += result["stored_chunks"]
+    return stored
+
+
+async def search_load(requests: int, concurrency: int, start_at: float) -> dict:
+    embedding_service, vector_db_service = make_service()
+    await vector_db_service.connect()
+    embeddings = {query: await embedding_service.embed_query(query) for query in QUERIES}
+    semaphore = asyncio.Semaphore(concurrency)
+    empty = 0
+
+    async def one(i: int):
+        nonlocal empty
+        query = QUERIES[i % len(QUERIES)]
+        async with semaphore:
+            results = await vector_db_service.similarity_search_with_scores(
+                query, k=5, query_embedding=embeddings[query]
+            )
+        empty += not results
+
+    await asyncio.sleep(max(0.0, start_at - time.time()))
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {"requests": requests, "elapsed": elapsed, "empty": empty}
+
+
+def run_workers(count: int, requests: int, concurrency: int, env: dict) -> dict:
+    start_at = time.time() + 3 + count
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.vector_db_workers", "--child",
+             "--requests", str(requests), "--concurrency", str(concurrency), "--start-at", str(start_at)],
+            env=env, stdout=subprocess.PIPE, text=True
+        )
+        for _ in range(count)
+    ]
+    results = [json.loads(worker.communicate()[0].strip().splitlines()[-1]) for worker in workers]
+    wall = max(result["elapsed"] for result in results)
+    total = sum(result["requests"] for result in results)
+    return {"requests": total, "rps": total / wall, "empty": sum(result["empty"] for result in results)}
+
+
+def main(args):
+    port = free_port()
+    server = start_chroma_server(port)
+    http_env = {
+        **os.environ,
+        "VECTOR_DB_MODE": "http",
+        "CHROMA_HOST": "localhost",
+        "CHROMA_PORT": str(port),
+        "CHROMA_DB_PATH": os.path.join(_workdir, "chroma_http_index"),
+    }
+    try:
+        loaded = subprocess.run(
+            [sys.executable, "-m", "benchmarks.vector_db_workers", "--child-load"],
+            env=http_env, check=True, capture_output=True, text=True
+        ).stdout.strip().splitlines()[-1]
+        print(f"Chroma server on :{port}, {loaded} chunks loaded")
+
+        embedded_env = {**os.environ, "VECTOR_DB_MODE": "embedded"}
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.vector_db_workers", "--child-load"],
+            env=embedded_env, check=True, capture_output=True
+        )
+        print(f"{'mode':<12} {'workers':>7} {'requests':>9} {'req/s':>9}")
+        baseline = run_workers(1, args.requests, args.concurrency, embedded_env)
+        print(f"{'embedded':<12} {1:>7} {baseline['requests']:>9} {baseline['rps']:>9.1f}")
+        for count in args.workers:
+            result = run_workers(count, args.requests, args.concurrency, http_env)
+            assert result["empty"] == 0, "a worker could not see the shared store"
+            print(f"{'http':<12} {count:>7} {result['requests']:>9} {result['rps']:>9.1f}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--start-at", type=float, default=0.0)
+    parser.add_argument("--child", action="store_true")
+    parser.add_argument("--child-load", action="store_true")
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(search_load(args.requests, args.concurrency, args.start_at))))
+    elif args.child_load:
+        async def load_store():
+            embedding_service, vector_db_service = make_service()
+            return await load(embedding_service, vector_db_service)
+        print(asyncio.run(load_store()))
+    else:
+        main(args)
@@ -0,0 +1,113 @@
+"""Memory, recall@k and latency of float32, float16 and int8 vector storage.
+
+Chunks are written through ``VectorDBService.store_document_chunks`` (same ids
+and metadata as real uploads) into a NumPy index per storage format. Vectors
+are drawn around random topic centres so neighbours are close together, and
+queries are perturbed copies of stored chunks. Recall is measured against
+exact float32 search over the same vectors, with and without full-precision
+re-scoring of the shortlist. ``scanned`` is what every query reads (and what
+stays hot in the page cache); ``disk`` includes the float32 copy that only
+re-scored rows are read from.
+
+    python -m benchmarks.vector_quantization [--size 100000] [--dimensions 1536] [--queries 200] [--k 10]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import numpy as np
+
+from app.config.settings import settings
+from app.services.embedding_service import EmbeddingService
+from app.services.vector_backends.numpy_backend import NumpyBackend
+from app.services.vector_db_service import VectorDBService
+
+from . import _workdir
+from .fakes import CountingEmbeddings
+from .utils import percentile
+
+FILES = 100
+TOPICS = 1000
+MULTIPLIERS = (1, 4)
+
+
+def clustered_vectors(rng: np.random.Generator, count: int, dimensions: int, centres: np.ndarray) -> np.ndarray:
+    vectors = centres[rng.integers(0, len(centres), count)] + 0.6 * rng.standard_normal((count, dimensions), dtype=np.float32) / np.sqrt(dimensions)
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+async def load(service: VectorDBService, matrix: np.ndarray) -> list:
+    """Stores the matrix as FILES documents and returns the chunk id of every row."""
+    ids = []
+    per_file = len(matrix) // FILES
+    for file_id in range(FILES):
+        start = file_id * per_file
+        end = len(matrix) if file_id == FILES - 1 else start + per_file
+        chunks = [f"Documento {file_id}, fragmento {i}" for i in range(start, end)]
+        result = await service.store_document_chunks(
+            file_id, {"chunks": chunks, "embeddings": matrix[start:end].tolist(), "start_index": start}
+        )
+        assert result["success"], result["message"]
+        ids.extend(service.chunk_metadata(file_id, i, chunk)["source"] for i, chunk in zip(range(start, end), chunks))
+    return ids
+
+
+def bytes_per_row(backend: NumpyBackend, dimensions: int, scanned_only: bool) -> int:
+    total = 0
+    for attribute, (_, dtype, shape) in backend._layout(dimensions).items():
+        if scanned_only and attribute == "vectors" and backend.storage != "float32":
+            continue
+        total += np.dtype(dtype).itemsize * int(np.prod(shape))
+    return total
+
+
+async def measure(backend: NumpyBackend, queries: np.ndarray, truth: list, ids: list, k: int) -> dict:
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        results = await backend.query(query.tolist(), k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits += len({doc_id for _, _, doc_id, _ in results} & {ids[row] for row in expected})
+    return {"recall": hits / (k * len(queries)), "p50": percentile(latencies, 50), "p95": percentile(latencies, 95)}
+
+
+async def main(args):
+    settings.HYBRID_SEARCH_ENABLED = False
+    rng = np.random.default_rng(0)
+    centres = rng.standard_normal((TOPICS, args.dimensions), dtype=np.float32) / np.sqrt(args.dimensions)
+    matrix = clustered_vectors(rng, args.size, args.dimensions, centres)
+    sample = rng.choice(args.size, args.queries, replace=False)
+    queries = matrix[sample] + 0.3 * rng.standard_normal((args.queries, args.dimensions), dtype=np.float32) / np.sqrt(args.dimensions)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = [np.argsort(-(matrix @ query))[:args.k] for query in queries]
+
+    embedding_service = EmbeddingService(embeddings=CountingEmbeddings(dimensions=args.dimensions))
+    per_100k = 100_000 / 2**20
+    print(f"{args.size} chunks, {args.dimensions} dimensions, {args.queries} queries, k={args.k}")
+    print(f"{'storage':<8} {'rescore':>8} {'scanned MB/100k':>16} {'disk MB/100k':>13} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for storage in NumpyBackend.STORAGE_FORMATS:
+        path = os.path.join(_workdir, f"quantization_{storage}")
+        service = VectorDBService(embedding_service=embedding_service, backend=NumpyBackend(path, storage=storage))
+        ids = await load(service, matrix)
+        await service.close()
+
+        for multiplier in (MULTIPLIERS if storage != "float32" else (1,)):
+            backend = NumpyBackend(path, storage=storage, rescore_multiplier=multiplier)
+            result = await measure(backend, queries, truth, ids, args.k)
+            print(
+                f"{storage:<8} {('-' if storage == 'float32' else f'x{multiplier}'):>8} "
+                f"{bytes_per_row(backend, args.dimensions, True) * per_100k:>16.1f} "
+                f"{bytes_per_row(backend, args.dimensions, False) * per_100k:>13.1f} "
+                f"{result['recall']:>9.3f} {result['p50']:>8.2f} {result['p95']:>8.2f}"
+            )
+            await backend.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--dimensions", type=int, default=settings.EMBEDDING_DIMENSIONS)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,22 @@
+"""Gunicorn hooks for running several workers behind one /metrics endpoint.
+
+With PROMETHEUS_MULTIPROC_DIR set every worker writes its metrics to files in
+that directory and /metrics merges them. The directory is emptied when the
+master starts so values from a previous run are not added again, and the
+files of a worker that exits are marked dead.
+"""
+import os
+import shutil
+
+
+def on_starting(server):
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
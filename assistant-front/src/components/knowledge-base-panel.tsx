@@ -154,8 +154,8 @@ export function KnowledgeBasePanel() {
                                                 </TableCell>
                                                 <TableCell>
                                                     <div className="max-w-[300px] text-xs text-slate-500 truncate">
-                                                        {item.content_preview.substring(0, 100)}
-                                                        {item.content_preview.length > 100 && "..."}
+                                                        {item.content_preview?.substring(0, 100)}
+                                                        {(item.content_preview?.length ?? 0) > 100 && "..."}
                                                     </div>
                                                 </TableCell>
                                             </TableRow>
@@ -22,7 +22,7 @@ export interface FileInfo {
     file_type: "txt" | "csv"
     file_size: number
     upload_date: Date
-    content_preview: string
+    content_preview: string | null
 }
 
 export interface ChatRequest {